@@ -1,11 +1,58 @@
+import time
+import uuid
+
 import streamlit as st
-import requests
+
+from compare import CompareRun, describe
+from conversation import ConversationEngine
+from dispatcher import Dispatcher
+from generation_metrics import METRICS_PATH, MetricsStore, metrics_row, summarize, to_csv, to_json
+from model_manager import RESIDENCY, ModelManager
+from ollama_client import OLLAMA_URL, GenerationStats, OllamaClient, OllamaError
+from response_cache import CACHE_PATH, ResponseCache
 
 # =========================
 # Config
 # =========================
-OLLAMA_API = "http://localhost:11434/api/generate"
 AVAILABLE_MODELS = ["mistral:7b", "starcoder2:3b"]
+STREAM_RESPONSES = True       # show the answer as it is generated
+STREAM_RENDER_INTERVAL = 0.05  # seconds between chat redraws while streaming
+CONNECT_TIMEOUT = 3.05        # seconds; a stopped server fails fast instead of hanging
+READ_TIMEOUT = 300            # seconds to wait for the next part of a reply
+RESPONSE_CACHE = True         # answer repeated questions from response_cache.db
+SEMANTIC_CACHE_MODEL = None   # Ollama embedding model for near-duplicates, e.g. "nomic-embed-text"
+MODEL_STATUS_REFRESH = 2      # seconds between sidebar model status updates
+RECORD_METRICS = True         # keep Ollama's timings for every reply in generation_metrics.db
+METRICS_CHART_TURNS = 100     # most recent replies shown in the sidebar charts
+QUEUE_FEEDBACK_INTERVAL = 0.5  # seconds between queue position updates while waiting
+
+# One pooled keep-alive client per process, shared by every session and rerun
+@st.cache_resource
+def get_client():
+    return OllamaClient(OLLAMA_URL, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT)
+
+# Preloads the selected model and keeps models resident per RESIDENCY
+@st.cache_resource
+def get_models():
+    return ModelManager(get_client(), AVAILABLE_MODELS, RESIDENCY, dispatcher=get_dispatcher())
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(CACHE_PATH, client=get_client(), embed_model=SEMANTIC_CACHE_MODEL)
+
+# Requests from every session wait their turn here; see dispatcher.py
+@st.cache_resource
+def get_dispatcher():
+    return Dispatcher()
+
+@st.cache_resource
+def get_metrics():
+    return MetricsStore(METRICS_PATH)
+
+def record_metrics(model, mode, messages, stats, error=None):
+    # Replies that never reached Ollama have no timings to keep
+    if RECORD_METRICS and stats.total is not None:
+        get_metrics().record(metrics_row(st.session_state.session_id, model, mode, messages, stats, error))
 
 # =========================
 # Streamlit UI
@@ -24,67 +71,265 @@ selected_model = st.sidebar.selectbox(
 if "messages" not in st.session_state:
     st.session_state.messages = []  # full chat history
 if "current_model" not in st.session_state:
-    st.session_state.current_model = selected_model
+    st.session_state.current_model = None  # set below, which also warms it
+if "generating" not in st.session_state:
+    st.session_state.generating = False
+if "engine" not in st.session_state:
+    st.session_state.engine = ConversationEngine(get_dispatcher())  # per-model Ollama context
+if "cache_hits" not in st.session_state:
+    st.session_state.cache_hits = {}  # message index -> cache label
+if "compare_turns" not in st.session_state:
+    st.session_state.compare_turns = []      # compare mode turns, for display
+    st.session_state.compare_histories = {}  # model -> its own chat history
+    st.session_state.compare_engines = {}    # model -> its own conversation engine
+    st.session_state.compare_running = False
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex  # groups this tab's rows in the metrics store
+
+# Clicking Stop (or anything else) reruns the script, which interrupts a
+# response still streaming. Its partial text is already in the history.
+st.sidebar.button("⏹ Stop generating")
+use_cache = st.sidebar.checkbox("Use response cache", value=RESPONSE_CACHE)
+compare_mode = st.sidebar.checkbox("⚖️ Compare models")
+compare_models = st.sidebar.multiselect("Models to compare", AVAILABLE_MODELS, default=AVAILABLE_MODELS,
+                                        disabled=not compare_mode)
+if st.session_state.generating:
+    st.session_state.generating = False
+    role, text = st.session_state.messages[-1]
+    st.session_state.messages[-1] = (role, text + "\n\n*(stopped)*")
+if st.session_state.compare_running:
+    st.session_state.compare_running = False
+    turn = st.session_state.compare_turns[-1]
+    for model in turn["models"]:
+        if model not in turn["finished"]:
+            turn["answers"][model] += "\n\n*(stopped)*"
+            st.session_state.compare_histories[model][-1] = ("assistant", turn["answers"][model])
+
+# =========================
+# Request queue
+# =========================
+# Waits for this session's turn to send to `model`, showing the queue
+# position meanwhile. The ticket must be released once the reply is done;
+# an interrupted wait (Stop, another rerun) leaves the queue here.
+def take_turn(model, placeholder):
+    ticket = get_dispatcher().submit(st.session_state.session_id, model)
+    try:
+        while not ticket.wait(QUEUE_FEEDBACK_INTERVAL):
+            placeholder.markdown(f"⏳ Waiting for {model}: position {ticket.position()} in the queue, "
+                                 f"{ticket.waited():.0f} s")
+    except BaseException:
+        ticket.release()
+        raise
+    placeholder.empty()
+    return ticket
 
 # =========================
 # Handle Model Switching
 # =========================
+# The model manager is shared by every session, so it only hears about this
+# session's choice when it changes; it starts loading a newly selected model
+# while the next prompt is typed
 if selected_model != st.session_state.current_model:
     st.session_state.current_model = selected_model
+    get_models().select(st.session_state.session_id, selected_model)
+else:
+    get_models().touch(st.session_state.session_id)
+if compare_mode:
+    get_models().prepare(compare_models)
+
+@st.fragment(run_every=MODEL_STATUS_REFRESH)
+def show_model_status():
+    for model, text in get_models().status().items():
+        st.caption(f"**{model}**: {text}")
+    for model, (generating, waiting) in get_dispatcher().status().items():
+        st.caption(f"**{model}**: {generating} generating, {waiting} waiting")
+
+with st.sidebar:
+    show_model_status()
 
 # =========================
-# Display Chat History
+# Compare mode
 # =========================
-for role, text in st.session_state.messages:
-    with st.chat_message(role):
-        st.markdown(text)
+# The same question goes to every selected model at once; each model keeps
+# its own history and answers in its own column
+def compare_columns(turn):
+    with st.chat_message("user"):
+        st.markdown(turn["prompt"])
+    bodies, metrics = [], []
+    for column, model in zip(st.columns(len(turn["models"])), turn["models"]):
+        with column:
+            st.markdown(f"**{model}**")
+            bodies.append(st.empty())
+            metrics.append(st.empty())
+    return bodies, metrics
+
+def show_compare_turn(turn):
+    bodies, metrics = compare_columns(turn)
+    for body, metric, model in zip(bodies, metrics, turn["models"]):
+        body.markdown(turn["answers"][model])
+        metric.caption(turn["metrics"].get(model, ""))
+
+def run_compare(prompt, models):
+    histories = st.session_state.compare_histories
+    engines = st.session_state.compare_engines
+    turn = {"prompt": prompt, "models": list(models), "answers": {model: "" for model in models},
+            "metrics": {}, "finished": []}
+    st.session_state.compare_turns.append(turn)
+    jobs = []
+    for model in models:
+        history = histories.setdefault(model, [])
+        history.append(("user", prompt))
+        jobs.append((model, engines.setdefault(model, ConversationEngine(get_dispatcher())), list(history)))
+        # Partial answers are kept here as they grow, like the single chat
+        history.append(("assistant", ""))
+    bodies, metrics = compare_columns(turn)
+    run = CompareRun(get_client(), jobs, get_dispatcher(), st.session_state.session_id)
+    st.session_state.compare_running = True
+    run.start()
+    try:
+        for changed in run.updates(STREAM_RENDER_INTERVAL):
+            for i, model in enumerate(models):
+                if i in changed:
+                    text = run.texts[i] + (f"\n\n⚠️ Error: {run.errors[i]}" if run.errors[i] else "")
+                    turn["answers"][model] = text
+                    histories[model][-1] = ("assistant", text)
+                    if run.done[i] and model not in turn["finished"]:
+                        turn["finished"].append(model)
+                        record_metrics(model, "compare", jobs[i][2], run.stats[i], run.errors[i])
+                    bodies[i].markdown(text if run.done[i] else text + "▌")
+                # Live rate estimates change for every model still streaming
+                turn["metrics"][model] = describe(run.stats[i], run.done[i], run.tickets[i])
+                metrics[i].caption(turn["metrics"][model])
+    finally:
+        run.cancel()
+    st.session_state.compare_running = False
 
 # =========================
-# Build conversation context
+# Display Chat History
 # =========================
-def build_context(messages):
-    conversation = ""
-    for role, msg in messages:
-        if role == "user":
-            conversation += f"User: {msg}\n"
-        else:
-            conversation += f"Assistant: {msg}\n"
-    return conversation
+if compare_mode:
+    for turn in st.session_state.compare_turns:
+        show_compare_turn(turn)
+else:
+    for i, (role, text) in enumerate(st.session_state.messages):
+        with st.chat_message(role):
+            st.markdown(text)
+            if i in st.session_state.cache_hits:
+                st.caption(st.session_state.cache_hits[i])
 
 # =========================
 # User Input
 # =========================
-if prompt := st.chat_input("Type your message..."):
+prompt = st.chat_input("Type your message...")
+if prompt and compare_mode and compare_models:
+    run_compare(prompt, compare_models)
+elif prompt:
     # Add user input to chat history
     st.session_state.messages.append(("user", prompt))
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # Build full conversation context
-    conversation_context = build_context(st.session_state.messages)
-
-    # Send request to Ollama API with full history
-    response = requests.post(
-        OLLAMA_API,
-        json={
-            "model": st.session_state.current_model,
-            "prompt": conversation_context,
-            "stream": False
-        }
-    )
-
-    if response.status_code == 200:
-        result = response.json().get("response", "")
-    else:
-        result = f"⚠️ Error: {response.text}"
-
-    # Add assistant response to history
-    st.session_state.messages.append(("assistant", result))
+    # Send the new turn; the engine continues from the model's saved context
+    # or replays the full history when there is none
+    engine = st.session_state.engine
+    history = list(st.session_state.messages)
+    stats = GenerationStats()
+    cache = get_response_cache() if use_cache else None
+    hit = cache.get(st.session_state.current_model, history) if cache is not None else None
+    failed = False
+    ticket = None
     with st.chat_message("assistant"):
-        st.markdown(result)
+        placeholder = st.empty()
+        if hit is not None:
+            result = hit.response
+            st.session_state.messages.append(("assistant", result))
+            st.session_state.cache_hits[len(st.session_state.messages) - 1] = hit.label()
+            st.caption(hit.label())
+        elif STREAM_RESPONSES:
+            # The reply is kept in the history as it grows, so a stop keeps it
+            st.session_state.messages.append(("assistant", ""))
+            st.session_state.generating = True
+            result = ""
+            last_render = 0.0
+            try:
+                ticket = take_turn(st.session_state.current_model, placeholder)
+                stats = GenerationStats()
+                for piece in engine.stream(get_client(), st.session_state.current_model, history, stats):
+                    result += piece
+                    st.session_state.messages[-1] = ("assistant", result)
+                    if time.perf_counter() - last_render >= STREAM_RENDER_INTERVAL:
+                        placeholder.markdown(result + "▌")
+                        last_render = time.perf_counter()
+            except OllamaError as e:
+                result += f"⚠️ Error: {e}"
+                st.session_state.messages[-1] = ("assistant", result)
+                failed = True
+            finally:
+                if ticket is not None:
+                    ticket.release()
+            st.session_state.generating = False
+        else:
+            try:
+                ticket = take_turn(st.session_state.current_model, placeholder)
+                stats = GenerationStats()
+                result = engine.generate(get_client(), st.session_state.current_model, history, stats)
+            except OllamaError as e:
+                result = f"⚠️ Error: {e}"
+                failed = True
+            finally:
+                if ticket is not None:
+                    ticket.release()
+            # Add assistant response to history
+            st.session_state.messages.append(("assistant", result))
+        placeholder.markdown(result)
+        if cache is not None and hit is None and not failed and result:
+            cache.put(st.session_state.current_model, history, result)
+        if hit is None:
+            record_metrics(st.session_state.current_model, "chat", history, stats, result if failed else None)
+        if stats.ttft is not None:
+            reuse = "context reused" if stats.reused_context else "full history"
+            prompt_tokens = f"{stats.prompt_eval_count} prompt tokens, " if stats.prompt_eval_count else ""
+            summarized = engine.window.summarized
+            if summarized:
+                reuse += f", {summarized} earlier messages summarized"
+            queued = f"queued {ticket.waited():.1f} s, " if ticket is not None and ticket.waited() >= 0.5 else ""
+            st.caption(f"{queued}first token {stats.ttft:.2f} s, total {stats.total:.2f} s, {prompt_tokens}{reuse}")
+
+# =========================
+# Generation metrics
+# =========================
+# Ollama's timings for this session's replies, with the whole store (every
+# session) available for export
+if RECORD_METRICS:
+    with st.sidebar.expander("📊 Generation metrics"):
+        rows = get_metrics().rows(session=st.session_state.session_id, limit=METRICS_CHART_TURNS)
+        if rows:
+            st.caption("Generation speed (tokens/s) per reply")
+            st.line_chart({"tokens/s": [row["tokens_per_second"] for row in rows]})
+            st.caption("Prompt evaluation (s) against history length (messages)")
+            st.scatter_chart({"history messages": [row["history_messages"] for row in rows],
+                              "prompt eval s": [row["prompt_eval_duration"] for row in rows],
+                              "model": [row["model"] for row in rows]},
+                             x="history messages", y="prompt eval s", color="model")
+            for entry in summarize(rows):
+                st.caption(f"**{entry['model']}**: {entry['replies']} replies, "
+                           f"{entry['tokens_per_second'] or 0:.1f} tok/s, "
+                           f"prompt {entry['prompt_tokens_per_second'] or 0:.0f} tok/s, "
+                           f"first token {entry['ttft'] or 0:.2f} s")
+        else:
+            st.caption("No replies recorded in this session yet")
+        export_all = st.checkbox("Export every session")
+        export_rows = get_metrics().rows() if export_all else get_metrics().rows(session=st.session_state.session_id)
+        st.download_button("Download CSV", to_csv(export_rows), "generation_metrics.csv", "text/csv")
+        st.download_button("Download JSON", to_json(export_rows), "generation_metrics.json", "application/json")
 
 # =========================
 # Clear history button
 # =========================
 if st.sidebar.button("🧹 Clear Conversation"):
     st.session_state.messages = []
+    st.session_state.engine.reset()
+    st.session_state.cache_hits = {}
+    st.session_state.compare_turns = []
+    st.session_state.compare_histories = {}
+    st.session_state.compare_engines = {}
@@ -0,0 +1,106 @@
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from intel_hex import create_pool, parse_hex_file, verify_hex_file
+
+# =========================
+# Synthetic images
+# =========================
+def write_hex_image(path, size_mb, record_bytes=32, seed=0):
+    # Data records of `record_bytes` each, with an extended linear address
+    # record every 64 KiB, sized so the file is about `size_mb` MB
+    line_length = 11 + 2 * record_bytes + 2
+    records = int(size_mb * 1024 * 1024 / line_length)
+    rng = np.random.default_rng(seed)
+    digits = np.frombuffer(b'0123456789ABCDEF', dtype=np.uint8)
+    per_segment = 0x10000 // record_bytes
+
+    with open(path, 'wb') as f:
+        for first in range(0, records, per_segment):
+            count = min(per_segment, records - first)
+            segment = first // per_segment
+            upper = bytes([0x02, 0x00, 0x00, 0x04, segment >> 8 & 0xFF, segment & 0xFF])
+            f.write(b':' + (upper + bytes([-sum(upper) & 0xFF])).hex().upper().encode() + b'\r\n')
+
+            rows = np.zeros((count, record_bytes + 5), dtype=np.uint8)
+            addresses = np.arange(count) * record_bytes
+            rows[:, 0] = record_bytes
+            rows[:, 1] = addresses >> 8
+            rows[:, 2] = addresses & 0xFF
+            rows[:, 4:-1] = rng.integers(0, 256, size=(count, record_bytes), dtype=np.uint8)
+            rows[:, -1] = (-rows[:, :-1].sum(axis=1, dtype=np.int64)) & 0xFF
+
+            text = np.empty((count, line_length), dtype=np.uint8)
+            text[:, 0] = ord(':')
+            text[:, 1:-2:2] = digits[rows >> 4]
+            text[:, 2:-2:2] = digits[rows & 0x0F]
+            text[:, -2] = ord('\r')
+            text[:, -1] = ord('\n')
+            f.write(text.tobytes())
+        f.write(b':00000001FF\r\n')
+
+# =========================
+# Per-line reference parser
+# =========================
+def parse_per_line(path):
+    data = bytearray()
+    errors = 0
+    with open(path) as f:
+        for line in f:
+            record = bytes.fromhex(line.strip()[1:])
+            if sum(record) & 0xFF:
+                errors += 1
+            elif record[3] == 0:
+                data += record[4:-1]
+    return len(data), errors
+
+def main():
+    parser = argparse.ArgumentParser(description='Intel HEX parse/verify throughput')
+    parser.add_argument('--size-mb', type=float, default=100)
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--skip-per-line', action='store_true')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='hex_bench_')
+    paths = [os.path.join(workdir, f'image_{i}.hex') for i in range(args.files)]
+    for i, path in enumerate(paths):
+        write_hex_image(path, args.size_mb, seed=i)
+    total_mb = sum(os.path.getsize(path) for path in paths) / 1024 / 1024
+
+    start = time.perf_counter()
+    image = parse_hex_file(paths[0])
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(paths[0]) / 1024 / 1024
+    print(image.summary())
+    print(f"vectorized  1 file  {size_mb:8.1f} MB {elapsed:7.2f} s {size_mb / elapsed:8.1f} MB/s")
+
+    if not args.skip_per_line:
+        start = time.perf_counter()
+        size, errors = parse_per_line(paths[0])
+        elapsed = time.perf_counter() - start
+        assert size == len(image.data) and errors == image.checksum_error_count
+        print(f"per-line    1 file  {size_mb:8.1f} MB {elapsed:7.2f} s {size_mb / elapsed:8.1f} MB/s")
+
+    start = time.perf_counter()
+    for path in paths:
+        verify_hex_file(path)
+    elapsed = time.perf_counter() - start
+    print(f"sequential {args.files:2d} files {total_mb:8.1f} MB {elapsed:7.2f} s {total_mb / elapsed:8.1f} MB/s")
+
+    with create_pool() as pool:
+        pool.submit(int).result()   # start the workers outside the timing
+        start = time.perf_counter()
+        results = list(pool.map(verify_hex_file, paths))
+        elapsed = time.perf_counter() - start
+    assert all(result['ok'] for result in results)
+    print(f"pool       {args.files:2d} files {total_mb:8.1f} MB {elapsed:7.2f} s {total_mb / elapsed:8.1f} MB/s")
+
+    for path in paths:
+        os.remove(path)
+
+if __name__ == '__main__':
+    main()
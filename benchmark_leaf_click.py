@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+
+# Run without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+import claudeCode
+
+# =========================
+# Stubs
+# =========================
+def start_listener():
+    # Local stand-in for the ping targets so the benchmark does not need a network
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen()
+    return server, f"127.0.0.1:{server.getsockname()[1]}"
+
+def wait_for(app, condition, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+# =========================
+# Old path: every step inline on the GUI thread
+# =========================
+def run_blocking(app, window, nodes):
+    blocked = []
+    start = time.perf_counter()
+    for node in nodes:
+        click = time.perf_counter()
+        window.build_leaf_pipeline(node).run_inline()
+        window.finish_leaf_pipeline(node)
+        blocked.append(time.perf_counter() - click)
+    app.processEvents()
+    return blocked, time.perf_counter() - start
+
+# =========================
+# New path: task graph on the background executor
+# =========================
+def run_pipeline(app, window, nodes):
+    finished = []
+    window.leaf_done_signal.connect(finished.append)
+    blocked = []
+    start = time.perf_counter()
+    for node in nodes:
+        click = time.perf_counter()
+        window.handle_leaf_node_click(node)
+        blocked.append(time.perf_counter() - click)
+    wait_for(app, lambda: len(finished) == len(nodes))
+    total = time.perf_counter() - start
+    window.leaf_done_signal.disconnect(finished.append)
+    return blocked, total
+
+def report(name, blocked, total):
+    print(f"{name:10s} clicks={len(blocked):3d} "
+          f"gui-blocked max={max(blocked) * 1000:8.1f} ms "
+          f"mean={sum(blocked) / len(blocked) * 1000:8.1f} ms "
+          f"all-done={total * 1000:9.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Leaf click latency: blocking vs pipeline')
+    parser.add_argument('--clicks', type=int, default=5)
+    parser.add_argument('--sleep-s', type=float, default=0.5)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    server, target = start_listener()
+    claudeCode.LEAF_PING_TARGET = target
+    claudeCode.LEAF_SLEEP_SECONDS = args.sleep_s
+    QMessageBox.show = lambda self: None
+
+    workdir = tempfile.mkdtemp(prefix='leaf_bench_')
+    os.chdir(workdir)
+
+    window = claudeCode.MainWindow('user1')
+    nodes = [f'Node 12 (Leaf) #{i}' for i in range(args.clicks)]
+
+    report('blocking', *run_blocking(app, window, nodes))
+    report('pipeline', *run_pipeline(app, window, nodes))
+    window.close()
+
+if __name__ == '__main__':
+    main()
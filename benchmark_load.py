@@ -0,0 +1,199 @@
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_ollama import add_settings_arguments, settings_from, start_server
+from ollama_client import OLLAMA_URL, GenerationStats, OllamaClient, OllamaError
+
+PROMPTS_PATH = 'load_prompts.jsonl'
+DEFAULT_MODEL = 'mistral:7b'
+
+# =========================
+# Prompt corpus
+# =========================
+# One JSON object per line: {"prompt": "...", "model": "..."}; model is
+# optional and defaults to --model. Blank lines and lines starting with #
+# are skipped.
+def load_prompts(path, model):
+    prompts = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entry = json.loads(line)
+                prompts.append((entry.get('model') or model, entry['prompt']))
+            except (ValueError, KeyError, AttributeError) as e:
+                raise SystemExit(f"{path}:{number}: bad prompt line ({e})")
+    if not prompts:
+        raise SystemExit(f"{path}: no prompts")
+    return prompts
+
+# =========================
+# Load generator
+# =========================
+# Sends `requests` generate calls from `concurrency` workers, cycling through
+# the corpus. With a rate the requests are scheduled at fixed intervals
+# (open loop) and latency counts from the scheduled time, so time spent
+# waiting for a free worker shows up as latency instead of slowing the
+# load down; without one each worker sends its next request as soon as the
+# last finishes (closed loop).
+class LoadTest:
+    def __init__(self, client, prompts, requests, concurrency, rate=0, stream=True, duration=None):
+        self.client = client
+        self.prompts = prompts
+        self.requests = requests
+        self.concurrency = concurrency
+        self.rate = rate
+        self.stream = stream
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.results = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def send(self, index, scheduled):
+        model, prompt = self.prompts[index % len(self.prompts)]
+        stats = GenerationStats()
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        error = None
+        try:
+            if self.stream:
+                for _ in self.client.stream_generate(model, prompt, stats):
+                    pass
+            else:
+                self.client.generate(model, prompt, stats)
+        except OllamaError as e:
+            error = str(e)
+        except Exception as e:
+            # Counted like any other failed request rather than lost in the
+            # executor's future
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.in_flight -= 1
+                # client_wait is the time from the scheduled send until a
+                # worker picked the request up (open loop only); waiting inside
+                # Ollama is part of ttft and service
+                self.results.append({
+                    'model': model, 'error': error, 'scheduled': scheduled,
+                    'client_wait': stats.start - scheduled, 'latency': end - scheduled,
+                    'service': end - stats.start,
+                    'ttft': None if stats.ttft is None else stats.ttft + stats.start - scheduled,
+                    'tokens': stats.eval_count or stats.chunks, 'retries': stats.retries,
+                })
+
+    def run(self):
+        self.start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='Load') as pool:
+            for index in range(self.requests):
+                if self.rate:
+                    scheduled = self.start + index / self.rate
+                    time.sleep(max(0.0, scheduled - time.perf_counter()))
+                else:
+                    scheduled = None
+                if self.duration is not None and time.perf_counter() - self.start >= self.duration:
+                    break
+                if scheduled is None:
+                    pool.submit(self.run_closed, index)
+                else:
+                    pool.submit(self.send, index, scheduled)
+        self.elapsed = time.perf_counter() - self.start
+        return self.results
+
+    def run_closed(self, index):
+        if self.duration is None or time.perf_counter() - self.start < self.duration:
+            self.send(index, time.perf_counter())
+
+# =========================
+# Report
+# =========================
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p / 100))]
+    return {'p50_ms': pick(50) * 1000, 'p95_ms': pick(95) * 1000, 'p99_ms': pick(99) * 1000,
+            'max_ms': values[-1] * 1000}
+
+def summarize(test):
+    results = test.results
+    ok = [result for result in results if result['error'] is None]
+    errors = Counter(result['error'] for result in results if result['error'] is not None)
+    return {
+        'requests': len(results), 'errors': sum(errors.values()),
+        'error_rate': sum(errors.values()) / len(results) if results else 0.0,
+        'error_messages': dict(errors.most_common(5)),
+        'elapsed_s': test.elapsed, 'requests_per_s': len(ok) / test.elapsed if test.elapsed else 0.0,
+        'tokens_per_s': sum(result['tokens'] for result in ok) / test.elapsed if test.elapsed else 0.0,
+        'peak_in_flight': test.peak_in_flight,
+        'latency': percentiles([result['latency'] for result in ok]),
+        'ttft': percentiles([result['ttft'] for result in ok if result['ttft'] is not None]),
+        'client_wait': percentiles([result['client_wait'] for result in results]),
+        'service': percentiles([result['service'] for result in ok]),
+    }
+
+def print_summary(summary):
+    print(f"{summary['requests']} requests in {summary['elapsed_s']:.1f} s, "
+          f"{summary['requests_per_s']:.2f} req/s ok, {summary['tokens_per_s']:.0f} tokens/s, "
+          f"peak {summary['peak_in_flight']} in flight")
+    print(f"errors {summary['errors']} ({summary['error_rate']:.1%})")
+    for message, count in summary['error_messages'].items():
+        print(f"  {count:6d}  {message}")
+    print(f"{'':<12s} {'p50':>10s} {'p95':>10s} {'p99':>10s} {'max':>10s}   (ms)")
+    for name in ('latency', 'ttft', 'client_wait', 'service'):
+        values = summary[name]
+        if values:
+            print(f"{name:<12s} {values['p50_ms']:10.1f} {values['p95_ms']:10.1f} "
+                  f"{values['p99_ms']:10.1f} {values['max_ms']:10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test of the Ollama generate endpoint')
+    parser.add_argument('--url', default=OLLAMA_URL)
+    parser.add_argument('--prompts', default=PROMPTS_PATH, help='JSONL prompt corpus')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='model for prompts that do not name one')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0, help='requests per second; 0 sends back to back')
+    parser.add_argument('--duration', type=float, help='stop sending after this many seconds')
+    parser.add_argument('--no-stream', action='store_true', help='blocking requests instead of streaming')
+    parser.add_argument('--timeout', type=float, default=300, help='read timeout per request, seconds')
+    parser.add_argument('--retries', type=int, default=0, help='client retries after connection errors')
+    parser.add_argument('--output', help='write the summary as JSON to this file')
+    parser.add_argument('--mock', action='store_true', help='run against a local mock_ollama server')
+    add_settings_arguments(parser, 'mock-')
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if args.mock:
+        server, url = start_server(**settings_from(args, 'mock-'))
+    prompts = load_prompts(args.prompts, args.model)
+    client = OllamaClient(url, read_timeout=args.timeout, retries=args.retries, pool_size=args.concurrency)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, "
+          f"{f'{args.rate:g} req/s' if args.rate else 'closed loop'}, "
+          f"{'blocking' if args.no_stream else 'streaming'}, {len(prompts)} prompts, {url}", file=sys.stderr)
+    test = LoadTest(client, prompts, args.requests, args.concurrency, args.rate, not args.no_stream, args.duration)
+    test.run()
+    summary = summarize(test)
+    print_summary(summary)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': summary}, f, indent=2)
+        print(f"Results written to {args.output}")
+    client.close()
+    if server is not None:
+        server.shutdown()
+    if summary['requests'] and summary['errors'] == summary['requests']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
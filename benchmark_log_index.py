@@ -0,0 +1,93 @@
+import os
+import csv
+import time
+import random
+import argparse
+import tempfile
+
+from log_index import DAY, LogIndex, format_time, parse_time
+
+LOGIN_HEADER = ['Timestamp', 'Username', 'Plane', 'LRU1', 'LRU2', 'Status']
+EVENT_HEADER = ['Timestamp', 'Username', 'Node', 'Event']
+
+# =========================
+# Synthetic logs
+# =========================
+def write_logs(directory, rows, days=30, users=50, nodes=2000, seed=0):
+    # `rows` events spread over `days` days, split between the leaf and
+    # non-leaf logs, with a login for every user at the start of each day
+    rng = random.Random(seed)
+    start = parse_time('2024-01-01 00:00:00')
+    names = [f'user{i}' for i in range(users)]
+    with open(os.path.join(directory, 'logfile.csv'), 'a', newline='') as f:
+        writer = csv.writer(f)
+        if f.tell() == 0:
+            writer.writerow(LOGIN_HEADER)
+        for day in range(days):
+            for user in names:
+                writer.writerow([format_time(start + day * DAY + rng.randrange(3600)), user,
+                                 f'plane{rng.randrange(10)}', '1', '1', 'Login Successful'])
+
+    step = days * DAY / rows
+    for filename, event, share in (('leaf_events.csv', 'Leaf node clicked', 0.7),
+                                   ('non_leaf_events.csv', 'Non-leaf node clicked', 0.3)):
+        count = int(rows * share)
+        with open(os.path.join(directory, filename), 'a', newline='') as f:
+            writer = csv.writer(f)
+            if f.tell() == 0:
+                writer.writerow(EVENT_HEADER)
+            batch = []
+            for i in range(count):
+                ts = start + 3600 + int(i * step / share) % (days * DAY - 3600)
+                batch.append([format_time(ts), names[rng.randrange(users)], f'Node {rng.randrange(nodes)}',
+                              event])
+                if len(batch) >= 100000:
+                    writer.writerows(batch)
+                    batch = []
+            writer.writerows(batch)
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<48s} {(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Log index build and query times')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='log_index_bench_')
+    timed(f'write {args.rows} synthetic rows', lambda: write_logs(workdir, args.rows, args.days))
+    size_mb = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir)
+                  if name.endswith('.csv')) / 1024 / 1024
+    print(f"CSV size {size_mb:.1f} MB")
+
+    index = LogIndex(os.path.join(workdir, 'log_index'), workdir)
+    added = timed('initial index', index.update)
+    index_mb = sum(os.path.getsize(os.path.join(index.path, name)) for name in os.listdir(index.path)) / 1024 / 1024
+    print(f"  {added} rows, index {index_mb:.1f} MB")
+    timed('update with nothing new', index.update)
+    with open(os.path.join(workdir, 'leaf_events.csv'), 'a', newline='') as f:
+        csv.writer(f).writerows([[format_time(parse_time('2024-01-20 12:00:00') + i), 'user1', 'Node 7',
+                                  'Leaf node clicked'] for i in range(1000)])
+    added = timed('update after 1000 appended rows', index.update)
+    print(f"  {added} rows")
+
+    week_start = parse_time('2024-01-15 06:30:00')
+    week_end = week_start + 7 * DAY
+    week = {'start': week_start, 'end': week_end}
+    print(f"count, one week: {timed('count, one week', lambda: index.count(**week))}")
+    timed('count, all time', lambda: index.count())
+    per_user = timed('events per user, one week', lambda: index.aggregate('user', **week))
+    print(f"  {len(per_user)} users, top {per_user[0]}")
+    timed('events per node, one week', lambda: index.aggregate('node', **week))
+    timed('events per plane, all time', lambda: index.aggregate('plane'))
+    timed('events per day, user1', lambda: index.aggregate('day', user='user1'))
+    rows = timed('rows: user1 on Node 7, one week', lambda: index.rows(user='user1', node='Node 7', **week))
+    print(f"  {len(rows)} rows, latest {rows[0] if rows else None}")
+    timed('rows: latest 1000, one week', lambda: index.rows(**week))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import time
+import argparse
+from statistics import median
+
+from conversation import ConversationEngine
+from model_manager import ModelManager
+from ollama_client import OLLAMA_URL, GenerationStats, OllamaClient
+
+PROMPT = "User: Explain what a hash function is in three sentences.\n"
+
+# =========================
+# Measurements
+# =========================
+def run_blocking(client, args):
+    stats = GenerationStats()
+    client.generate(args.model, args.prompt, stats)
+    return stats
+
+def run_streaming(client, args):
+    stats = GenerationStats()
+    for _ in client.stream_generate(args.model, args.prompt, stats):
+        pass
+    return stats
+
+def run_conversation(client, args, reuse):
+    # Prompt tokens evaluated per turn of a --turns long chat; without reuse
+    # every turn replays the whole transcript
+    engine = ConversationEngine()
+    messages = []
+    per_turn = []
+    for turn in range(args.turns):
+        if not reuse:
+            engine.reset()
+        messages.append(("user", f"Turn {turn + 1}: {args.prompt}"))
+        stats = GenerationStats()
+        messages.append(("assistant", "".join(engine.stream(client, args.model, messages, stats))))
+        per_turn.append(stats)
+    return per_turn
+
+def run_switch(client, args, preload):
+    # First reply from --switch-model after switching to it from --model,
+    # with --think-time seconds to type the prompt. The switched-to model
+    # starts unloaded; with preload the manager loads it during that time.
+    client.load(args.model)
+    client.load(args.switch_model, 0)
+    if preload:
+        manager = ModelManager(client, [args.model, args.switch_model], policy='recent')
+        manager.select('benchmark', args.model)
+        manager.select('benchmark', args.switch_model)
+    time.sleep(args.think_time)
+    stats = GenerationStats()
+    for _ in client.stream_generate(args.switch_model, args.prompt, stats):
+        pass
+    if preload:
+        manager.executor.shutdown()
+    client.keep_alive.clear()
+    return stats
+
+def report_conversation(label, per_turn):
+    counts = [stats.prompt_eval_count or 0 for stats in per_turn]
+    seconds = sum(stats.prompt_eval_duration or 0 for stats in per_turn)
+    ttft = [f"{stats.ttft:.2f}" for stats in per_turn if stats.ttft is not None]
+    print(f"{label:<14s} prompt tokens per turn {counts}, prompt eval {seconds:.2f} s total, "
+          f"first text per turn (s) {', '.join(ttft)}")
+
+def report(label, runs):
+    ttft = median(stats.ttft for stats in runs if stats.ttft is not None)
+    total = median(stats.total for stats in runs)
+    print(f"{label:<18s} first text {ttft * 1000:9.1f} ms   complete {total * 1000:9.1f} ms   "
+          f"({len(runs)} runs, medians)")
+    return ttft
+
+def main():
+    parser = argparse.ArgumentParser(description='Time to first token: blocking vs streaming /api/generate')
+    parser.add_argument('--url', default=OLLAMA_URL)
+    parser.add_argument('--model', default='mistral:7b')
+    parser.add_argument('--prompt', default=PROMPT)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--turns', type=int, default=6, help='chat length for the context reuse comparison')
+    parser.add_argument('--switch-model', help='also time the first reply after switching to this model')
+    parser.add_argument('--think-time', type=float, default=5.0, help='seconds between switching and sending')
+    args = parser.parse_args()
+
+    client = OllamaClient(args.url)
+    # One untimed request so model loading and connecting are not counted
+    run_streaming(client, args)
+    blocking = report('blocking', [run_blocking(client, args) for _ in range(args.runs)])
+    streaming = report('streaming', [run_streaming(client, args) for _ in range(args.runs)])
+    print(f"streaming shows the first text {blocking / streaming:.1f}x sooner")
+    if args.turns:
+        report_conversation('full replay', run_conversation(client, args, reuse=False))
+        report_conversation('context reuse', run_conversation(client, args, reuse=True))
+    if args.switch_model:
+        for label, preload in (('switch, cold', False), ('switch, preloaded', True)):
+            runs = [run_switch(client, args, preload) for _ in range(args.runs)]
+            report(label, runs)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+from statistics import median
+
+# Run without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+# Phases reported in the summary, in the order they happen
+PHASES = ['imports', 'application', 'login_window_shown', 'event_loop_started',
+          'main_window_prebuilt', 'login_accepted', 'main_window_shown', 'session_ready']
+
+CREDENTIALS = {'user1': ('pass1', 'plane1'), 'user2': ('pass2', 'plane2'), 'user3': ('pass3', 'plane3')}
+
+# =========================
+# Child: one application launch
+# =========================
+def run_child(args):
+    # Imported first so the timer starts before anything else is loaded
+    from startup_timing import startup_timer
+    import claudeCode
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    claudeCode.FAST_START = args.mode == 'fast'
+    if not args.real_targets:
+        # Local stand-in for the ping targets so the run does not need a network
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        target = f"127.0.0.1:{server.getsockname()[1]}"
+        claudeCode.LEAF_PING_TARGET = claudeCode.NON_LEAF_PING_TARGET = target
+        claudeCode.LOGIN_PING_TARGETS = {user: target for user in CREDENTIALS}
+
+    app = QApplication([])
+    app.setStyle('Fusion')
+    startup_timer.mark('application')
+    login_window = claudeCode.LoginWindow()
+    login_window.show()
+    startup_timer.mark('login_window_shown')
+    QTimer.singleShot(0, lambda: startup_timer.mark('event_loop_started'))
+
+    def submit_login():
+        # Fill the form the way a user would after `typing_s` seconds
+        password, plane = CREDENTIALS[args.user]
+        login_window.username_combo.setCurrentText(args.user)
+        login_window.password_input.setText(password)
+        login_window.plane_combo.setCurrentText(plane)
+        login_window.login()
+
+    QTimer.singleShot(int(args.typing_s * 1000), submit_login)
+    deadline = time.perf_counter() + args.timeout
+    while startup_timer.elapsed('session_ready') is None and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+    print(json.dumps(startup_timer.as_dict()))
+    sys.stdout.flush()
+    # Skip interpreter teardown; only the phases matter here
+    os._exit(0)
+
+# =========================
+# Parent: repeated launches per mode
+# =========================
+def launch(args, mode, workdir):
+    command = [sys.executable, os.path.abspath(__file__), '--child', '--mode', mode,
+               '--user', args.user, '--typing-s', str(args.typing_s), '--timeout', str(args.timeout)]
+    if args.real_targets:
+        command.append('--real-targets')
+    result = subprocess.run(command, cwd=workdir, capture_output=True, text=True,
+                            timeout=args.timeout + 30)
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f"{mode} run produced no timings:\n{result.stderr[-2000:]}")
+
+def summarize(mode, runs):
+    print(f"\n{mode} ({len(runs)} runs, median ms since launch)")
+    for phase in PHASES:
+        values = [run[phase] for run in runs if phase in run]
+        if values:
+            print(f"  {phase:<22} {median(values) * 1000:8.1f}")
+    # Waiting the user notices: launch to login form, and clicking Login to a
+    # usable main window (and to a finished session)
+    to_login = median(run['event_loop_started'] for run in runs)
+    to_window = median(run['main_window_shown'] - run['login_accepted'] for run in runs)
+    to_ready = median(run['session_ready'] - run['login_accepted'] for run in runs)
+    print(f"  launch -> login form    {to_login * 1000:8.1f}")
+    print(f"  login -> main window    {to_window * 1000:8.1f}")
+    print(f"  login -> session ready  {to_ready * 1000:8.1f}")
+    return {'launch_to_login': to_login, 'login_to_window': to_window, 'login_to_ready': to_ready,
+            'runs': runs}
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup phase timing: eager vs fast start')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--user', default='user1', choices=sorted(CREDENTIALS))
+    parser.add_argument('--typing-s', type=float, default=1.0, help='time spent filling the form')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--modes', default='eager,fast')
+    parser.add_argument('--real-targets', action='store_true', help='probe the configured ping targets')
+    parser.add_argument('--json', help='write all timings to this file')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', default='fast', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='startup_bench_')
+    results = {}
+    for mode in args.modes.split(','):
+        # The first launch warms the OS file cache and is not counted
+        launch(args, mode, workdir)
+        runs = [launch(args, mode, workdir) for _ in range(args.runs)]
+        results[mode] = summarize(mode, runs)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from statistics import median
+
+# Run without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+import claudeCode
+from benchmark_tree import build_lazy, make_tree, rss_mb
+from console import ConsoleWidget
+from event_log import CsvSink, EventLogWriter, SqliteSink
+from tree_index import TreeIndex
+from tree_model import load_tree_definition
+
+# Metrics ending in these suffixes are better when higher; everything else
+# (times, memory) is better when lower
+HIGHER_IS_BETTER = ('_per_s',)
+REGRESSION_THRESHOLD = 0.10
+
+# =========================
+# Helpers
+# =========================
+def start_listener():
+    # Local stand-in for the ping targets so nothing needs a network
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(128)
+    return server, f"127.0.0.1:{server.getsockname()[1]}"
+
+def stub_run_process(self, job, args, shell=False, on_line=None):
+    # Replaces CommandWorker.run_process: no child process, fixed output
+    job.output = 'stub output\n'
+    job.error = ''
+    if on_line is not None:
+        on_line('stdout', 'stub output')
+    job.returncode = 0
+
+def wait_for(app, condition, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.0005)
+    return condition()
+
+def percentiles(values, prefix):
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p / 100))]
+    return {f'{prefix}_p50_ms': pick(50) * 1000, f'{prefix}_p95_ms': pick(95) * 1000,
+            f'{prefix}_max_ms': values[-1] * 1000}
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return median(times)
+
+# =========================
+# Benchmarks
+# =========================
+def bench_user_trees(app, args):
+    # Main window construction (tree, search index, console) per user layout
+    results = {}
+    for name in sorted(os.listdir(claudeCode.TREE_DIR)):
+        if not name.endswith('.json'):
+            continue
+        user = name[:-len('.json')]
+        path = os.path.join(claudeCode.TREE_DIR, name)
+        windows = []
+
+        def build():
+            window = claudeCode.MainWindow(user)
+            window.show()
+            app.processEvents()
+            windows.append(window)
+
+        results[user] = {
+            'load_definition_ms': timed(lambda: load_tree_definition(path), args.repeat) * 1000,
+            'main_window_ms': timed(build, args.repeat) * 1000,
+            'index_ms': timed(lambda: TreeIndex(load_tree_definition(path)), args.repeat) * 1000,
+        }
+        for window in windows:
+            window.close()
+    return results
+
+def bench_synthetic_trees(app, args, workdir):
+    results = {}
+    for size in args.tree_sizes:
+        roots = make_tree(size)
+        path = os.path.join(workdir, f'tree_{size}.json')
+        with open(path, 'w') as f:
+            json.dump(roots, f)
+        before = rss_mb()
+        view, load, show = build_lazy(app, path)
+        rss = rss_mb() - before
+        view.close()
+        start = time.perf_counter()
+        TreeIndex(roots)
+        results[str(size)] = {'load_ms': load * 1000, 'show_ms': show * 1000,
+                              'index_ms': (time.perf_counter() - start) * 1000, 'rss_mb': rss}
+    return results
+
+def bench_leaf_clicks(app, args, window):
+    finished = []
+    window.leaf_done_signal.connect(finished.append)
+    blocked = []
+    latency = []
+    for i in range(args.clicks):
+        start = time.perf_counter()
+        window.handle_leaf_node_click(f'Bench Leaf {i}')
+        blocked.append(time.perf_counter() - start)
+        wait_for(app, lambda: len(finished) == i + 1)
+        latency.append(time.perf_counter() - start)
+    window.leaf_done_signal.disconnect(finished.append)
+    return {**percentiles(blocked, 'gui_blocked'), **percentiles(latency, 'click_to_done')}
+
+def bench_non_leaf_clicks(app, args, window):
+    done = []
+    window.scheduler.jobs_finished.connect(done.extend)
+    blocked = []
+    latency = []
+    for i in range(args.clicks):
+        start = time.perf_counter()
+        # A new node each time so the scheduler does not coalesce the runs
+        window.handle_non_leaf_node_click(f'Bench Node {i}')
+        blocked.append(time.perf_counter() - start)
+        wait_for(app, lambda: len(done) == i + 1)
+        latency.append(time.perf_counter() - start)
+    window.scheduler.jobs_finished.disconnect(done.extend)
+    return {**percentiles(blocked, 'gui_blocked'), **percentiles(latency, 'click_to_script_done')}
+
+def bench_event_log(args, workdir):
+    header = claudeCode.EVENT_HEADER
+    results = {}
+    for name, sinks in (('csv', [CsvSink(workdir)]),
+                        ('csv_sqlite', [CsvSink(workdir), SqliteSink(os.path.join(workdir, 'events.db'))])):
+        writer = EventLogWriter(sinks)
+        row = ['2024-01-01 00:00:00', 'user1', 'Node 12 (Leaf)', 'Leaf node clicked']
+        start = time.perf_counter()
+        for i in range(args.log_rows):
+            writer.log(f'bench_{name}.csv', header, row)
+        queued = time.perf_counter() - start
+        writer.flush()
+        total = time.perf_counter() - start
+        writer.close()
+        results[name] = {'enqueue_rows_per_s': args.log_rows / queued,
+                         'written_rows_per_s': args.log_rows / total}
+    return results
+
+def bench_console(app, args):
+    console = ConsoleWidget()
+    console.show()
+    line = 'Bash output: ' + 'x' * 60
+    start = time.perf_counter()
+    for i in range(args.console_lines):
+        console.append(line)
+        if i % 1000 == 0:
+            app.processEvents()
+    appended = time.perf_counter() - start
+    console.flush()
+    app.processEvents()
+    total = time.perf_counter() - start
+    console.close()
+    return {'append_lines_per_s': args.console_lines / appended,
+            'displayed_lines_per_s': args.console_lines / total}
+
+# =========================
+# Results
+# =========================
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'timestamp': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+            'python': platform.python_version(), 'qt': QT_VERSION_STR, 'pyqt': PYQT_VERSION_STR,
+            'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        else:
+            flat[name] = value
+    return flat
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    # Prints every metric present in both runs; returns the regressed ones
+    old = flatten(baseline['results'])
+    new = flatten(current['results'])
+    regressions = []
+    print(f"\n{'metric':<58s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name in sorted(set(old) & set(new)):
+        if not old[name]:
+            continue
+        change = (new[name] - old[name]) / old[name]
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        flag = ' REGRESSION' if worse > threshold else ''
+        if flag:
+            regressions.append(name)
+        print(f"{name:<58s} {old[name]:12.2f} {new[name]:12.2f} {change * 100:+7.1f}%{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless benchmark suite for claudeCode.py')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    parser.add_argument('--only', nargs='+', choices=['user_trees', 'synthetic_trees', 'leaf_click',
+                                                      'non_leaf_click', 'event_log', 'console'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tree-sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--clicks', type=int, default=20)
+    parser.add_argument('--leaf-sleep-s', type=float, default=0.0)
+    parser.add_argument('--real-scripts', action='store_true', help='run node scripts with bash')
+    parser.add_argument('--log-rows', type=int, default=100000)
+    parser.add_argument('--console-lines', type=int, default=200000)
+    args = parser.parse_args()
+    selected = set(args.only or ['user_trees', 'synthetic_trees', 'leaf_click', 'non_leaf_click',
+                                 'event_log', 'console'])
+    output = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    app = QApplication(sys.argv)
+    server, target = start_listener()
+    claudeCode.LEAF_PING_TARGET = claudeCode.NON_LEAF_PING_TARGET = target
+    claudeCode.LOGIN_PING_TARGETS = {user: target for user in claudeCode.LOGIN_PING_TARGETS}
+    claudeCode.LEAF_SLEEP_SECONDS = args.leaf_sleep_s
+    QMessageBox.show = lambda self: None
+    if not args.real_scripts:
+        claudeCode.CommandWorker.run_process = stub_run_process
+
+    # Logs, scripts and temp files go to a scratch directory
+    workdir = tempfile.mkdtemp(prefix='bench_suite_')
+    os.chdir(workdir)
+
+    results = {}
+    steps = [('user_trees', lambda: bench_user_trees(app, args)),
+             ('synthetic_trees', lambda: bench_synthetic_trees(app, args, workdir)),
+             ('event_log', lambda: bench_event_log(args, workdir)),
+             ('console', lambda: bench_console(app, args))]
+    window = None
+    if selected & {'leaf_click', 'non_leaf_click'}:
+        window = claudeCode.MainWindow('user1')
+        window.show()
+        # Warm the probe cache and load-directory index before timing clicks
+        claudeCode.get_probe_service().status(target, wait=5)
+        claudeCode.get_file_index()
+        steps += [('leaf_click', lambda: bench_leaf_clicks(app, args, window)),
+                  ('non_leaf_click', lambda: bench_non_leaf_clicks(app, args, window))]
+    for name, run in steps:
+        if name in selected:
+            start = time.perf_counter()
+            results[name] = run()
+            print(f"{name:<16s} done in {time.perf_counter() - start:6.1f} s")
+    if window is not None:
+        window.close()
+
+    report = {'meta': metadata(), 'results': results}
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    for name, value in sorted(flatten(results).items()):
+        print(f"  {name:<58s} {value:12.2f}")
+
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(json.load(f), report)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {REGRESSION_THRESHOLD:.0%}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+# Run without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication, QTreeView, QTreeWidget, QTreeWidgetItem
+
+from tree_model import LazyTreeModel, load_tree_definition, node_children, node_name
+
+# =========================
+# Synthetic trees
+# =========================
+def make_tree(total, fanout=10):
+    # Breadth-first tree with `total` nodes under one root; leaves are strings
+    root = {'name': 'Root', 'children': []}
+    queue = [root]
+    count = 1
+    head = 0
+    while count < total:
+        parent = queue[head]
+        head += 1
+        for i in range(fanout):
+            if count >= total:
+                break
+            child = {'name': f"{parent['name']}.{i + 1}", 'children': []}
+            parent['children'].append(child)
+            queue.append(child)
+            count += 1
+    for node in queue:
+        node['children'] = [c['name'] if not c['children'] else c for c in node['children']]
+    return [root]
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except OSError:
+        return 0.0
+
+# =========================
+# Measurements
+# =========================
+def build_lazy(app, path):
+    start = time.perf_counter()
+    roots = load_tree_definition(path)
+    loaded = time.perf_counter()
+    model = LazyTreeModel(roots)
+    view = QTreeView()
+    view.setUniformRowHeights(True)
+    view.setModel(model)
+    view.show()
+    view.expand(model.index(0, 0))
+    app.processEvents()
+    shown = time.perf_counter()
+    return view, loaded - start, shown - loaded
+
+def build_eager(app, roots):
+    start = time.perf_counter()
+    tree = QTreeWidget()
+
+    def add(parent, data):
+        item = QTreeWidgetItem(parent, [node_name(data)])
+        for child in node_children(data):
+            add(item, child)
+
+    for root in roots:
+        add(tree, root)
+    tree.show()
+    tree.expandItem(tree.topLevelItem(0))
+    app.processEvents()
+    return tree, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Navigation tree build time and memory')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--eager-max', type=int, default=100000,
+                        help='largest size to also build eagerly with QTreeWidget')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    workdir = tempfile.mkdtemp(prefix='tree_bench_')
+
+    print(f"{'nodes':>9s} {'mode':6s} {'load ms':>9s} {'show ms':>9s} {'rss MB':>8s}")
+    for size in args.sizes:
+        roots = make_tree(size)
+        path = os.path.join(workdir, f'tree_{size}.json')
+        with open(path, 'w') as f:
+            json.dump(roots, f)
+
+        before = rss_mb()
+        view, load, show = build_lazy(app, path)
+        print(f"{size:9d} {'lazy':6s} {load * 1000:9.1f} {show * 1000:9.1f} {rss_mb() - before:8.1f}")
+        view.close()
+        del view
+
+        if size <= args.eager_max:
+            before = rss_mb()
+            tree, show = build_eager(app, roots)
+            print(f"{size:9d} {'eager':6s} {'':9s} {show * 1000:9.1f} {rss_mb() - before:8.1f}")
+            tree.close()
+            del tree
+        del roots
+
+if __name__ == '__main__':
+    main()
@@ -1,49 +1,602 @@
 import sys
 import os
-import csv
-import subprocess
 import time
+import atexit
+import heapq
+import itertools
+import signal
+import subprocess
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+
+# The startup timer starts when this is imported, so it stays ahead of the
+# Qt and application imports whose cost the 'imports' phase measures
+from startup_timing import startup_timer
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QLineEdit, QPushButton, 
-                            QComboBox, QTreeWidget, QTreeWidgetItem, QSplitter,
-                            QTextEdit, QMessageBox, QMenuBar, QMenu, QAction,
+                            QComboBox, QTreeView, QSplitter, QProgressBar,
+                            QMessageBox, QMenuBar, QMenu, QAction,
                             QGridLayout, QFrame)
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
+from PyQt5.QtCore import (Qt, QObject, QTimer, QThread, QModelIndex, QFileSystemWatcher,
+                          pyqtSignal, pyqtSlot)
 from PyQt5.QtGui import QPixmap, QPalette, QBrush, QFont, QPainter
 
-# Worker thread for background operations
+from event_log import CsvSink, EventLogWriter, SqliteSink
+from spans import tracer
+from tree_index import SEARCH_LIMIT, TreeIndex
+from tree_model import LazyTreeModel, load_tree_definition, node_children, node_name
+# Imported on first use so the login window does not wait for them:
+# file_index, intel_hex (numpy), probe (asyncio), log_index (numpy) and the
+# main window's widgets and dialogs (console, fleet, the spans PerfPanel).
+# event_log, spans' tracer and the tree modules stay here because the login
+# window logs, traces and loads the user's tree in the background.
+
+startup_timer.mark('imports')
+
+# Startup settings. With FAST_START the login window opens before any main
+# window exists; the main window for the selected user is built while the
+# form is filled in, and the login script and probes run after it appears.
+FAST_START = True
+PREBUILD_DELAY_MS = 200
+STARTUP_TIMING_FILE = None   # e.g. 'startup_timing.csv' to append each run's phases
+
+# Step timings for View > Performance; spans cost one flag check when disabled
+SPANS_ENABLED = True
+
+# Leaf node pipeline settings
+PING_TIMEOUT = 5
+LEAF_SLEEP_SECONDS = 2
+PIPELINE_WORKERS = 8
+
+# Job scheduler settings; lower priority numbers run first
+SCHEDULER_WORKERS = 4
+SIGNAL_BATCH_MS = 50
+DEFAULT_JOB_TIMEOUT = 60
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 10
+SCRIPT_TIMEOUT = 60
+
+# Event log settings; set LOG_SQLITE_PATH (e.g. 'events.db') to also keep an
+# append-only SQLite copy of every row
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_ROTATE_DAILY = False
+LOG_SQLITE_PATH = None
+# Column index over the logs for View > Event Log Query and log_index.py
+LOG_INDEX_PATH = 'log_index'
+LOGIN_HEADER = ['Timestamp', 'Username', 'Plane', 'LRU1', 'LRU2', 'Status']
+EVENT_HEADER = ['Timestamp', 'Username', 'Node', 'Event']
+
+# Navigation tree definitions, one JSON file per user
+TREE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trees')
+DEFAULT_TREE = 'user3'
+SEARCH_DELAY_MS = 150
+
+# Output console settings; with CONSOLE_SPILL every line is also written to
+# console_<username>.log and can be browsed from View > Output Scrollback
+CONSOLE_MAX_BLOCKS = 5000
+CONSOLE_SPILL = False
+
+# Connectivity targets, read from the probe cache instead of shelling out to ping
+LEAF_PING_TARGET = '8.8.8.8'
+NON_LEAF_PING_TARGET = '1.1.1.1'
+LOGIN_PING_TARGETS = {'user1': '8.8.8.8', 'user2': '1.1.1.1', 'user3': '4.4.4.4'}
+
+# Fleet mode: node actions fan out to every target in FLEET_FILE (a JSON list
+# of {"plane", "lru1", "lru2", "host"}), or to the login target if it is missing
+FLEET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fleet.json')
+FLEET_CONCURRENCY = 16
+FLEET_TARGET_TIMEOUT = 90
+
+# Load directory scanned for .hex files
+HEX_DIRECTORY = '.'
+HEX_EXTENSIONS = ('.hex',)
+HEX_VERIFY_WORKERS = None   # process pool size, None = one per CPU
+
+_event_log = None
+_event_log_lock = threading.Lock()
+_probe_service = None
+_probe_service_lock = threading.Lock()
+_file_indexes = {}
+_file_index_lock = threading.Lock()
+_hex_pool = None
+_hex_summaries = {}   # path -> ((size, mtime_ns), summary); one entry per path
+_hex_summaries_lock = threading.Lock()
+_tree_definitions = {}
+
+# Shared background writer for logfile.csv and the node event logs
+def get_event_log():
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            sinks = [CsvSink(max_bytes=LOG_MAX_BYTES, rotate_daily=LOG_ROTATE_DAILY)]
+            if LOG_SQLITE_PATH:
+                sinks.append(SqliteSink(LOG_SQLITE_PATH))
+            _event_log = EventLogWriter(sinks)
+            atexit.register(_event_log.close)
+    return _event_log
+
+# Shared connectivity cache, refreshed in the background
+def get_probe_service():
+    global _probe_service
+    with _probe_service_lock:
+        if _probe_service is None:
+            from probe import ProbeService
+            _probe_service = ProbeService()
+            atexit.register(_probe_service.close)
+    return _probe_service
+
+# Shared watched file index per directory and extension set
+def get_file_index(directory=HEX_DIRECTORY, extensions=HEX_EXTENSIONS):
+    key = (os.path.abspath(directory), tuple(extensions))
+    with _file_index_lock:
+        index = _file_indexes.get(key)
+        if index is None:
+            from file_index import FileIndex
+            index = FileIndex(directory, extensions)
+            _file_indexes[key] = index
+            atexit.register(index.close)
+    return index
+
+# (size, mtime_ns) of a file as it is now, or None if it cannot be read
+def hex_file_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+# Verify .hex load images on a process pool; summaries are cached until the
+# file's size or mtime changes. Files are stat'ed here rather than trusting
+# the index, which may not have seen a rewrite yet.
+def verify_hex_entries(entries):
+    global _hex_pool
+    from intel_hex import create_pool, verify_hex_file
+    with _file_index_lock:
+        if _hex_pool is None:
+            _hex_pool = create_pool(HEX_VERIFY_WORKERS)
+            atexit.register(_hex_pool.shutdown, cancel_futures=True)
+        pool = _hex_pool
+
+    paths = [entry.path for entry in entries]
+    keys = {path: hex_file_key(path) for path in paths}
+    with _hex_summaries_lock:
+        cached = {path: _hex_summaries.get(path) for path in keys}
+    results = {path: cached[path][1] for path in keys
+               if keys[path] is not None and cached[path] is not None and cached[path][0] == keys[path]}
+    futures = {path: pool.submit(verify_hex_file, path) for path in keys if path not in results}
+    for path, future in futures.items():
+        results[path] = future.result()
+    with _hex_summaries_lock:
+        for path in futures:
+            # Replaces the path's previous entry, so changed files do not pile up
+            if keys[path] is None:
+                _hex_summaries.pop(path, None)
+            else:
+                _hex_summaries[path] = (keys[path], results[path])
+    return [results[path] for path in paths]
+
+# Tree definition file for a user, falling back to the default tree
+def tree_definition_path(username):
+    path = os.path.join(TREE_DIR, f'{username}.json')
+    if not os.path.exists(path):
+        path = os.path.join(TREE_DIR, f'{DEFAULT_TREE}.json')
+    return path
+
+# Parsed tree definition, cached until the file's mtime changes so a tree
+# loaded in the background at login is not parsed again by the main window
+def get_tree_definition(path):
+    mtime = os.stat(path).st_mtime_ns
+    cached = _tree_definitions.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    roots = load_tree_definition(path)
+    _tree_definitions[path] = (mtime, roots)
+    return roots
+
+# Per-user login script ({username}_login.sh), created on first login
+def get_login_script(username):
+    bash_file = f'{username}_login.sh'
+    if not os.path.exists(bash_file):
+        with open(bash_file, 'w') as f:
+            f.write(f'#!/bin/bash\necho "Login script for {username}"\ndate\n')
+    return bash_file
+
+# Work that can happen before login completes: import the deferred modules,
+# scan the load directory and parse the user's tree
+def warm_up(username):
+    get_probe_service()
+    get_file_index()
+    get_tree_definition(tree_definition_path(username))
+    import intel_hex
+
+# Runs named steps on a thread pool; each step starts as soon as the steps it
+# depends on have finished, so independent steps run in parallel
+class TaskGraph:
+    def __init__(self, name='graph'):
+        self.name = name
+        self.steps = {}
+        self.span_names = {}
+
+    def add_step(self, name, func, deps=()):
+        self.steps[name] = (func, tuple(deps))
+        self.span_names[name] = f'{self.name}.{name}'
+
+    def call(self, name):
+        # Each step is timed as '<graph>.<step>'
+        with tracer.span(self.span_names[name], 'step'):
+            return self.steps[name][0]()
+
+    def order(self):
+        # Topological order of the steps (Kahn's algorithm)
+        waiting = {}
+        for name, (func, deps) in self.steps.items():
+            for dep in deps:
+                if dep not in self.steps:
+                    raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+            waiting[name] = set(deps)
+        order = []
+        ready = [name for name, deps in waiting.items() if not deps]
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for other, deps in waiting.items():
+                if name in deps:
+                    deps.discard(name)
+                    if not deps:
+                        ready.append(other)
+        if len(order) != len(self.steps):
+            raise ValueError('Task graph contains a cycle')
+        return order
+
+    def run_inline(self):
+        # Run every step one after another on the calling thread
+        results = {}
+        for name in self.order():
+            try:
+                results[name] = self.call(name)
+            except Exception as e:
+                results[name] = e
+        return results
+
+    def run(self, executor):
+        # Returns a Future resolved with {step name: result or exception}
+        self.order()
+        done = Future()
+        results = {}
+        lock = threading.Lock()
+        waiting = {name: set(deps) for name, (func, deps) in self.steps.items()}
+        dependents = defaultdict(list)
+        for name, (func, deps) in self.steps.items():
+            for dep in deps:
+                dependents[dep].append(name)
+
+        def finished(name, future):
+            error = future.exception()
+            ready = []
+            with lock:
+                results[name] = error if error is not None else future.result()
+                for child in dependents[name]:
+                    waiting[child].discard(name)
+                    if not waiting[child]:
+                        ready.append(child)
+                complete = len(results) == len(self.steps)
+            for child in ready:
+                submit(child)
+            if complete:
+                done.set_result(dict(results))
+
+        def submit(name):
+            try:
+                future = executor.submit(self.call, name)
+            except RuntimeError as e:
+                # Executor was shut down (window closed) while steps were pending
+                if not done.done():
+                    done.set_exception(e)
+                return
+            future.add_done_callback(lambda f, name=name: finished(name, f))
+
+        if not self.steps:
+            done.set_result(results)
+        for name in [name for name, deps in waiting.items() if not deps]:
+            submit(name)
+        return done
+
+# A command submitted to JobScheduler; identical commands share one Job
+class Job:
+    def __init__(self, job_id, command, priority=PRIORITY_NORMAL, timeout=None):
+        self.id = job_id
+        self.command = command
+        self.key = command_key(command)
+        self.priority = priority
+        self.timeout = timeout
+        self.state = 'queued'
+        self.output = ''
+        self.error = ''
+        self.returncode = None
+        self.requests = 1
+        self.callbacks = []
+        # Called with (job, stream, line) while the process is still running
+        self.line_callbacks = []
+        self.process = None
+        self.cancel_event = threading.Event()
+        # Resolved with the Job itself once it is done, cancelled or timed out
+        self.future = Future()
+        self.submitted = time.perf_counter_ns()
+
+def command_key(command):
+    return (command['type'], command.get('cmd'), command.get('file'),
+            tuple(command.get('args', ())), command.get('duration'))
+
+def kill_process(process):
+    # Processes start in their own session, so kill the whole group; a bash
+    # script's children would otherwise keep the output pipes open
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+# Worker thread for background operations. Runs a fixed list of commands,
+# or pulls jobs from a JobScheduler until the scheduler shuts down.
 class CommandWorker(QThread):
     output_signal = pyqtSignal(str)
     
-    def __init__(self, commands):
+    def __init__(self, commands=None, scheduler=None):
         super().__init__()
-        self.commands = commands
+        self.commands = commands or []
+        self.scheduler = scheduler
     
     def run(self):
-        for command in self.commands:
-            try:
-                if command['type'] == 'ping':
-                    self.output_signal.emit(f"Executing: {command['cmd']}\n")
-                    result = subprocess.run(command['cmd'], shell=True, capture_output=True, text=True)
-                    self.output_signal.emit(f"Result: {result.stdout}\n")
-                elif command['type'] == 'bash':
-                    self.output_signal.emit(f"Running bash file: {command['file']}\n")
-                    if os.path.exists(command['file']):
-                        result = subprocess.run(['bash', command['file']], capture_output=True, text=True)
-                        self.output_signal.emit(f"Bash output: {result.stdout}\n")
-                    else:
-                        self.output_signal.emit(f"Bash file not found: {command['file']}\n")
-                elif command['type'] == 'sleep':
-                    time.sleep(command['duration'])
-                    self.output_signal.emit(f"Slept for {command['duration']} seconds\n")
-            except Exception as e:
-                self.output_signal.emit(f"Error: {str(e)}\n")
+        if self.scheduler is None:
+            for command in self.commands:
+                self.execute(Job(0, command), self.output_signal.emit)
+            return
+        
+        while True:
+            job = self.scheduler.next_job()
+            if job is None:
+                break
+            if tracer.enabled:
+                tracer.record('job.queue_wait', job.submitted, time.perf_counter_ns(), 'job')
+            with tracer.span(f"job.{job.command['type']}", 'job', job=job.id):
+                self.execute(job, lambda text: None,
+                             lambda stream, line, job=job: self.scheduler.post_line(job, stream, line))
+            self.scheduler.complete(job)
+    
+    def execute(self, job, emit, on_line=None):
+        command = job.command
+        try:
+            if command['type'] == 'ping':
+                emit(f"Executing: {command['cmd']}\n")
+                self.run_process(job, command['cmd'], shell=True, on_line=on_line)
+                emit(f"Result: {job.output}\n")
+            elif command['type'] == 'bash':
+                emit(f"Running bash file: {command['file']}\n")
+                if os.path.exists(command['file']):
+                    self.run_process(job, ['bash', command['file']] + list(command.get('args', ())),
+                                     on_line=on_line)
+                    emit(f"Bash output: {job.output}\n")
+                else:
+                    job.state = 'error'
+                    job.error = f"Bash file not found: {command['file']}"
+                    emit(f"{job.error}\n")
+            elif command['type'] == 'sleep':
+                job.cancel_event.wait(command['duration'])
+                emit(f"Slept for {command['duration']} seconds\n")
+        except subprocess.TimeoutExpired:
+            job.state = 'timeout'
+            job.error = f"Timed out after {job.timeout} seconds"
+            emit(f"Error: {job.error}\n")
+        except Exception as e:
+            job.state = 'error'
+            job.error = str(e)
+            emit(f"Error: {str(e)}\n")
+    
+    def run_process(self, job, args, shell=False, on_line=None):
+        # Output is read line by line as the process runs, so callers can show
+        # it live; the timeout covers the whole run
+        job.process = subprocess.Popen(args, shell=shell, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE, text=True, bufsize=1,
+                                       start_new_session=(os.name == 'posix'))
+        # cancel() may have run before the process existed
+        if job.cancel_event.is_set():
+            kill_process(job.process)
+        
+        collected = {'stdout': [], 'stderr': []}
+        
+        def read(stream, name):
+            for line in stream:
+                collected[name].append(line)
+                if on_line is not None:
+                    on_line(name, line.rstrip('\n'))
+            stream.close()
+        
+        readers = [threading.Thread(target=read, args=(job.process.stdout, 'stdout'), daemon=True),
+                   threading.Thread(target=read, args=(job.process.stderr, 'stderr'), daemon=True)]
+        for reader in readers:
+            reader.start()
+        try:
+            job.process.wait(timeout=job.timeout)
+        except subprocess.TimeoutExpired:
+            kill_process(job.process)
+            job.process.wait()
+            raise
+        finally:
+            for reader in readers:
+                reader.join()
+            job.output = ''.join(collected['stdout'])
+            job.error = ''.join(collected['stderr'])
+        job.returncode = job.process.returncode
+
+# Bounded pool of CommandWorkers fed from a priority queue. Identical commands
+# already queued or running are coalesced into one Job, and finished jobs are
+# handed to the GUI thread in batches on a timer instead of one signal each.
+class JobScheduler(QObject):
+    jobs_finished = pyqtSignal(list)
+    
+    def __init__(self, max_workers=SCHEDULER_WORKERS, batch_ms=SIGNAL_BATCH_MS, parent=None):
+        super().__init__(parent)
+        self.condition = threading.Condition()
+        self.queue = []
+        self.inflight = {}
+        self.finished = []
+        self.lines = []
+        self.counter = itertools.count(1)
+        self.stopping = False
+        
+        self.workers = [CommandWorker(scheduler=self) for _ in range(max_workers)]
+        for worker in self.workers:
+            worker.start()
+        
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(batch_ms)
+    
+    def submit(self, command, priority=PRIORITY_NORMAL, timeout=DEFAULT_JOB_TIMEOUT, callback=None,
+               on_line=None):
+        key = command_key(command)
+        with self.condition:
+            job = self.inflight.get(key)
+            if job is None:
+                job = Job(next(self.counter), command, priority, timeout)
+                self.inflight[key] = job
+                heapq.heappush(self.queue, (priority, next(self.counter), job))
+                self.condition.notify()
+            else:
+                job.requests += 1
+                # A more urgent duplicate moves the queued job up
+                if job.state == 'queued' and priority < job.priority:
+                    job.priority = priority
+                    heapq.heappush(self.queue, (priority, next(self.counter), job))
+            if callback is not None:
+                job.callbacks.append(callback)
+            if on_line is not None:
+                job.line_callbacks.append(on_line)
+        return job
+    
+    def next_job(self):
+        with self.condition:
+            while True:
+                while self.queue:
+                    priority, seq, job = heapq.heappop(self.queue)
+                    # Skip cancelled jobs and stale entries left by a priority bump
+                    if job.state == 'queued' and priority == job.priority:
+                        job.state = 'running'
+                        return job
+                if self.stopping:
+                    return None
+                self.condition.wait()
+    
+    def complete(self, job):
+        with self.condition:
+            if job.state == 'running':
+                job.state = 'done'
+            self.retire(job)
+    
+    def cancel(self, job):
+        with self.condition:
+            if job.state not in ('queued', 'running'):
+                return False
+            was_queued = job.state == 'queued'
+            job.state = 'cancelled'
+            job.cancel_event.set()
+            if job.process is not None:
+                kill_process(job.process)
+            # A running job is retired by its worker once the process exits
+            if was_queued:
+                self.retire(job)
+        return True
+    
+    def post_line(self, job, stream, line):
+        # Called from worker threads; lines reach the GUI with the next flush
+        if job.line_callbacks:
+            with self.condition:
+                self.lines.append((job, stream, line))
+    
+    def retire(self, job):
+        # Caller holds self.condition
+        if self.inflight.get(job.key) is job:
+            del self.inflight[job.key]
+        self.finished.append(job)
+        if not job.future.done():
+            job.future.set_result(job)
+    
+    @pyqtSlot()
+    def flush(self):
+        with self.condition:
+            lines, self.lines = self.lines, []
+            batch, self.finished = self.finished, []
+        for job, stream, line in lines:
+            for callback in job.line_callbacks:
+                callback(job, stream, line)
+        if not batch:
+            return
+        for job in batch:
+            for callback in job.callbacks:
+                callback(job)
+        self.jobs_finished.emit(batch)
+    
+    def cancel_all(self):
+        with self.condition:
+            pending = list(self.inflight.values())
+        return sum(1 for job in pending if self.cancel(job))
+    
+    def shutdown(self):
+        with self.condition:
+            self.stopping = True
+        self.cancel_all()
+        with self.condition:
+            self.condition.notify_all()
+        self.timer.stop()
+        for worker in self.workers:
+            worker.wait(1000)
+
+# Per-user node scripts ({username}_{node}.sh). Each script is checked and
+# created once, then served from memory on later clicks.
+class ScriptRegistry:
+    def __init__(self, username):
+        self.username = username
+        self.paths = {}
+        self.lock = threading.Lock()
+    
+    def get(self, name):
+        with self.lock:
+            path = self.paths.get(name)
+            if path is None:
+                path = f"{self.username}_{name.replace(' ', '_')}.sh"
+                if not os.path.exists(path):
+                    with open(path, 'w') as f:
+                        f.write(f'#!/bin/bash\necho "Bash script for {name}${{1:+ on $1}}"\ndate\n')
+                self.paths[name] = path
+            return path
+    
+    def invalidate(self, path):
+        # Forget a script that disappeared so the next click recreates it
+        with self.lock:
+            for name, known in list(self.paths.items()):
+                if known == path:
+                    del self.paths[name]
 
 class LoginWindow(QWidget):
     def __init__(self):
         super().__init__()
+        self.main_window = None
+        self.prebuilt = None
         self.initUI()
+        if FAST_START:
+            # Build the main window for the selected user once the form is
+            # idle, and again if another user is picked
+            self.prebuild_timer = QTimer(self)
+            self.prebuild_timer.setSingleShot(True)
+            self.prebuild_timer.setInterval(PREBUILD_DELAY_MS)
+            self.prebuild_timer.timeout.connect(self.prebuild_main_window)
+            self.username_combo.currentTextChanged.connect(self.schedule_prebuild)
+            self.schedule_prebuild()
         
     def initUI(self):
         self.setWindowTitle('Login Page')
@@ -172,15 +725,38 @@ class LoginWindow(QWidget):
             plane == valid_credentials[username]['plane'] and
             lru1 == '1' and lru2 == '1'):
             
-            # Log the login details
-            self.log_login(username, plane, lru1, lru2)
+            startup_timer.mark('login_accepted')
+            start = time.perf_counter_ns()
             
-            # Run initial bash and ping commands
-            self.run_login_commands(username)
+            # Log the login details
+            with tracer.span('login.log', 'login'):
+                self.log_login(username, plane, lru1, lru2)
             
-            # Open main window
-            self.main_window = MainWindow(username)
-            self.main_window.show()
+            if FAST_START:
+                # Show the pre-built window, then run the login script and
+                # ping in the background
+                with tracer.span('login.main_window', 'login'):
+                    self.main_window = self.take_main_window(username)
+                self.main_window.set_login_context(plane, lru1, lru2)
+                with tracer.span('login.show', 'login'):
+                    self.main_window.show()
+                startup_timer.mark('main_window_shown')
+                self.main_window.start_session()
+            else:
+                # Run initial bash and ping commands
+                with tracer.span('login.commands', 'login'):
+                    self.run_login_commands(username)
+                
+                # Open main window
+                with tracer.span('login.main_window', 'login'):
+                    self.main_window = MainWindow(username)
+                self.main_window.set_login_context(plane, lru1, lru2)
+                with tracer.span('login.show', 'login'):
+                    self.main_window.show()
+                startup_timer.mark('main_window_shown')
+                self.main_window.session_finished()
+            if tracer.enabled:
+                tracer.record('login.total', start, time.perf_counter_ns(), 'login')
             self.close()
         else:
             QMessageBox.warning(self, 'Login Failed', 'Invalid credentials!')
@@ -195,43 +771,75 @@ class LoginWindow(QWidget):
     def log_login(self, username, plane, lru1, lru2):
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log_data = [timestamp, username, plane, lru1, lru2, 'Login Successful']
-        
-        file_exists = os.path.exists('logfile.csv')
-        with open('logfile.csv', 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            if not file_exists:
-                writer.writerow(['Timestamp', 'Username', 'Plane', 'LRU1', 'LRU2', 'Status'])
-            writer.writerow(log_data)
+        get_event_log().log('logfile.csv', LOGIN_HEADER, log_data)
     
     def run_login_commands(self, username):
         # Create dummy bash files if they don't exist
-        bash_files = {
-            'user1': 'user1_login.sh',
-            'user2': 'user2_login.sh',
-            'user3': 'user3_login.sh'
-        }
-        
-        bash_file = bash_files[username]
-        if not os.path.exists(bash_file):
-            with open(bash_file, 'w') as f:
-                f.write(f'#!/bin/bash\necho "Login script for {username}"\ndate\n')
-        
-        # Run ping command (dummy)
-        ping_commands = {
-            'user1': 'ping -n 1 8.8.8.8',
-            'user2': 'ping -n 1 1.1.1.1',
-            'user3': 'ping -n 1 4.4.4.4'
-        }
+        get_login_script(username)
         
-        try:
-            subprocess.run(ping_commands[username], shell=True, capture_output=True)
-        except:
-            pass
+        # Start probing this user's target and the node targets in the background
+        get_probe_service().watch(LOGIN_PING_TARGETS[username], LEAF_PING_TARGET, NON_LEAF_PING_TARGET)
+    
+    def schedule_prebuild(self):
+        # Imports, directory scan and tree parsing go to a background thread;
+        # the widgets themselves must be created on the GUI thread
+        username = self.username_combo.currentText()
+        threading.Thread(target=warm_up, args=(username,), name='LoginWarmUp', daemon=True).start()
+        self.prebuild_timer.start()
+    
+    def prebuild_main_window(self):
+        username = self.username_combo.currentText()
+        if self.prebuilt is not None:
+            if self.prebuilt.username == username:
+                return
+            self.prebuilt.discard()
+        with tracer.span('login.prebuild_main_window', 'login'):
+            self.prebuilt = MainWindow(username)
+        startup_timer.mark('main_window_prebuilt')
+    
+    def take_main_window(self, username):
+        self.prebuild_timer.stop()
+        window, self.prebuilt = self.prebuilt, None
+        if window is not None and window.username != username:
+            window.discard()
+            window = None
+        return window if window is not None else MainWindow(username)
+    
+    def closeEvent(self, event):
+        # A pre-built window that was never used must not outlive the login
+        if self.prebuilt is not None:
+            self.prebuilt.discard()
+            self.prebuilt = None
+        super().closeEvent(event)
 
 class MainWindow(QMainWindow):
+    # Signals used by background steps to reach the GUI thread
+    output_signal = pyqtSignal(str)
+    gui_signal = pyqtSignal(str, str)
+    leaf_done_signal = pyqtSignal(str)
+    index_ready_signal = pyqtSignal(object, object)
+    tree_reloaded_signal = pyqtSignal(object)
+    session_signal = pyqtSignal(str)
+
     def __init__(self, username):
         super().__init__()
         self.username = username
+        self.executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS)
+        self.scheduler = JobScheduler(parent=self)
+        self.scripts = ScriptRegistry(username)
+        self.login_target = None
+        self.fleet_targets = None
+        self.fleet_dialogs = []
+        self.perf_panel = None
+        self.log_query = None
+        # Scan the load directory once up front; clicks then query the index
+        self.executor.submit(get_file_index)
+        self.output_signal.connect(self.append_output)
+        self.gui_signal.connect(self.run_gui_step)
+        self.leaf_done_signal.connect(self.finish_leaf_pipeline)
+        self.index_ready_signal.connect(self.set_tree_index)
+        self.tree_reloaded_signal.connect(self.set_tree_roots)
+        self.session_signal.connect(self.session_step_done)
         self.initUI()
         
     def initUI(self):
@@ -251,11 +859,34 @@ class MainWindow(QMainWindow):
         # Create splitter
         splitter = QSplitter(Qt.Horizontal)
         
-        # Left side - Tree widget
-        self.tree_widget = QTreeWidget()
-        self.tree_widget.setHeaderLabel('Navigation Tree')
+        # Left side - Search box and tree widget
+        left_widget = QWidget()
+        left_layout = QVBoxLayout()
+        left_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('Search nodes (name or path/to/node)...')
+        self.search_input.setClearButtonEnabled(True)
+        self.search_status = QLabel('')
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        
+        self.tree_model = LazyTreeModel(parent=self)
+        self.tree_view = QTreeView()
+        self.tree_view.setModel(self.tree_model)
+        self.tree_view.setUniformRowHeights(True)
         self.create_tree_structure()
-        self.tree_widget.itemClicked.connect(self.on_tree_item_clicked)
+        self.tree_view.clicked.connect(self.on_tree_item_clicked)
+        self.tree_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tree_view.customContextMenuRequested.connect(self.show_tree_menu)
+        
+        left_layout.addWidget(self.search_input)
+        left_layout.addWidget(self.search_status)
+        left_layout.addWidget(self.tree_view)
+        left_widget.setLayout(left_layout)
         
         # Right side - Split into upper and lower
         right_widget = QWidget()
@@ -288,10 +919,11 @@ class MainWindow(QMainWindow):
         upper_widget.setLayout(upper_layout)
         
         # Lower part - Output display
-        self.output_display = QTextEdit()
-        self.output_display.setReadOnly(True)
+        from console import ConsoleWidget
+        spill_path = f'console_{self.username}.log' if CONSOLE_SPILL else None
+        self.output_display = ConsoleWidget(max_blocks=CONSOLE_MAX_BLOCKS, spill_path=spill_path)
         self.output_display.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #2b2b2b;
                 color: #00ff00;
                 font-family: 'Consolas', 'Courier New', monospace;
@@ -304,7 +936,7 @@ class MainWindow(QMainWindow):
         right_widget.setLayout(right_layout)
         
         # Add to splitter
-        splitter.addWidget(self.tree_widget)
+        splitter.addWidget(left_widget)
         splitter.addWidget(right_widget)
         splitter.setSizes([400, 800])
         
@@ -325,6 +957,37 @@ class MainWindow(QMainWindow):
         view_action = QAction('Refresh', self)
         view_action.triggered.connect(lambda: QMessageBox.information(self, 'View', 'View menu clicked'))
         view_menu.addAction(view_action)
+        cancel_jobs_action = QAction('Cancel Running Jobs', self)
+        cancel_jobs_action.triggered.connect(self.cancel_jobs)
+        view_menu.addAction(cancel_jobs_action)
+        connectivity_action = QAction('Connectivity Status', self)
+        connectivity_action.triggered.connect(self.show_connectivity)
+        view_menu.addAction(connectivity_action)
+        scrollback_action = QAction('Output Scrollback', self)
+        scrollback_action.setEnabled(CONSOLE_SPILL)
+        scrollback_action.triggered.connect(lambda: self.output_display.show_scrollback())
+        view_menu.addAction(scrollback_action)
+        perf_action = QAction('Performance', self)
+        perf_action.triggered.connect(self.show_performance)
+        view_menu.addAction(perf_action)
+        record_action = QAction('Record Step Timings', self)
+        record_action.setCheckable(True)
+        record_action.setChecked(tracer.enabled)
+        record_action.toggled.connect(lambda enabled: setattr(tracer, 'enabled', enabled))
+        view_menu.addAction(record_action)
+        log_query_action = QAction('Event Log Query', self)
+        log_query_action.triggered.connect(self.show_log_query)
+        view_menu.addAction(log_query_action)
+        
+        # Fleet menu
+        fleet_menu = menubar.addMenu('Fleet')
+        self.fleet_action = QAction('Fleet Mode', self)
+        self.fleet_action.setCheckable(True)
+        self.fleet_action.toggled.connect(self.toggle_fleet_mode)
+        fleet_menu.addAction(self.fleet_action)
+        reload_fleet_action = QAction('Reload Fleet Targets', self)
+        reload_fleet_action.triggered.connect(self.reload_fleet)
+        fleet_menu.addAction(reload_fleet_action)
         
         # Help menu
         help_menu = menubar.addMenu('Help')
@@ -345,221 +1008,512 @@ class MainWindow(QMainWindow):
         logout_menu.addAction(logout_action)
     
     def create_tree_structure(self):
-        # Create different tree structures based on username
-        if self.username == 'user1':
-            self.create_user1_tree()
-        elif self.username == 'user2':
-            self.create_user2_tree()
-        else:
-            self.create_user3_tree()
-    
-    def create_user1_tree(self):
-        root = QTreeWidgetItem(self.tree_widget, ['Main Node User1'])
-        
-        # Node 1 with complex structure
-        node1 = QTreeWidgetItem(root, ['Node 1'])
-        node1_1 = QTreeWidgetItem(node1, ['Node 1.1'])
-        node1_1_1 = QTreeWidgetItem(node1_1, ['Node 1.1.1'])
-        node1_1_2 = QTreeWidgetItem(node1_1, ['Node 1.1.2'])
-        node1_1_3 = QTreeWidgetItem(node1_1, ['Node 1.1.3'])
-        node1_1_3_1 = QTreeWidgetItem(node1_1_3, ['Node 1.1.3.1'])
-        node1_1_3_1_1 = QTreeWidgetItem(node1_1_3_1, ['Node 1.1.3.1.1'])
-        node1_1_3_1_2 = QTreeWidgetItem(node1_1_3_1, ['Node 1.1.3.1.2'])
-        node1_1_3_1_3 = QTreeWidgetItem(node1_1_3_1, ['Node 1.1.3.1.3'])
-        node1_1_3_1_4 = QTreeWidgetItem(node1_1_3_1, ['Node 1.1.3.1.4'])
-        node1_1_3_2 = QTreeWidgetItem(node1_1_3, ['Node 1.1.3.2'])
-        node1_2 = QTreeWidgetItem(node1, ['Node 1.2'])
-        
-        # Node 2
-        node2 = QTreeWidgetItem(root, ['Node 2'])
-        node2_1 = QTreeWidgetItem(node2, ['Node 2.1'])
-        
-        # Node 3
-        node3 = QTreeWidgetItem(root, ['Node 3'])
-        node3_1 = QTreeWidgetItem(node3, ['Node 3.1'])
-        node3_2 = QTreeWidgetItem(node3, ['Node 3.2'])
-        node3_3 = QTreeWidgetItem(node3, ['Node 3.3'])
-        node3_4 = QTreeWidgetItem(node3, ['Node 3.4'])
-        
-        # Node 4
-        node4 = QTreeWidgetItem(root, ['Node 4'])
-        node4_1 = QTreeWidgetItem(node4, ['Node 4.1'])
-        
-        # Node 5
-        node5 = QTreeWidgetItem(root, ['Node 5'])
-        for i in range(1, 6):
-            QTreeWidgetItem(node5, [f'Node 5.{i}'])
-        
-        # Node 6
-        node6 = QTreeWidgetItem(root, ['Node 6'])
-        node6_1 = QTreeWidgetItem(node6, ['Node 6.1'])
-        node6_2 = QTreeWidgetItem(node6, ['Node 6.2'])
-        node6_3 = QTreeWidgetItem(node6, ['Node 6.3'])
-        node6_3_1 = QTreeWidgetItem(node6_3, ['Node 6.3.1'])
-        node6_3_2 = QTreeWidgetItem(node6_3, ['Node 6.3.2'])
-        node6_3_3 = QTreeWidgetItem(node6_3, ['Node 6.3.3'])
-        
-        # Nodes 7-11
-        node7 = QTreeWidgetItem(root, ['Node 7'])
-        node7_1 = QTreeWidgetItem(node7, ['Node 7.1'])
-        node7_2 = QTreeWidgetItem(node7, ['Node 7.2'])
-        
-        node8 = QTreeWidgetItem(root, ['Node 8'])
-        node8_1 = QTreeWidgetItem(node8, ['Node 8.1'])
-        node8_2 = QTreeWidgetItem(node8, ['Node 8.2'])
-        
-        node9 = QTreeWidgetItem(root, ['Node 9'])
-        node9_1 = QTreeWidgetItem(node9, ['Node 9.1'])
-        
-        node10 = QTreeWidgetItem(root, ['Node 10'])
-        node10_1 = QTreeWidgetItem(node10, ['Node 10.1'])
-        
-        node11 = QTreeWidgetItem(root, ['Node 11'])
-        node11_1 = QTreeWidgetItem(node11, ['Node 11.1'])
-        
-        # Leaf nodes 12 and 13
-        node12 = QTreeWidgetItem(root, ['Node 12 (Leaf)'])
-        node13 = QTreeWidgetItem(root, ['Node 13 (Leaf)'])
-    
-    def create_user2_tree(self):
-        root = QTreeWidgetItem(self.tree_widget, ['Main Node User2'])
-        
-        # Simplified structure for user2
-        for i in range(1, 14):
-            node = QTreeWidgetItem(root, [f'User2 Node {i}'])
-            if i <= 5:
-                for j in range(1, 4):
-                    QTreeWidgetItem(node, [f'User2 Node {i}.{j}'])
-    
-    def create_user3_tree(self):
-        root = QTreeWidgetItem(self.tree_widget, ['Main Node User3'])
-        
-        # Different structure for user3
-        for i in range(1, 14):
-            node = QTreeWidgetItem(root, [f'User3 Node {i}'])
-            if i % 2 == 0:
-                for j in range(1, 3):
-                    subnode = QTreeWidgetItem(node, [f'User3 Node {i}.{j}'])
-                    if i == 4:
-                        for k in range(1, 3):
-                            QTreeWidgetItem(subnode, [f'User3 Node {i}.{j}.{k}'])
-    
-    def on_tree_item_clicked(self, item, column):
-        node_name = item.text(0)
+        # Load the tree for this user; branches are materialized as they expand
+        path = tree_definition_path(self.username)
+        self.tree_path = path
+        self.tree_roots = get_tree_definition(path)
+        self.tree_model.set_roots(self.tree_roots)
+        
+        # Build the search index in the background and follow edits to the file.
+        # The index reports which roots it was built from; set_tree_index
+        # brings it up to date if the file was reloaded in the meantime.
+        self.tree_index = None
+        self.tree_index_roots = None
+        self.tree_index_busy = True
+        roots = self.tree_roots
+        self.executor.submit(lambda: self.index_ready_signal.emit(TreeIndex(roots), roots))
+        self.tree_watcher = QFileSystemWatcher([path], self)
+        self.tree_watcher.fileChanged.connect(self.reload_tree)
+    
+    def set_tree_index(self, index, roots):
+        self.tree_index = index
+        self.tree_index_roots = roots
+        self.tree_index_busy = False
+        self.sync_tree_index()
+        if self.search_input.text().strip():
+            self.apply_search()
+    
+    def sync_tree_index(self):
+        # One build or update at a time; each result comes back through
+        # set_tree_index, which checks again against the latest roots
+        if self.tree_index_busy or self.tree_index_roots is self.tree_roots:
+            return
+        self.tree_index_busy = True
+        index, roots = self.tree_index, self.tree_roots
+        
+        def update():
+            index.update(roots)
+            self.index_ready_signal.emit(index, roots)
+        
+        self.executor.submit(update)
+    
+    def reload_tree(self, path):
+        # Editors that save by replacing the file drop it from the watcher
+        if path not in self.tree_watcher.files() and os.path.exists(path):
+            self.tree_watcher.addPath(path)
+        
+        def reload():
+            try:
+                roots = load_tree_definition(path)
+            except (OSError, ValueError) as e:
+                self.output_signal.emit(f"Tree reload error: {str(e)}\n")
+                return
+            self.tree_reloaded_signal.emit(roots)
+        
+        self.executor.submit(reload)
+    
+    def set_tree_roots(self, roots):
+        self.tree_roots = roots
+        self.sync_tree_index()
+        self.apply_search()
+        self.output_display.append("Navigation tree reloaded\n")
+    
+    def apply_search(self):
+        text = self.search_input.text().strip()
+        if not text:
+            self.tree_model.set_roots(self.tree_roots)
+            self.search_status.setText('')
+            return
+        if self.tree_index is None or self.tree_index_roots is not self.tree_roots:
+            self.search_status.setText('Indexing tree...')
+            return
+        
+        start = time.perf_counter()
+        matches = self.tree_index.search(text)
+        self.tree_model.set_roots(self.tree_index.filtered_roots(matches), highlight=text)
+        self.expand_filtered(QModelIndex())
+        elapsed = (time.perf_counter() - start) * 1000
+        
+        status = f"{len(matches)} match(es) in {elapsed:.1f} ms"
+        if len(matches) >= SEARCH_LIMIT:
+            status += f" (showing first {SEARCH_LIMIT})"
+        self.search_status.setText(status)
+    
+    def expand_filtered(self, parent):
+        # Open the ancestor branches leading to matches, not the matches themselves
+        if self.tree_model.canFetchMore(parent):
+            self.tree_model.fetchMore(parent)
+        for row in range(self.tree_model.rowCount(parent)):
+            index = self.tree_model.index(row, 0, parent)
+            if self.tree_model.node(index).is_filtered():
+                self.tree_view.expand(index)
+                self.expand_filtered(index)
+    
+    def on_tree_item_clicked(self, index):
+        node = self.tree_model.node(index)
+        node_name = node.name
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # Check if it's a leaf node (no children)
-        is_leaf = item.childCount() == 0
+        is_leaf = node.is_leaf()
         
         self.output_display.append(f"\n[{timestamp}] Clicked: {node_name}")
         
-        if is_leaf:
-            self.handle_leaf_node_click(node_name)
+        if self.fleet_action.isChecked():
+            self.run_fleet(node_name, is_leaf)
+        elif is_leaf:
+            with tracer.span('leaf.click', 'click'):
+                self.handle_leaf_node_click(node_name)
         else:
-            self.handle_non_leaf_node_click(node_name)
+            with tracer.span('non_leaf.click', 'click'):
+                self.handle_non_leaf_node_click(node_name)
     
     def handle_leaf_node_click(self, node_name):
         self.output_display.append(f"Executing leaf node operations for: {node_name}\n")
         
+        # Steps run in the background; the tree stays usable for more clicks
+        start = time.perf_counter_ns()
+        future = self.build_leaf_pipeline(node_name).run(self.executor)
+        if tracer.enabled:
+            future.add_done_callback(
+                lambda f: tracer.record('leaf.total', start, time.perf_counter_ns(), 'click'))
+        future.add_done_callback(lambda f: self.leaf_done_signal.emit(node_name))
+    
+    def build_leaf_pipeline(self, node_name):
+        graph = TaskGraph('leaf')
+        emit = lambda text: self.output_signal.emit(f"[{node_name}] {text}")
+        
         # 1. Ping check
-        ping_cmd = f"ping -n 1 8.8.8.8"
-        try:
-            result = subprocess.run(ping_cmd, shell=True, capture_output=True, text=True, timeout=5)
-            self.output_display.append(f"Ping result: {result.stdout[:200]}...\n")
-        except Exception as e:
-            self.output_display.append(f"Ping error: {str(e)}\n")
+        def ping():
+            # Cached reachability; only waits if the target was never probed
+            result = get_probe_service().status(LEAF_PING_TARGET, wait=PING_TIMEOUT)
+            if result is None:
+                emit(f"Ping error: no result for {LEAF_PING_TARGET} yet\n")
+            else:
+                emit(f"Ping result: {LEAF_PING_TARGET} {result.describe()}\n")
         
         # 2. Read file
-        try:
-            if not os.path.exists('input.txt'):
-                with open('input.txt', 'w') as f:
-                    f.write('Sample input file content for testing.')
-            
-            with open('input.txt', 'r') as f:
-                content = f.read()
-                self.output_display.append(f"File content: {content}\n")
-        except Exception as e:
-            self.output_display.append(f"Read file error: {str(e)}\n")
+        def read_input():
+            try:
+                if not os.path.exists('input.txt'):
+                    with open('input.txt', 'w') as f:
+                        f.write('Sample input file content for testing.')
+                
+                with open('input.txt', 'r') as f:
+                    content = f.read()
+                    emit(f"File content: {content}\n")
+            except Exception as e:
+                emit(f"Read file error: {str(e)}\n")
         
         # 3. User-defined function call
-        self.user_defined_function(node_name, self.username)
+        def user_function():
+            return self.user_defined_function(node_name, self.username)
         
         # 4. Append to log file
-        self.append_to_event_log('leaf_events.csv', node_name, 'Leaf node clicked')
+        def log_event():
+            self.append_to_event_log('leaf_events.csv', node_name, 'Leaf node clicked')
         
         # 5. Write text to file
-        try:
-            with open('output.txt', 'w') as f:
-                f.write('Hello World')
-            self.output_display.append("Written 'Hello World' to output.txt\n")
-        except Exception as e:
-            self.output_display.append(f"Write file error: {str(e)}\n")
+        def write_output():
+            try:
+                with open('output.txt', 'w') as f:
+                    f.write('Hello World')
+                emit("Written 'Hello World' to output.txt\n")
+            except Exception as e:
+                emit(f"Write file error: {str(e)}\n")
         
         # 6. Check if file exists
-        if os.path.exists('output.txt'):
-            self.output_display.append("output.txt exists\n")
-        else:
-            self.output_display.append("output.txt does not exist\n")
+        def check_output():
+            if os.path.exists('output.txt'):
+                emit("output.txt exists\n")
+            else:
+                emit("output.txt does not exist\n")
         
-        # 7. Show message box
-        QMessageBox.information(self, 'Info', 'Process Running')
+        # 7. Show message box (on the GUI thread, non-modal)
+        def message_box():
+            self.gui_signal.emit('message_box', node_name)
         
         # 8. Sleep for 2 seconds
-        self.output_display.append("Sleeping for 2 seconds...\n")
-        QApplication.processEvents()
-        time.sleep(2)
-        self.output_display.append("Sleep completed\n")
+        def sleep():
+            emit(f"Sleeping for {LEAF_SLEEP_SECONDS} seconds...\n")
+            time.sleep(LEAF_SLEEP_SECONDS)
+            emit("Sleep completed\n")
         
         # 9. Delete temp file
-        try:
-            if os.path.exists('temp.txt'):
-                os.remove('temp.txt')
-                self.output_display.append("temp.txt deleted\n")
-            else:
-                self.output_display.append("temp.txt does not exist\n")
-        except Exception as e:
-            self.output_display.append(f"Delete file error: {str(e)}\n")
-        
-        # 10. Get hex files in directory
-        hex_files = [f for f in os.listdir('.') if f.endswith('.hex')]
-        self.output_display.append(f"Hex files found: {hex_files}\n")
-        
-        # 11. Collapse TreeView
-        self.tree_widget.collapseAll()
-        self.output_display.append("Tree view collapsed\n")
+        def delete_temp():
+            try:
+                if os.path.exists('temp.txt'):
+                    os.remove('temp.txt')
+                    emit("temp.txt deleted\n")
+                else:
+                    emit("temp.txt does not exist\n")
+            except Exception as e:
+                emit(f"Delete file error: {str(e)}\n")
+        
+        # 10. Get hex files in directory (from the watched index)
+        def hex_scan():
+            hex_files = get_file_index().names()
+            emit(f"Hex files found: {hex_files}\n")
+            return hex_files
+        
+        # 10b. Verify the load images found (record checksums, ranges, CRC32)
+        def hex_verify():
+            entries = get_file_index().files()
+            if not entries:
+                return []
+            try:
+                results = verify_hex_entries(entries)
+            except Exception as e:
+                emit(f"Hex verification error: {str(e)}\n")
+                return []
+            emit("Hex verification:\n" + '\n'.join(result['summary'] for result in results) + '\n')
+            return results
+        
+        graph.add_step('ping', ping)
+        graph.add_step('read_input', read_input)
+        graph.add_step('hex_scan', hex_scan)
+        graph.add_step('hex_verify', hex_verify, deps=['hex_scan'])
+        graph.add_step('user_function', user_function)
+        graph.add_step('log_event', log_event)
+        graph.add_step('write_output', write_output)
+        graph.add_step('check_output', check_output, deps=['write_output'])
+        graph.add_step('delete_temp', delete_temp)
+        graph.add_step('message_box', message_box)
+        graph.add_step('sleep', sleep, deps=['message_box'])
+        return graph
+    
+    def finish_leaf_pipeline(self, node_name):
+        # 11. Collapse TreeView, unless a search is keeping matches in view
+        if self.search_input.text().strip():
+            self.output_display.append(f"[{node_name}] Tree view kept (search active)\n")
+        else:
+            self.tree_view.collapseAll()
+            self.output_display.append(f"[{node_name}] Tree view collapsed\n")
+        self.output_display.append(f"Leaf node operations finished for: {node_name}\n")
+    
+    @pyqtSlot(str)
+    def append_output(self, text):
+        self.output_display.append(text)
+    
+    @pyqtSlot(str, str)
+    def run_gui_step(self, step, node_name):
+        if step == 'message_box':
+            with tracer.span('gui.message_box', 'gui'):
+                box = QMessageBox(QMessageBox.Information, 'Info', f'Process Running: {node_name}',
+                                  QMessageBox.Ok, self)
+                box.setModal(False)
+                box.setAttribute(Qt.WA_DeleteOnClose)
+                box.show()
     
     def handle_non_leaf_node_click(self, node_name):
         self.output_display.append(f"Executing non-leaf node operations for: {node_name}\n")
         
-        # Run ping command
-        ping_cmd = f"ping -n 1 1.1.1.1"
-        try:
-            result = subprocess.run(ping_cmd, shell=True, capture_output=True, text=True, timeout=5)
-            self.output_display.append(f"Connection ping result: Success\n")
-        except Exception as e:
-            self.output_display.append(f"Connection ping error: {str(e)}\n")
+        # Check connectivity from the probe cache
+        self.executor.submit(self.check_connection)
         
-        # Run bash file
-        bash_file = f"{self.username}_{node_name.replace(' ', '_')}.sh"
-        if not os.path.exists(bash_file):
-            with open(bash_file, 'w') as f:
-                f.write(f'#!/bin/bash\necho "Bash script for {node_name}"\ndate\n')
+        # Run bash file; output streams in while it runs
+        bash_file = self.scripts.get(node_name)
         
-        try:
-            if sys.platform == 'win32':
-                # For Windows, try to run with Git Bash or WSL if available
-                self.output_display.append(f"Bash file {bash_file} created (Windows environment)\n")
-            else:
-                result = subprocess.run(['bash', bash_file], capture_output=True, text=True)
-                self.output_display.append(f"Bash output: {result.stdout}\n")
-        except Exception as e:
-            self.output_display.append(f"Bash execution info: {str(e)}\n")
+        if sys.platform == 'win32':
+            # For Windows, try to run with Git Bash or WSL if available
+            self.output_display.append(f"Bash file {bash_file} created (Windows environment)\n")
+        else:
+            self.scheduler.submit({'type': 'bash', 'file': bash_file}, timeout=SCRIPT_TIMEOUT,
+                                  callback=self.show_bash_output, on_line=self.show_bash_line)
         
         # Log to non-leaf events
         self.append_to_event_log('non_leaf_events.csv', node_name, 'Non-leaf node clicked')
     
+    def start_session(self):
+        # Login script and connectivity check, run after the window is shown
+        # with their progress in the status bar
+        self.session_steps = 2
+        self.session_done = 0
+        self.session_label = QLabel('Starting session...')
+        self.session_progress = QProgressBar()
+        self.session_progress.setRange(0, self.session_steps)
+        self.session_progress.setMaximumWidth(200)
+        self.statusBar().addWidget(self.session_label)
+        self.statusBar().addPermanentWidget(self.session_progress)
+        self.session_start = time.perf_counter_ns()
+        self.executor.submit(self.run_login_script)
+        self.executor.submit(self.check_login_connection)
+    
+    def run_login_script(self):
+        try:
+            bash_file = get_login_script(self.username)
+        except OSError as e:
+            self.output_signal.emit(f"Login script error: {str(e)}\n")
+            self.session_signal.emit('Login script failed')
+            return
+        if sys.platform == 'win32':
+            self.output_signal.emit(f"Bash file {bash_file} created (Windows environment)\n")
+            self.session_signal.emit('Login script created')
+            return
+        self.scheduler.submit({'type': 'bash', 'file': bash_file}, priority=PRIORITY_INTERACTIVE,
+                              timeout=SCRIPT_TIMEOUT, callback=self.login_script_finished,
+                              on_line=self.show_bash_line)
+    
+    def login_script_finished(self, job):
+        self.show_bash_output(job)
+        self.session_step_done('Login script finished' if job.state == 'done' else 'Login script failed')
+    
+    def check_login_connection(self):
+        target = LOGIN_PING_TARGETS.get(self.username, NON_LEAF_PING_TARGET)
+        probes = get_probe_service()
+        with tracer.span('session.ping', 'login'):
+            probes.watch(target, LEAF_PING_TARGET, NON_LEAF_PING_TARGET)
+            result = probes.status(target, wait=PING_TIMEOUT)
+        if result is not None:
+            self.output_signal.emit(f"Login ping {target}: {result.describe()}\n")
+        else:
+            self.output_signal.emit(f"Login ping {target}: no result yet\n")
+        self.session_signal.emit('Connectivity checked')
+    
+    def session_step_done(self, text):
+        self.session_done += 1
+        self.session_progress.setValue(self.session_done)
+        if self.session_done < self.session_steps:
+            self.session_label.setText(f'{text} ({self.session_done}/{self.session_steps})')
+            return
+        self.session_label.setText('Session ready')
+        QTimer.singleShot(3000, self.session_progress.hide)
+        if tracer.enabled:
+            tracer.record('session.total', self.session_start, time.perf_counter_ns(), 'login')
+        self.session_finished()
+    
+    def session_finished(self):
+        if startup_timer.mark('session_ready') and STARTUP_TIMING_FILE:
+            startup_timer.write_csv(STARTUP_TIMING_FILE, 'fast' if FAST_START else 'eager')
+            self.output_display.append(startup_timer.report() + '\n')
+    
+    def set_login_context(self, plane, lru1, lru2):
+        from fleet import FleetTarget
+        self.login_target = FleetTarget(plane, lru1, lru2,
+                                        LOGIN_PING_TARGETS.get(self.username, NON_LEAF_PING_TARGET))
+    
+    def get_fleet_targets(self):
+        if self.fleet_targets is None:
+            self.reload_fleet()
+        return self.fleet_targets
+    
+    def reload_fleet(self):
+        from fleet import load_fleet
+        try:
+            self.fleet_targets = load_fleet(FLEET_FILE, LEAF_PING_TARGET)
+            self.output_display.append(f"Loaded {len(self.fleet_targets)} fleet target(s) from {FLEET_FILE}\n")
+        except FileNotFoundError:
+            self.fleet_targets = [self.login_target] if self.login_target is not None else []
+            self.output_display.append(f"{FLEET_FILE} not found, fleet is the login target only\n")
+        except (OSError, ValueError) as e:
+            self.fleet_targets = []
+            self.output_display.append(f"Fleet file error: {str(e)}\n")
+    
+    def toggle_fleet_mode(self, enabled):
+        if enabled:
+            targets = self.get_fleet_targets()
+            self.output_display.append(f"Fleet mode on: node actions run on {len(targets)} target(s)\n")
+        else:
+            self.output_display.append("Fleet mode off\n")
+    
+    def run_fleet(self, node_name, is_leaf):
+        # Fan the node's action out to every fleet target with its own status grid
+        targets = self.get_fleet_targets()
+        if is_leaf:
+            action = lambda target, report: self.fleet_leaf_action(node_name, target, report)
+        elif sys.platform == 'win32':
+            self.output_display.append("Fleet scripts are not supported on Windows\n")
+            return
+        else:
+            bash_file = self.scripts.get(node_name)
+            action = lambda target, report: self.fleet_script_action(bash_file, target, report)
+        from fleet import FleetDialog, FleetRun
+        run = FleetRun(node_name, targets, action, FLEET_CONCURRENCY, FLEET_TARGET_TIMEOUT, parent=self)
+        run.finished.connect(lambda summary: self.finish_fleet_run(node_name, is_leaf, summary))
+        dialog = FleetDialog(run, self)
+        dialog.finished.connect(lambda result: self.fleet_dialogs.remove(dialog))
+        self.fleet_dialogs.append(dialog)
+        dialog.show()
+        self.output_display.append(f"Running {node_name} on {len(targets)} fleet target(s)\n")
+        run.start()
+    
+    def probe_fleet_target(self, target, report):
+        report(f"probing {target.host}")
+        result = get_probe_service().status(target.host, wait=PING_TIMEOUT)
+        if result is None:
+            return None, 'no probe result'
+        if not result.reachable:
+            return None, result.describe()
+        return result, f"{result.latency * 1000:.1f} ms"
+    
+    def fleet_leaf_action(self, node_name, target, report):
+        result, detail = self.probe_fleet_target(target, report)
+        if result is None:
+            return 'unreachable', detail
+        report('running')
+        processed = self.user_defined_function(node_name, self.username)
+        return 'ok', f"{detail}; {processed}"
+    
+    def fleet_script_action(self, bash_file, target, report):
+        result, detail = self.probe_fleet_target(target, report)
+        if result is None:
+            return 'unreachable', detail
+        report(f"running {bash_file}")
+        job = self.scheduler.submit({'type': 'bash', 'file': bash_file, 'args': [target.name]},
+                                    timeout=SCRIPT_TIMEOUT)
+        job = job.future.result()
+        lines = job.output.strip().splitlines()
+        last_line = lines[-1] if lines else ''
+        if job.state == 'done' and job.returncode == 0:
+            return 'ok', last_line
+        if job.state == 'done':
+            return 'failed', f"exit code {job.returncode}: {job.error.strip() or last_line}"
+        return 'failed', job.error.strip() or job.state
+    
+    def finish_fleet_run(self, node_name, is_leaf, summary):
+        from fleet import describe_summary
+        self.output_display.append(describe_summary(summary) + '\n')
+        filename = 'leaf_events.csv' if is_leaf else 'non_leaf_events.csv'
+        counts = ', '.join(f"{state} {count}" for state, count in sorted(summary['counts'].items()))
+        self.append_to_event_log(filename, node_name, f"Fleet run on {summary['targets']} target(s): {counts}")
+    
+    def cancel_jobs(self):
+        cancelled = self.scheduler.cancel_all()
+        self.output_display.append(f"Cancelled {cancelled} job(s)\n")
+    
+    def check_connection(self):
+        with tracer.span('non_leaf.ping', 'step'):
+            result = get_probe_service().status(NON_LEAF_PING_TARGET, wait=PING_TIMEOUT)
+        if result is not None and result.reachable:
+            self.output_signal.emit(f"Connection ping result: Success ({result.latency * 1000:.1f} ms)\n")
+        else:
+            error = result.error if result is not None else 'no result yet'
+            self.output_signal.emit(f"Connection ping error: {error}\n")
+    
+    def show_performance(self):
+        if self.perf_panel is None:
+            from spans import PerfPanel
+            self.perf_panel = PerfPanel(tracer, self)
+        self.perf_panel.show()
+        self.perf_panel.raise_()
+
+    def show_log_query(self):
+        if self.log_query is None:
+            from log_index import LogIndex, LogQueryDialog
+            # Rows still queued in the event log writer are flushed before each query
+            self.log_query = LogQueryDialog(LogIndex(LOG_INDEX_PATH, '.'),
+                                            before_update=lambda: get_event_log().flush(2), parent=self)
+        self.log_query.show()
+        self.log_query.raise_()
+    
+    def show_connectivity(self):
+        self.output_display.append("Connectivity status:")
+        for line in get_probe_service().summary():
+            self.output_display.append(f"  {line}")
+    
+    def show_bash_line(self, job, stream, line):
+        if stream == 'stderr':
+            self.output_display.append(f"Bash error: {line}")
+        else:
+            self.output_display.append(f"Bash output: {line}")
+    
+    def show_bash_output(self, job):
+        bash_file = job.command['file']
+        if job.state == 'done':
+            self.output_display.append(f"Bash file {bash_file} exited with code {job.returncode}\n")
+        else:
+            if not os.path.exists(bash_file):
+                self.scripts.invalidate(bash_file)
+            self.output_display.append(f"Bash execution info: {job.error.strip() or job.state}\n")
+    
+    def show_tree_menu(self, position):
+        index = self.tree_view.indexAt(position)
+        if not index.isValid():
+            return
+        node = self.tree_model.node(index)
+        menu = QMenu(self)
+        run_children = menu.addAction('Run Script on Child Nodes')
+        run_children.setEnabled(not node.is_leaf() and sys.platform != 'win32')
+        if menu.exec_(self.tree_view.viewport().mapToGlobal(position)) is run_children:
+            self.run_script_on_children(node)
+    
+    def run_script_on_children(self, node):
+        # Run this node's script once per child (child name as $1) in parallel
+        # and report the combined exit codes once every run has finished
+        bash_file = self.scripts.get(node.name)
+        targets = [node_name(child) for child in node_children(node.data)]
+        results = {}
+        self.output_display.append(f"Running {bash_file} on {len(targets)} child node(s)\n")
+        
+        def finished(job):
+            target = job.command['args'][0]
+            results[target] = job.returncode if job.state == 'done' else job.state
+            self.output_display.append(f"[{target}] {job.state}, exit code {job.returncode}")
+            if len(results) == len(targets):
+                failed = [t for t, code in results.items() if code != 0]
+                self.output_display.append(
+                    f"{bash_file}: {len(targets) - len(failed)}/{len(targets)} succeeded"
+                    + (f", failed: {', '.join(failed)}" if failed else '') + "\n")
+        
+        def line(job, stream, text):
+            self.output_display.append(f"[{job.command['args'][0]}] {text}")
+        
+        for target in targets:
+            self.scheduler.submit({'type': 'bash', 'file': bash_file, 'args': [target]},
+                                  timeout=SCRIPT_TIMEOUT, callback=finished, on_line=line)
+    
     def user_defined_function(self, node_name, username):
-        self.output_display.append(f"User-defined function called with args: {node_name}, {username}\n")
+        self.output_signal.emit(f"User-defined function called with args: {node_name}, {username}\n")
         # Add custom logic here
         return f"Processed {node_name} for {username}"
     
@@ -567,16 +1521,13 @@ class MainWindow(QMainWindow):
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         event_data = [timestamp, self.username, node_name, event_type]
         
-        file_exists = os.path.exists(filename)
+        # Queued for the background writer; safe to call from pipeline threads
         try:
-            with open(filename, 'a', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                if not file_exists:
-                    writer.writerow(['Timestamp', 'Username', 'Node', 'Event'])
-                writer.writerow(event_data)
-            self.output_display.append(f"Event logged to {filename}\n")
+            with tracer.span('event_log.append', 'step', file=filename):
+                get_event_log().log(filename, EVENT_HEADER, event_data)
+            self.output_signal.emit(f"Event logged to {filename}\n")
         except Exception as e:
-            self.output_display.append(f"Error logging event: {str(e)}\n")
+            self.output_signal.emit(f"Error logging event: {str(e)}\n")
     
     def logout(self):
         reply = QMessageBox.question(self, 'Logout', 'Are you sure you want to logout?',
@@ -584,29 +1535,54 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.Yes:
             # Save any pending data
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with open('logfile.csv', 'a', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow([timestamp, self.username, '', '', '', 'Logout'])
+            event_log = get_event_log()
+            event_log.log('logfile.csv', LOGIN_HEADER, [timestamp, self.username, '', '', '', 'Logout'])
+            event_log.flush()
             
             # Return to login window
             self.login_window = LoginWindow()
             self.login_window.show()
             self.close()
+    
+    def stop_background_work(self):
+        # Drop queued pipeline steps; running ones finish in the background
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for dialog in self.fleet_dialogs:
+            dialog.run.cancel()
+        self.scheduler.shutdown()
+        self.output_display.close_spill()
+    
+    def discard(self):
+        # Pre-built for a user who did not log in
+        self.stop_background_work()
+        self.deleteLater()
+    
+    def closeEvent(self, event):
+        self.stop_background_work()
+        super().closeEvent(event)
 
 def main():
     app = QApplication(sys.argv)
     
     # Set application style
     app.setStyle('Fusion')
+    tracer.enabled = SPANS_ENABLED
     
     # Create initial input.txt if it doesn't exist
     if not os.path.exists('input.txt'):
         with open('input.txt', 'w') as f:
             f.write('This is a sample input file.\nIt contains multiple lines.\nFor testing purposes.')
     
+    startup_timer.mark('application')
+    
     # Start with login window
     login_window = LoginWindow()
     login_window.show()
+    startup_timer.mark('login_window_shown')
+    QTimer.singleShot(0, lambda: startup_timer.mark('event_loop_started'))
+    
+    # Write out any queued log rows before the process exits
+    app.aboutToQuit.connect(lambda: get_event_log().close())
     
     sys.exit(app.exec_())
 
@@ -0,0 +1,115 @@
+import time
+import queue
+import threading
+
+from ollama_client import GenerationStats, OllamaError
+
+QUEUE_POLL = 0.25              # seconds between queue position updates while waiting
+
+# =========================
+# Compare run
+# =========================
+# Streams the same turn from several models at once, one thread per model so
+# a slow or still-loading model never holds up the others. Streamlit calls
+# must stay on the script thread, so the threads only put pieces on a queue;
+# updates() drains it and reports which models changed, at most once per
+# `interval`, for the caller to redraw. cancel() stops every stream.
+#
+# Ollama runs requests for different models in parallel only when it may keep
+# them loaded together (OLLAMA_MAX_LOADED_MODELS); otherwise it queues them and
+# the later models show a longer first-token time. With a dispatcher (see
+# dispatcher.py) each model first waits for its turn in the shared queue.
+class CompareRun:
+    def __init__(self, client, jobs, dispatcher=None, session=None):
+        # jobs: [(model, conversation engine, messages ending with the user turn)]
+        self.client = client
+        self.dispatcher = dispatcher
+        self.session = session
+        self.jobs = list(jobs)
+        self.models = [model for model, _, _ in self.jobs]
+        self.stats = [GenerationStats() for _ in self.jobs]
+        self.texts = [''] * len(self.jobs)
+        self.errors = [None] * len(self.jobs)
+        self.done = [False] * len(self.jobs)
+        self.tickets = [None] * len(self.jobs)
+        self.events = queue.Queue()
+        self.stop = threading.Event()
+
+    def start(self):
+        for i, (model, engine, messages) in enumerate(self.jobs):
+            threading.Thread(target=self.run_model, args=(i, model, engine, messages),
+                             name=f'Compare-{model}', daemon=True).start()
+
+    def run_model(self, i, model, engine, messages):
+        ticket = None
+        try:
+            if self.dispatcher is not None:
+                ticket = self.tickets[i] = self.dispatcher.submit(self.session, model)
+                while not ticket.wait(QUEUE_POLL):
+                    if self.stop.is_set():
+                        return
+                    # An empty piece redraws the column with the new position
+                    self.events.put((i, '', None))
+                # Times count from when the request is actually sent
+                self.stats[i] = GenerationStats()
+            for piece in engine.stream(self.client, model, messages, self.stats[i], self.stop):
+                self.events.put((i, piece, None))
+        except OllamaError as e:
+            self.events.put((i, None, str(e)))
+        except Exception as e:
+            # Anything else (a malformed line, an unwrapped network error)
+            # must not pass for a finished answer
+            self.events.put((i, None, f"{type(e).__name__}: {e}"))
+        finally:
+            if ticket is not None:
+                ticket.release()
+            self.events.put((i, None, None))
+
+    def updates(self, interval=0.05):
+        # Yields the set of model indexes changed since the last yield, until
+        # every model has finished
+        while not all(self.done):
+            changed = set()
+            deadline = time.perf_counter() + interval
+            while True:
+                try:
+                    i, piece, error = self.events.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                changed.add(i)
+                if piece is not None:
+                    self.texts[i] += piece
+                elif error is not None:
+                    self.errors[i] = error
+                else:
+                    self.done[i] = True
+                    if all(self.done):
+                        break
+            if changed:
+                yield changed
+
+    def cancel(self):
+        self.stop.set()
+
+def describe(stats, done, ticket=None):
+    # One line of latency metrics for a model's column
+    if ticket is not None and ticket.granted is None and not done:
+        return f"queued, position {ticket.position()}, waiting {ticket.waited():.0f} s"
+    parts = []
+    if ticket is not None and ticket.waited() >= 0.5:
+        parts.append(f"queued {ticket.waited():.1f} s")
+    if stats.ttft is not None:
+        parts.append(f"first token {stats.ttft:.2f} s")
+    rate = stats.tokens_per_second()
+    if rate is None and stats.ttft is not None and stats.chunks > 1:
+        # Ollama's counters come with the last chunk; estimate until then
+        streaming = time.perf_counter() - stats.start - stats.ttft if not done else stats.total - stats.ttft
+        if streaming > 0:
+            rate = (stats.chunks - 1) / streaming
+    if rate is not None:
+        parts.append(f"{rate:.1f} tok/s")
+    if done and stats.total is not None:
+        parts.append(f"total {stats.total:.2f} s")
+    elif not done:
+        parts.append("generating...")
+    return " · ".join(parts)
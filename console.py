@@ -0,0 +1,159 @@
+import os
+from array import array
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QDialog, QPlainTextEdit, QPushButton, QVBoxLayout, QLabel
+
+# =========================
+# Config
+# =========================
+MAX_BLOCKS = 5000      # lines kept in the widget; older lines are dropped
+FLUSH_MS = 50          # how often buffered lines are written to the widget
+PAGE_LINES = 2000      # lines loaded per step in the scrollback viewer
+
+# =========================
+# Spill file
+# =========================
+# Every console line appended to a plain text file, with the byte offset of
+# each line kept in memory so any page of history can be read back directly.
+class ConsoleSpill:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8', newline='\n')
+        self.offsets = array('q')
+        self.position = 0
+
+    def write_lines(self, lines):
+        chunk = []
+        for line in lines:
+            data = line + '\n'
+            self.offsets.append(self.position)
+            self.position += len(data.encode('utf-8'))
+            chunk.append(data)
+        self.file.write(''.join(chunk))
+        self.file.flush()
+
+    def line_count(self):
+        return len(self.offsets)
+
+    def read_lines(self, start, end):
+        start = max(start, 0)
+        end = min(end, len(self.offsets))
+        if start >= end:
+            return []
+        stop = self.offsets[end] if end < len(self.offsets) else self.position
+        with open(self.path, 'rb') as f:
+            f.seek(self.offsets[start])
+            data = f.read(stop - self.offsets[start])
+        return data.decode('utf-8').split('\n')[:end - start]
+
+    def close(self):
+        self.file.close()
+
+# =========================
+# Console widget
+# =========================
+# Drop-in replacement for a read-only QTextEdit used as a log. append() only
+# buffers; a timer writes everything buffered as one insert, and the document
+# keeps at most max_blocks lines, so appends cost the same however long the
+# session runs.
+class ConsoleWidget(QPlainTextEdit):
+    def __init__(self, max_blocks=MAX_BLOCKS, flush_ms=FLUSH_MS, spill_path=None, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setMaximumBlockCount(max_blocks)
+        self.max_blocks = max_blocks
+        self.pending = []
+        self.pending_lines = 0
+        self.spill = ConsoleSpill(spill_path) if spill_path else None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(flush_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def append(self, text):
+        self.pending.append(text)
+        self.pending_lines += text.count('\n') + 1
+        # A burst larger than the widget can hold only needs its tail on screen
+        if self.pending_lines > self.max_blocks * 2 and self.spill is None:
+            self.trim_pending()
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def trim_pending(self):
+        lines = '\n'.join(self.pending).split('\n')[-self.max_blocks:]
+        self.pending = ['\n'.join(lines)]
+        self.pending_lines = len(lines)
+
+    def flush(self):
+        if not self.pending:
+            return
+        text = '\n'.join(self.pending)
+        self.pending = []
+        self.pending_lines = 0
+        if self.spill is not None:
+            self.spill.write_lines(text.split('\n'))
+            lines = text.split('\n')
+            if len(lines) > self.max_blocks:
+                text = '\n'.join(lines[-self.max_blocks:])
+        self.appendPlainText(text)
+
+    def toPlainText(self):
+        self.flush()
+        return super().toPlainText()
+
+    def clear(self):
+        self.pending = []
+        self.pending_lines = 0
+        super().clear()
+
+    def show_scrollback(self):
+        if self.spill is None:
+            return None
+        self.flush()
+        dialog = ScrollbackDialog(self.spill, self)
+        dialog.show()
+        return dialog
+
+    def close_spill(self):
+        self.flush()
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+# Read-only view of the spill file that loads older pages on request
+class ScrollbackDialog(QDialog):
+    def __init__(self, spill, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f'Scrollback - {os.path.basename(spill.path)}')
+        self.resize(900, 600)
+        self.spill = spill
+        self.start = spill.line_count()
+
+        layout = QVBoxLayout()
+        self.status = QLabel('')
+        self.load_button = QPushButton('Load earlier output')
+        self.load_button.clicked.connect(self.load_earlier)
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setUndoRedoEnabled(False)
+        layout.addWidget(self.status)
+        layout.addWidget(self.load_button)
+        layout.addWidget(self.view)
+        self.setLayout(layout)
+        self.load_earlier()
+
+    def load_earlier(self):
+        end = self.start
+        self.start = max(end - PAGE_LINES, 0)
+        lines = self.spill.read_lines(self.start, end)
+        if lines:
+            cursor = self.view.textCursor()
+            cursor.movePosition(cursor.Start)
+            text = '\n'.join(lines)
+            cursor.insertText(text + '\n' if not self.view.document().isEmpty() else text)
+        self.load_button.setEnabled(self.start > 0)
+        self.status.setText(f'Showing lines {self.start + 1}-{self.spill.line_count()} '
+                            f'of {self.spill.line_count()}')
@@ -0,0 +1,225 @@
+import bisect
+import threading
+
+from dispatcher import SYSTEM_SESSION
+from ollama_client import GenerationStats, OllamaError
+
+# =========================
+# Config
+# =========================
+CONTEXT_TOKENS = 2048          # model context window (Ollama's default num_ctx)
+MODEL_CONTEXT_TOKENS = {}      # per-model overrides, e.g. {"mistral:7b": 8192}
+REPLY_TOKENS = 512             # kept free for the reply
+COMPACT_TO = 0.6               # share of the prompt budget left to recent turns after compaction
+CHARS_PER_TOKEN = 3.5          # first estimate, until a model's own ratio is measured
+CALIBRATION_CHARS = 400        # shorter prompts are mostly template and skew the ratio
+SUMMARY_WORDS = 150
+SUMMARY_TOKENS = 300           # num_predict for summary requests
+SUMMARY_PROMPT = ("Summarize the conversation below so it can be continued later. Keep names, facts, "
+                  "decisions, code identifiers and open questions. Use at most {words} words.\n\n"
+                  "Earlier summary:\n{summary}\n\nConversation:\n{transcript}\nSummary:")
+
+def context_tokens(model):
+    return MODEL_CONTEXT_TOKENS.get(model, CONTEXT_TOKENS)
+
+def prompt_budget(model):
+    return context_tokens(model) - REPLY_TOKENS
+
+# =========================
+# Transcript
+# =========================
+def format_message(role, msg):
+    return f"User: {msg}\n" if role == "user" else f"Assistant: {msg}\n"
+
+def build_context(messages, summary=""):
+    parts = [f"Summary of the earlier conversation: {summary}\n"] if summary else []
+    parts.extend(format_message(role, msg) for role, msg in messages)
+    return "".join(parts)
+
+# =========================
+# Token estimates
+# =========================
+# Tokens per character, measured per model. After a full replay the returned
+# context holds exactly the prompt and reply tokens, which gives the model's
+# real ratio for that prompt; estimates use a moving average of it.
+class TokenEstimator:
+    def __init__(self):
+        self.ratios = {}
+
+    def tokens(self, model, chars):
+        return int(chars * self.ratios.get(model, 1 / CHARS_PER_TOKEN)) + 1
+
+    def chars(self, model, tokens):
+        return int(tokens / self.ratios.get(model, 1 / CHARS_PER_TOKEN))
+
+    def observe(self, model, chars, tokens):
+        if chars < CALIBRATION_CHARS or tokens <= 0:
+            return
+        ratio = tokens / chars
+        old = self.ratios.get(model)
+        self.ratios[model] = ratio if old is None else 0.8 * old + 0.2 * ratio
+
+token_estimator = TokenEstimator()
+
+# =========================
+# Context window
+# =========================
+# Decides which part of a conversation goes into a replayed prompt. The
+# formatted length of each message is counted once, when first seen, and
+# kept as running sums, so choosing the window costs a bisect rather than a
+# pass over the history.
+#
+# The prompt is the running summary plus the most recent messages that fit
+# the model's budget. Once the messages not yet summarized exceed the
+# budget, the oldest of them are folded into the summary by a background
+# request, leaving COMPACT_TO of the budget to recent turns. Until it
+# finishes, messages outside the window are left out. With a dispatcher the
+# summary request waits for a slot of the model like any chat turn.
+class ContextWindow:
+    def __init__(self, estimator=token_estimator, dispatcher=None):
+        self.estimator = estimator
+        self.dispatcher = dispatcher
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.sums = [0]         # sums[i]: formatted characters of messages[:i]
+            self.summary = ""
+            self.summarized = 0     # messages[:summarized] are covered by the summary
+            self.compacting = False
+            self.generation = getattr(self, 'generation', 0) + 1
+
+    def sync(self, messages):
+        # Counts messages not seen before; a shorter history means a new chat
+        if len(messages) < len(self.sums) - 1:
+            self.reset()
+        for role, msg in messages[len(self.sums) - 1:]:
+            self.sums.append(self.sums[-1] + len(format_message(role, msg)))
+
+    def message_tokens(self, model, index):
+        return self.estimator.tokens(model, self.sums[index + 1] - self.sums[index])
+
+    def window_start(self, model, budget):
+        # First message of the most recent run that fits `budget` tokens; the
+        # last message is always included
+        end = len(self.sums) - 1
+        chars = self.sums[end] - self.estimator.chars(model, budget)
+        return min(max(bisect.bisect_left(self.sums, chars), self.summarized), max(end - 1, 0))
+
+    def prompt(self, client, model, messages):
+        self.sync(messages)
+        with self.lock:
+            summary, summarized = self.summary, self.summarized
+        budget = prompt_budget(model) - self.estimator.tokens(model, len(summary))
+        start = self.window_start(model, budget)
+        if self.sums[-1] - self.sums[summarized] > self.estimator.chars(model, budget):
+            self.compact(client, model, messages, self.window_start(model, int(budget * COMPACT_TO)))
+        return build_context(messages[start:], summary)
+
+    def compact(self, client, model, messages, end):
+        with self.lock:
+            if self.compacting or end <= self.summarized:
+                return
+            self.compacting = True
+            summary, start, generation = self.summary, self.summarized, self.generation
+        transcript = build_context(messages[start:end])
+        threading.Thread(target=self.summarize, args=(client, model, summary, transcript, end, generation),
+                         name='Summarize', daemon=True).start()
+
+    def summarize(self, client, model, summary, transcript, end, generation):
+        prompt = SUMMARY_PROMPT.format(words=SUMMARY_WORDS, summary=summary or "(none)", transcript=transcript)
+        options = {"num_ctx": context_tokens(model), "num_predict": SUMMARY_TOKENS}
+        try:
+            if self.dispatcher is None:
+                text = client.generate(model, prompt, GenerationStats(), options=options)
+            else:
+                text = self.dispatcher.run(SYSTEM_SESSION, model, client.generate, model, prompt,
+                                           GenerationStats(), options=options)
+        except OllamaError:
+            text = None
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.compacting = False
+            if text:
+                self.summary = text.strip()
+                self.summarized = end
+
+# =========================
+# Conversation engine
+# =========================
+# Sends each turn so Ollama continues from the token state it returned for the
+# previous reply (the `context` array of /api/generate), instead of replaying
+# and re-evaluating the whole transcript. Only the new user message is sent,
+# so prompt evaluation no longer grows with the length of the conversation.
+#
+# State is kept per model, with the number of messages it covers. A model's
+# state is used only when it covers every message before the new one and
+# still leaves room in the budget; otherwise (a model switch, a stopped or
+# failed reply, a cleared chat, a full context) the turn replays the summary
+# and recent window from ContextWindow, which also gives the model a fresh
+# state. A request rejected while continuing from a saved state is retried
+# once as a replay.
+class ConversationEngine:
+    def __init__(self, dispatcher=None):
+        self.states = {}       # model -> (context, messages covered)
+        self.window = ContextWindow(dispatcher=dispatcher)
+
+    def reset(self):
+        self.states.clear()
+        self.window.reset()
+
+    def request(self, client, model, messages):
+        # (prompt, context) for a turn whose user message is messages[-1]
+        state = self.states.get(model)
+        if state is not None and state[1] == len(messages) - 1:
+            self.window.sync(messages)
+            if len(state[0]) + self.window.message_tokens(model, len(messages) - 1) <= prompt_budget(model):
+                return messages[-1][1], state[0]
+        return self.window.prompt(client, model, messages), None
+
+    def finished(self, model, messages, prompt, stats):
+        # The reply is stored as one more message after `messages`
+        if stats.context and not stats.stopped:
+            self.states[model] = (stats.context, len(messages) + 1)
+            if not stats.reused_context and stats.eval_count:
+                self.window.estimator.observe(model, len(prompt), len(stats.context) - stats.eval_count)
+        else:
+            self.states.pop(model, None)
+
+    def stream(self, client, model, messages, stats, stop=None):
+        # Yields the reply's text pieces. `messages` must not change while
+        # the reply streams.
+        prompt, context = self.request(client, model, messages)
+        options = {"num_ctx": context_tokens(model)}
+        stats.reused_context = context is not None
+        self.states.pop(model, None)
+        started = False
+        try:
+            for piece in client.stream_generate(model, prompt, stats, stop, context=context, options=options):
+                started = True
+                yield piece
+        except OllamaError:
+            if context is None or started:
+                raise
+            stats.reused_context = False
+            prompt = self.window.prompt(client, model, messages)
+            yield from client.stream_generate(model, prompt, stats, stop, options=options)
+        self.finished(model, messages, prompt, stats)
+
+    def generate(self, client, model, messages, stats):
+        prompt, context = self.request(client, model, messages)
+        options = {"num_ctx": context_tokens(model)}
+        stats.reused_context = context is not None
+        self.states.pop(model, None)
+        try:
+            text = client.generate(model, prompt, stats, context=context, options=options)
+        except OllamaError:
+            if context is None:
+                raise
+            stats.reused_context = False
+            prompt = self.window.prompt(client, model, messages)
+            text = client.generate(model, prompt, stats, options=options)
+        self.finished(model, messages, prompt, stats)
+        return text
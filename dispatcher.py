@@ -0,0 +1,212 @@
+import time
+import itertools
+import threading
+from collections import deque
+
+from ollama_client import OllamaError
+
+# =========================
+# Config
+# =========================
+MAX_IN_FLIGHT = 1              # generations per model at once; match OLLAMA_NUM_PARALLEL
+MODEL_MAX_IN_FLIGHT = {}       # per-model overrides, e.g. {"starcoder2:3b": 2}
+MAX_QUEUE = 16                 # requests waiting across every session before new ones are refused
+MAX_QUEUED_PER_SESSION = 4     # requests one session may have waiting
+QUEUE_TIMEOUT = 120            # seconds a request may wait for its turn
+SYSTEM_SESSION = 'system'      # background requests: summaries, model loads
+
+class DispatcherBusy(OllamaError):
+    pass
+
+# =========================
+# Ticket
+# =========================
+# A place in the dispatcher's queue for one generation. wait() returns True
+# once the request may be sent; release() gives the slot back (or leaves the
+# queue) and must be called either way, so callers use try/finally.
+class Ticket:
+    def __init__(self, dispatcher, session, model, sequence):
+        self.dispatcher = dispatcher
+        self.session = session
+        self.model = model
+        self.sequence = sequence
+        self.submitted = time.monotonic()
+        self.granted = None        # monotonic time the slot was given
+        self.released = False
+
+    def wait(self, timeout=None):
+        # True when granted; False if still waiting after `timeout` seconds.
+        # Raises DispatcherBusy once the request has waited QUEUE_TIMEOUT.
+        return self.dispatcher.wait(self, timeout)
+
+    def waited(self):
+        return (self.granted if self.granted is not None else time.monotonic()) - self.submitted
+
+    def position(self):
+        # 1 for the next request to be sent, 0 once granted
+        return self.dispatcher.position(self)
+
+    def release(self):
+        self.dispatcher.release(self)
+
+# =========================
+# Dispatcher
+# =========================
+# One per process (the Streamlit app caches it with st.cache_resource), so
+# every browser session's requests to Ollama go through the same queue. Each
+# model runs at most MAX_IN_FLIGHT generations at once; the rest wait here
+# instead of piling up inside Ollama. When a slot frees up it goes to the
+# waiting session served least recently, so one session sending many
+# requests (or compare mode) takes turns with the others rather than
+# starving them. A request that cannot be queued, because the queue or the
+# session's share of it is full, is refused at once with DispatcherBusy,
+# and so is one still waiting after QUEUE_TIMEOUT.
+#
+# Background requests that generate with or load a chat model (conversation
+# summaries, ModelManager's preloads and keep_alive updates) go through run()
+# as SYSTEM_SESSION, so they count against the same per-model cap and take
+# turns with the users' sessions; that session has no per-session share, only
+# the overall MAX_QUEUE. Embedding requests from the response cache are exempt:
+# they go to the embedding model rather than a chat model, are short, and are
+# made while looking up a question, before the turn itself is queued.
+class Dispatcher:
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, model_max_in_flight=None, max_queue=MAX_QUEUE,
+                 max_queued_per_session=MAX_QUEUED_PER_SESSION, queue_timeout=QUEUE_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.model_max_in_flight = dict(MODEL_MAX_IN_FLIGHT if model_max_in_flight is None else model_max_in_flight)
+        self.max_queue = max_queue
+        self.max_queued_per_session = max_queued_per_session
+        self.queue_timeout = queue_timeout
+        self.condition = threading.Condition()
+        self.sequence = itertools.count()
+        self.waiting = {}          # model -> {session: deque of tickets}
+        self.in_flight = {}        # model -> granted tickets
+        self.last_served = {}      # session -> virtual time of its last grant
+        self.clock = -1            # virtual time: sequence number of the latest grant
+        self.queued = 0
+        self.rejected = 0
+
+    def limit(self, model):
+        return self.model_max_in_flight.get(model, self.max_in_flight)
+
+    def submit(self, session, model):
+        with self.condition:
+            sessions = self.waiting.setdefault(model, {})
+            mine = sum(len(queue.get(session, ())) for queue in self.waiting.values())
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise DispatcherBusy(f"Server busy: {self.queued} requests already waiting, try again shortly")
+            if session != SYSTEM_SESSION and mine >= self.max_queued_per_session:
+                self.rejected += 1
+                raise DispatcherBusy(f"Too many requests: you already have {mine} requests waiting, "
+                                     f"try again once one has finished")
+            ticket = Ticket(self, session, model, next(self.sequence))
+            # A new or returning idle session joins at the current virtual
+            # time: behind every waiting session served before the latest
+            # grant, ahead only of the session that just got it
+            self.last_served.setdefault(session, self.clock - 0.5)
+            sessions.setdefault(session, deque()).append(ticket)
+            self.queued += 1
+            self.dispatch(model)
+            return ticket
+
+    def run(self, session, model, function, *args, **kwargs):
+        # Calls function(*args, **kwargs) once a slot of `model` is granted;
+        # for requests sent outside a chat turn
+        ticket = self.submit(session, model)
+        try:
+            ticket.wait()
+            return function(*args, **kwargs)
+        finally:
+            ticket.release()
+
+    def order(self, model):
+        # Waiting tickets of `model` in the order they would be granted:
+        # sessions take turns, least recently served first
+        sessions = self.waiting.get(model, {})
+        queues = sorted(sessions.values(), key=lambda queue: (self.last_served[queue[0].session],
+                                                              queue[0].sequence))
+        order = []
+        for tier in itertools.zip_longest(*queues):
+            order.extend(ticket for ticket in tier if ticket is not None)
+        return order
+
+    def dispatch(self, model):
+        # Grants free slots of `model`; called with the condition held
+        running = self.in_flight.setdefault(model, set())
+        granted = False
+        while len(running) < self.limit(model):
+            sessions = self.waiting.get(model)
+            if not sessions:
+                break
+            ticket = self.order(model)[0]
+            self.remove_waiting(ticket)
+            ticket.granted = time.monotonic()
+            self.clock = next(self.sequence)
+            self.last_served[ticket.session] = self.clock
+            running.add(ticket)
+            granted = True
+        if granted:
+            self.condition.notify_all()
+
+    def remove_waiting(self, ticket):
+        sessions = self.waiting[ticket.model]
+        queue = sessions[ticket.session]
+        queue.remove(ticket)
+        if not queue:
+            del sessions[ticket.session]
+        self.queued -= 1
+
+    def wait(self, ticket, timeout=None):
+        deadline = ticket.submitted + self.queue_timeout
+        with self.condition:
+            if ticket.granted is None and not ticket.released:
+                remaining = deadline - time.monotonic()
+                if timeout is not None:
+                    remaining = min(remaining, timeout)
+                self.condition.wait_for(lambda: ticket.granted is not None or ticket.released,
+                                        max(0.0, remaining))
+            if ticket.granted is not None:
+                return True
+            if time.monotonic() >= deadline and not ticket.released:
+                self.release_locked(ticket)
+                self.rejected += 1
+                raise DispatcherBusy(f"Server busy: no free slot for {ticket.model} "
+                                     f"within {self.queue_timeout} s, try again shortly")
+            return False
+
+    def position(self, ticket):
+        with self.condition:
+            if ticket.granted is not None or ticket.released:
+                return 0
+            return self.order(ticket.model).index(ticket) + 1
+
+    def release(self, ticket):
+        with self.condition:
+            self.release_locked(ticket)
+
+    def release_locked(self, ticket):
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.granted is None:
+            self.remove_waiting(ticket)
+        else:
+            self.in_flight[ticket.model].discard(ticket)
+        if not any(ticket.session in sessions for sessions in self.waiting.values()) and \
+                not any(t.session == ticket.session for running in self.in_flight.values() for t in running):
+            # Idle sessions are forgotten; on their next request they rejoin
+            # at the current virtual time rather than jumping the queue
+            self.last_served.pop(ticket.session, None)
+        self.dispatch(ticket.model)
+
+    def status(self):
+        # {model: (generating, waiting)} for models with either
+        with self.condition:
+            result = {}
+            for model in set(self.waiting) | set(self.in_flight):
+                running = len(self.in_flight.get(model, ()))
+                waiting = sum(len(queue) for queue in self.waiting.get(model, {}).values())
+                if running or waiting:
+                    result[model] = (running, waiting)
+            return result
@@ -0,0 +1,197 @@
+import os
+import csv
+import json
+import queue
+import sys
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+# =========================
+# Config
+# =========================
+FLUSH_INTERVAL = 0.5           # longest a queued row waits before it is written
+BATCH_SIZE = 500               # flush early once this many rows are queued
+MAX_BYTES = 10 * 1024 * 1024   # rotate a CSV file once it grows past this (0 = never)
+
+# =========================
+# Sinks
+# =========================
+# Appends rows to the CSV files (logfile.csv, leaf_events.csv, ...) and keeps
+# each file open between batches. Rotated files are renamed to
+# <name>.<YYYYmmdd-HHMMSS>.csv next to the live file.
+class CsvSink:
+    def __init__(self, directory='.', max_bytes=MAX_BYTES, rotate_daily=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.files = {}
+
+    def write(self, filename, header, rows):
+        handle = self.open(filename, header)
+        csv.writer(handle).writerows(rows)
+        handle.flush()
+
+    def open(self, filename, header):
+        path = os.path.join(self.directory, filename)
+        entry = self.files.get(path)
+        today = datetime.now().date()
+        if entry is not None:
+            handle, opened_on = entry
+            too_big = self.max_bytes and handle.tell() >= self.max_bytes
+            new_day = self.rotate_daily and opened_on != today
+            if not (too_big or new_day):
+                return handle
+            handle.close()
+            self.rotate(path)
+        elif self.rotate_daily and os.path.exists(path):
+            # Rotate a file left over from a previous day
+            if datetime.fromtimestamp(os.path.getmtime(path)).date() != today:
+                self.rotate(path)
+
+        handle = open(path, 'a', newline='')
+        if handle.tell() == 0 and header:
+            csv.writer(handle).writerow(header)
+        self.files[path] = (handle, today)
+        return handle
+
+    def rotate(self, path):
+        stem, ext = os.path.splitext(path)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        target = f"{stem}.{stamp}{ext}"
+        counter = 1
+        while os.path.exists(target):
+            target = f"{stem}.{stamp}-{counter}{ext}"
+            counter += 1
+        os.replace(path, target)
+        self.files.pop(path, None)
+
+    def close(self):
+        for handle, opened_on in self.files.values():
+            handle.close()
+        self.files = {}
+
+# Append-only SQLite database in WAL mode; one table holds every log, keyed by
+# the CSV file name the row would have gone to.
+class SqliteSink:
+    def __init__(self, path='events.db'):
+        self.path = path
+        self.connection = None
+
+    def write(self, filename, header, rows):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS events ('
+                'log TEXT, timestamp TEXT, username TEXT, fields TEXT)')
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO events VALUES (?, ?, ?, ?)',
+                [(filename, row[0], row[1], json.dumps(row[2:])) for row in rows])
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+# =========================
+# Writer
+# =========================
+# Queues rows in memory and writes them in batches from one background thread,
+# so callers on the GUI thread never touch the disk.
+class EventLogWriter:
+    def __init__(self, sinks=None, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE):
+        self.sinks = sinks if sinks is not None else [CsvSink()]
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.written = 0
+        self.errors = 0                # failed sink writes
+        self.last_error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name='EventLogWriter', daemon=True)
+        self.thread.start()
+
+    def log(self, filename, header, row):
+        if self.closed:
+            raise RuntimeError('Event log writer is closed')
+        self.queue.put((filename, header, list(row)))
+
+    def flush(self, timeout=None):
+        # Block until everything queued so far is on disk. Once closed there
+        # is no writer thread to wait for; True if it finished the queue
+        if self.closed:
+            return not self.thread.is_alive()
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def status(self):
+        # Rows at least one sink accepted, rows still queued, failed sink writes and the last failure
+        return {'written': self.written, 'queued': self.queue.qsize(), 'errors': self.errors,
+                'last_error': self.last_error}
+
+    def close(self, timeout=5):
+        # Returns the last write error, if any, after reporting it on stderr
+        if self.closed:
+            return self.last_error
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(timeout)
+        if self.last_error is not None:
+            print(f"Event log: {self.errors} write(s) failed, last: {self.last_error!r}", file=sys.stderr)
+        return self.last_error
+
+    def run(self):
+        # Rows are written once flush_interval has passed since the oldest
+        # pending one was queued, even while new rows keep arriving
+        pending = []
+        deadline = None
+        while True:
+            try:
+                if deadline is None:
+                    item = self.queue.get()
+                else:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = False
+
+            if isinstance(item, tuple):
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(pending) < self.batch_size and time.monotonic() < deadline:
+                    continue
+
+            self.write_batch(pending)
+            pending = []
+            deadline = None
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                break
+
+        for sink in self.sinks:
+            sink.close()
+
+    def write_batch(self, pending):
+        if not pending:
+            return
+        # Group by file so each file is written once per batch
+        groups = {}
+        for filename, header, row in pending:
+            groups.setdefault((filename, tuple(header or ())), []).append(row)
+        for (filename, header), rows in groups.items():
+            accepted = False
+            for sink in self.sinks:
+                try:
+                    sink.write(filename, header, rows)
+                    accepted = True
+                except Exception as e:
+                    self.errors += 1
+                    self.last_error = e
+            if accepted:
+                self.written += len(rows)
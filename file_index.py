@@ -0,0 +1,172 @@
+import os
+import hashlib
+import threading
+
+# watchdog (inotify on Linux) is optional; without it the index polls
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# =========================
+# Config
+# =========================
+POLL_INTERVAL = 2.0            # seconds between directory checks when polling
+HASH_CHUNK = 1024 * 1024
+
+# =========================
+# Entries
+# =========================
+class FileEntry:
+    __slots__ = ('name', 'path', 'size', 'mtime', '_hash')
+
+    def __init__(self, path, stat):
+        self.name = os.path.basename(path)
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self._hash = None
+
+    def content_hash(self):
+        # SHA-256 of the file, computed on first use and kept until the file's
+        # size or mtime changes
+        stat = os.stat(self.path)
+        if stat.st_size != self.size or stat.st_mtime != self.mtime:
+            self.size = stat.st_size
+            self.mtime = stat.st_mtime
+            self._hash = None
+        if self._hash is None:
+            digest = hashlib.sha256()
+            with open(self.path, 'rb') as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                    digest.update(chunk)
+            self._hash = digest.hexdigest()
+        return self._hash
+
+    def __repr__(self):
+        return f"FileEntry({self.name!r}, size={self.size})"
+
+# =========================
+# Index
+# =========================
+class _IndexEventHandler(FileSystemEventHandler):
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.index.refresh_path(event.src_path)
+
+    on_modified = on_created
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.index.remove_path(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.index.remove_path(event.src_path)
+            self.index.refresh_path(event.dest_path)
+
+# Files of one directory, filtered by extension. Built with a single
+# os.scandir pass, then kept current by watchdog events or, without watchdog,
+# by rescanning every poll_interval. A file rewritten in place does not
+# change the directory's mtime, so each poll re-stats every entry; entries
+# whose size and mtime are unchanged are kept with their cached hash.
+class FileIndex:
+    def __init__(self, directory='.', extensions=None, poll_interval=POLL_INTERVAL, use_watchdog=True):
+        self.directory = os.path.abspath(directory)
+        self.extensions = tuple(ext.lower() for ext in extensions) if extensions else None
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.observer = None
+        self.poller = None
+        self.stopped = threading.Event()
+
+        self.scan()
+        if use_watchdog and Observer is not None:
+            self.observer = Observer()
+            self.observer.schedule(_IndexEventHandler(self), self.directory, recursive=False)
+            self.observer.daemon = True
+            self.observer.start()
+        else:
+            self.poller = threading.Thread(target=self.poll, name='FileIndexPoller', daemon=True)
+            self.poller.start()
+
+    def matches(self, name):
+        return self.extensions is None or name.lower().endswith(self.extensions)
+
+    def scan(self):
+        found = {}
+        try:
+            it = os.scandir(self.directory)
+        except FileNotFoundError:
+            # Only a missing directory empties the index
+            it = None
+        if it is not None:
+            with it:
+                for item in it:
+                    if not self.matches(item.name):
+                        continue
+                    try:
+                        if not item.is_file():
+                            continue
+                        stat = item.stat()
+                    except FileNotFoundError:
+                        # Deleted between listing and stat
+                        continue
+                    old = self.entries.get(item.path)
+                    if old is not None and old.size == stat.st_size and old.mtime == stat.st_mtime:
+                        found[item.path] = old   # keeps the cached hash
+                    else:
+                        found[item.path] = FileEntry(item.path, stat)
+        with self.lock:
+            self.entries = found
+
+    def poll(self):
+        while not self.stopped.wait(self.poll_interval):
+            self.scan()
+
+    def refresh_path(self, path):
+        path = os.path.abspath(path)
+        if os.path.dirname(path) != self.directory or not self.matches(path):
+            return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.remove_path(path)
+            return
+        with self.lock:
+            old = self.entries.get(path)
+            if old is None or old.size != stat.st_size or old.mtime != stat.st_mtime:
+                self.entries[path] = FileEntry(path, stat)
+
+    def remove_path(self, path):
+        with self.lock:
+            self.entries.pop(os.path.abspath(path), None)
+
+    def files(self, extension=None):
+        with self.lock:
+            entries = list(self.entries.values())
+        if extension:
+            entries = [entry for entry in entries if entry.name.lower().endswith(extension.lower())]
+        return sorted(entries, key=lambda entry: entry.name)
+
+    def names(self, extension=None):
+        return [entry.name for entry in self.files(extension)]
+
+    def get(self, name):
+        with self.lock:
+            return self.entries.get(os.path.join(self.directory, name))
+
+    def close(self):
+        self.stopped.set()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join(1)
+        if self.poller is not None:
+            self.poller.join(1)
@@ -0,0 +1,235 @@
+import json
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView)
+
+# =========================
+# Config
+# =========================
+CONCURRENCY = 16           # targets worked on at the same time
+TARGET_TIMEOUT = 90.0      # seconds before a target is reported as timed out
+FINAL_STATES = ('ok', 'failed', 'unreachable', 'timeout', 'error', 'cancelled')
+STATE_COLORS = {'queued': '#dddddd', 'running': '#fff2a8', 'ok': '#b8e6b8', 'failed': '#f4b6b6',
+                'unreachable': '#f4b6b6', 'timeout': '#f7cf9c', 'error': '#f4b6b6',
+                'cancelled': '#cccccc'}
+
+# =========================
+# Targets
+# =========================
+class FleetTarget:
+    __slots__ = ('name', 'plane', 'lru1', 'lru2', 'host')
+
+    def __init__(self, plane, lru1, lru2, host, name=None):
+        self.plane = plane
+        self.lru1 = str(lru1)
+        self.lru2 = str(lru2)
+        self.host = host
+        self.name = name or f"{plane}:{self.lru1}/{self.lru2}"
+
+    def __repr__(self):
+        return f"FleetTarget({self.name!r}, host={self.host!r})"
+
+# Fleet file: a JSON list of {"plane", "lru1", "lru2", "host"} objects, with
+# optional "name". Entries without a host use `default_host`.
+def load_fleet(path, default_host):
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a list of targets")
+    targets = []
+    for entry in entries:
+        try:
+            targets.append(FleetTarget(entry['plane'], entry.get('lru1', '1'), entry.get('lru2', '1'),
+                                       entry.get('host') or default_host, entry.get('name')))
+        except (KeyError, TypeError, AttributeError):
+            raise ValueError(f"{path}: invalid target {entry!r}")
+    return targets
+
+# =========================
+# Run
+# =========================
+# One action fanned out to every target on a bounded thread pool. Each target
+# reports its own state; a target still running after target_timeout is
+# marked 'timeout' and no longer counted, so one slow or unreachable target
+# never holds up the summary for the rest.
+#
+# action(target, report) runs on a pool thread and returns (state, detail);
+# report(text) updates the target's row while it runs.
+class FleetRun(QObject):
+    target_changed = pyqtSignal(int, str, str, float)
+    finished = pyqtSignal(object)
+
+    def __init__(self, label, targets, action, concurrency=CONCURRENCY, target_timeout=TARGET_TIMEOUT,
+                 parent=None):
+        super().__init__(parent)
+        self.label = label
+        self.targets = list(targets)
+        self.action = action
+        self.target_timeout = target_timeout
+        self.lock = threading.Lock()
+        self.states = ['queued'] * len(self.targets)
+        self.details = [''] * len(self.targets)
+        self.started = [None] * len(self.targets)
+        self.durations = [0.0] * len(self.targets)
+        self.remaining = len(self.targets)
+        self.done = threading.Event()
+        self.cancelled = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(self.targets))),
+                                           thread_name_prefix='Fleet')
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        if not self.targets:
+            self.done.set()
+            self.finished.emit(self.summary())
+            return
+        for row, target in enumerate(self.targets):
+            self.executor.submit(self.run_target, row, target)
+        self.executor.shutdown(wait=False)
+        threading.Thread(target=self.watch_deadlines, name='FleetDeadlines', daemon=True).start()
+
+    def run_target(self, row, target):
+        if self.cancelled.is_set():
+            self.finish(row, 'cancelled', '')
+            return
+        self.update(row, 'running', '')
+        try:
+            state, detail = self.action(target, lambda text: self.update(row, 'running', text))
+        except Exception as e:
+            state, detail = 'error', str(e)
+        self.finish(row, state, detail)
+
+    def update(self, row, state, detail):
+        with self.lock:
+            if self.states[row] in FINAL_STATES:
+                return
+            if self.started[row] is None:
+                self.started[row] = time.perf_counter()
+            self.states[row] = state
+            self.details[row] = detail
+            elapsed = time.perf_counter() - self.started[row]
+        self.target_changed.emit(row, state, detail, elapsed)
+
+    def finish(self, row, state, detail):
+        # First final state wins; a result arriving after a timeout is ignored
+        with self.lock:
+            if self.states[row] in FINAL_STATES:
+                return
+            started = self.started[row]
+            duration = time.perf_counter() - started if started is not None else 0.0
+            self.durations[row] = duration
+            self.states[row] = state
+            self.details[row] = detail
+            self.remaining -= 1
+            last = self.remaining == 0
+        self.target_changed.emit(row, state, detail, duration)
+        if last:
+            self.done.set()
+            self.finished.emit(self.summary())
+
+    def watch_deadlines(self):
+        while not self.done.wait(0.5):
+            now = time.perf_counter()
+            with self.lock:
+                overdue = [row for row, started in enumerate(self.started)
+                           if started is not None and self.states[row] not in FINAL_STATES
+                           and now - started > self.target_timeout]
+            for row in overdue:
+                self.finish(row, 'timeout', f"no result after {self.target_timeout:.0f} s")
+
+    def cancel(self):
+        # Queued targets are dropped; running ones finish in the background
+        self.cancelled.set()
+        with self.lock:
+            queued = [row for row, state in enumerate(self.states) if state == 'queued']
+        for row in queued:
+            self.finish(row, 'cancelled', '')
+
+    def summary(self):
+        with self.lock:
+            counts = Counter(self.states)
+            finished = [(self.durations[row], self.targets[row].name) for row in range(len(self.targets))
+                        if self.states[row] not in ('queued', 'cancelled')]
+            failed = [self.targets[row].name for row, state in enumerate(self.states)
+                      if state not in ('ok', 'cancelled')]
+        finished.sort(reverse=True)
+        return {'label': self.label,
+                'targets': len(self.targets),
+                'counts': dict(counts),
+                'elapsed': time.perf_counter() - self.start_time,
+                'slowest': finished[:3],
+                'failed': failed}
+
+def describe_summary(summary):
+    counts = ', '.join(f"{state} {count}" for state, count in sorted(summary['counts'].items()))
+    text = (f"Fleet {summary['label']}: {summary['targets']} target(s) in "
+            f"{summary['elapsed']:.1f} s ({counts})")
+    if summary['slowest']:
+        text += '\n  slowest: ' + ', '.join(f"{name} {seconds:.1f} s" for seconds, name in summary['slowest'])
+    if summary['failed']:
+        text += '\n  not ok: ' + ', '.join(summary['failed'])
+    return text
+
+# =========================
+# Status grid
+# =========================
+class FleetDialog(QDialog):
+    COLUMNS = ['Target', 'Plane', 'LRU1', 'LRU2', 'State', 'Time (s)', 'Detail']
+
+    def __init__(self, run, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f'Fleet - {run.label}')
+        self.resize(900, 500)
+        self.run = run
+
+        layout = QVBoxLayout()
+        self.summary_label = QLabel(f'Running on {len(run.targets)} target(s)...')
+        self.table = QTableWidget(len(run.targets), len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(len(self.COLUMNS) - 1, QHeaderView.Stretch)
+        for row, target in enumerate(run.targets):
+            for column, text in enumerate([target.name, target.plane, target.lru1, target.lru2,
+                                           'queued', '', '']):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+            self.color_row(row, 'queued')
+
+        buttons = QHBoxLayout()
+        self.cancel_button = QPushButton('Cancel Remaining')
+        self.cancel_button.clicked.connect(run.cancel)
+        close_button = QPushButton('Close')
+        close_button.clicked.connect(self.close)
+        buttons.addStretch(1)
+        buttons.addWidget(self.cancel_button)
+        buttons.addWidget(close_button)
+
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        run.target_changed.connect(self.update_row)
+        run.finished.connect(self.show_summary)
+
+    def update_row(self, row, state, detail, seconds):
+        self.table.item(row, 4).setText(state)
+        self.table.item(row, 5).setText(f'{seconds:.1f}')
+        self.table.item(row, 6).setText(detail)
+        self.color_row(row, state)
+
+    def color_row(self, row, state):
+        color = QColor(STATE_COLORS.get(state, '#ffffff'))
+        for column in range(4, len(self.COLUMNS)):
+            self.table.item(row, column).setBackground(color)
+
+    def show_summary(self, summary):
+        self.cancel_button.setEnabled(False)
+        self.summary_label.setText(describe_summary(summary).replace('\n  ', ' | '))
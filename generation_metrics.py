@@ -0,0 +1,154 @@
+import io
+import csv
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+# =========================
+# Config
+# =========================
+METRICS_PATH = 'generation_metrics.db'
+METRICS_KEEP_DAYS = 90         # older rows are dropped when the store opens
+
+# Columns of a metrics row, in export order. Durations are in seconds; the
+# *_duration columns and token counts come from Ollama's final response, ttft
+# and total are measured by the client.
+COLUMNS = ['time', 'session', 'model', 'mode', 'history_messages', 'prompt_chars', 'reused_context',
+           'ttft', 'total', 'total_duration', 'load_duration', 'prompt_eval_count', 'prompt_eval_duration',
+           'eval_count', 'eval_duration', 'tokens_per_second', 'prompt_tokens_per_second',
+           'done_reason', 'stopped', 'error']
+
+def metrics_row(session, model, mode, messages, stats, error=None):
+    # One row for a reply to `messages` (the history ending with the user turn)
+    return {
+        'time': time.time(), 'session': session, 'model': model, 'mode': mode,
+        'history_messages': len(messages), 'prompt_chars': sum(len(msg) for _, msg in messages),
+        'reused_context': int(stats.reused_context), 'ttft': stats.ttft, 'total': stats.total,
+        'total_duration': stats.total_duration, 'load_duration': stats.load_duration,
+        'prompt_eval_count': stats.prompt_eval_count, 'prompt_eval_duration': stats.prompt_eval_duration,
+        'eval_count': stats.eval_count, 'eval_duration': stats.eval_duration,
+        'tokens_per_second': stats.tokens_per_second(), 'prompt_tokens_per_second': stats.prompt_tokens_per_second(),
+        'done_reason': stats.done_reason, 'stopped': int(stats.stopped), 'error': error,
+    }
+
+# =========================
+# Metrics store
+# =========================
+# Every generated reply is recorded with Ollama's timing counters, in a
+# SQLite file shared by all sessions of the app, so throughput can be
+# compared across models and history lengths after the fact.
+class MetricsStore:
+    def __init__(self, path=METRICS_PATH, keep_days=METRICS_KEEP_DAYS):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS metrics (id INTEGER PRIMARY KEY, "
+                                    f"{', '.join(COLUMNS)})")
+            self.connection.execute('CREATE INDEX IF NOT EXISTS metrics_session ON metrics (session, id)')
+            if keep_days:
+                self.connection.execute('DELETE FROM metrics WHERE time < ?', (time.time() - keep_days * 86400,))
+
+    def record(self, row):
+        with self.lock:
+            with self.connection:
+                self.connection.execute(f"INSERT INTO metrics ({', '.join(COLUMNS)}) "
+                                        f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                                        [row.get(column) for column in COLUMNS])
+
+    def rows(self, session=None, model=None, since=None, limit=None):
+        # Rows as dicts, oldest first; `limit` keeps the most recent ones
+        where, args = [], []
+        for column, op, value in (('session', '=', session), ('model', '=', model), ('time', '>=', since)):
+            if value is not None:
+                where.append(f"{column} {op} ?")
+                args.append(value)
+        query = f"SELECT {', '.join(COLUMNS)} FROM metrics"
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' ORDER BY id DESC'
+        if limit:
+            query += f' LIMIT {int(limit)}'
+        with self.lock:
+            result = self.connection.execute(query, args).fetchall()
+        return [dict(zip(COLUMNS, values)) for values in reversed(result)]
+
+    def clear(self, session=None):
+        with self.lock:
+            with self.connection:
+                if session is None:
+                    self.connection.execute('DELETE FROM metrics')
+                else:
+                    self.connection.execute('DELETE FROM metrics WHERE session = ?', (session,))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+# =========================
+# Summaries and export
+# =========================
+def mean(values):
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else None
+
+def summarize(rows):
+    # Per-model averages: [{model, replies, tok/s, prompt tok/s, ...}]
+    by_model = {}
+    for row in rows:
+        by_model.setdefault(row['model'], []).append(row)
+    summary = []
+    for model, model_rows in by_model.items():
+        summary.append({
+            'model': model, 'replies': len(model_rows),
+            'tokens_per_second': mean(row['tokens_per_second'] for row in model_rows),
+            'prompt_tokens_per_second': mean(row['prompt_tokens_per_second'] for row in model_rows),
+            'prompt_eval_count': mean(row['prompt_eval_count'] for row in model_rows),
+            'ttft': mean(row['ttft'] for row in model_rows),
+            'load_duration': mean(row['load_duration'] for row in model_rows),
+        })
+    return summary
+
+def to_csv(rows):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=COLUMNS, lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+def to_json(rows):
+    return json.dumps(rows, indent=1)
+
+# =========================
+# Command line
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description='Export recorded Ollama generation metrics')
+    parser.add_argument('--store', default=METRICS_PATH)
+    parser.add_argument('--session')
+    parser.add_argument('--model')
+    parser.add_argument('--format', choices=['csv', 'json', 'summary'], default='csv')
+    parser.add_argument('--limit', type=int)
+    args = parser.parse_args()
+
+    store = MetricsStore(args.store, keep_days=None)
+    rows = store.rows(session=args.session, model=args.model, limit=args.limit)
+    if args.format == 'csv':
+        sys.stdout.write(to_csv(rows))
+    elif args.format == 'json':
+        print(to_json(rows))
+    else:
+        for entry in summarize(rows):
+            print(f"{entry['model']:20} {entry['replies']:6d} replies  "
+                  f"{entry['tokens_per_second'] or 0:7.1f} tok/s  "
+                  f"{entry['prompt_tokens_per_second'] or 0:8.1f} prompt tok/s  "
+                  f"{entry['prompt_eval_count'] or 0:7.0f} prompt tokens")
+    store.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+import os
+import mmap
+import zlib
+import bisect
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# =========================
+# Config
+# =========================
+RECORD_CHUNK = 65536   # records decoded per vectorized step (bounds memory)
+MIN_RUN = 16           # equally spaced records decoded through a reshaped view
+MAX_REPORTED = 20      # record numbers listed per error kind in summaries
+
+# Record types
+DATA = 0
+END_OF_FILE = 1
+EXTENDED_SEGMENT = 2
+START_SEGMENT = 3
+EXTENDED_LINEAR = 4
+START_LINEAR = 5
+
+# ASCII hex digit -> value; 255 marks anything that is not a hex digit
+HEX_VALUES = np.full(256, 255, dtype=np.uint8)
+for value, char in enumerate(b'0123456789ABCDEF'):
+    HEX_VALUES[char] = value
+for value, char in enumerate(b'abcdef'):
+    HEX_VALUES[char] = 10 + value
+
+# =========================
+# Image
+# =========================
+# Decoded load image: contiguous address ranges over one bytearray, plus what
+# the verifier found on the way.
+class HexImage:
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.file_size = 0
+        self.ranges = []            # [(start address, length)] in address order
+        self.offsets = []           # offset of each range in self.data
+        self.data = bytearray()
+        self.record_count = 0
+        self.data_records = 0
+        self.checksum_errors = []   # 1-based record numbers
+        self.format_errors = []     # 1-based record numbers
+        self.errors = []            # file-level problems
+        self.checksum_error_count = 0
+        self.format_error_count = 0
+        self.overlaps = 0
+        self.eof = False
+        self.start_address = None
+        self.crc32 = 0
+
+    def ok(self):
+        return (self.eof and not self.errors and not self.checksum_error_count
+                and not self.format_error_count and not self.overlaps)
+
+    def read(self, address, length):
+        # Bytes at [address, address + length) from one range
+        position = bisect.bisect_right([start for start, size in self.ranges], address) - 1
+        if position < 0:
+            raise KeyError(f"Address 0x{address:08X} is not in the image")
+        start, size = self.ranges[position]
+        if address + length > start + size:
+            raise KeyError(f"Range 0x{address:08X}+{length} is not contiguous in the image")
+        offset = self.offsets[position] + address - start
+        return bytes(self.data[offset:offset + length])
+
+    def range_crcs(self):
+        return [zlib.crc32(self.data[offset:offset + size])
+                for (start, size), offset in zip(self.ranges, self.offsets)]
+
+    def summary(self):
+        lines = [f"{self.name}: {'OK' if self.ok() else 'FAILED'} - {self.record_count} records, "
+                 f"{len(self.data)} bytes in {len(self.ranges)} range(s), CRC32 0x{self.crc32:08X}"]
+        for (start, size), crc in list(zip(self.ranges, self.range_crcs()))[:5]:
+            lines.append(f"  0x{start:08X}-0x{start + size - 1:08X} ({size} bytes) CRC32 0x{crc:08X}")
+        if len(self.ranges) > 5:
+            lines.append(f"  ... {len(self.ranges) - 5} more range(s)")
+        if self.start_address is not None:
+            lines.append(f"  start address 0x{self.start_address:08X}")
+        if self.checksum_error_count:
+            lines.append(f"  {self.checksum_error_count} checksum error(s), records "
+                         f"{', '.join(map(str, self.checksum_errors))}")
+        if self.format_error_count:
+            lines.append(f"  {self.format_error_count} malformed record(s), records "
+                         f"{', '.join(map(str, self.format_errors))}")
+        if self.overlaps:
+            lines.append(f"  {self.overlaps} overlapping record(s)")
+        if not self.eof:
+            lines.append("  missing end-of-file record")
+        lines.extend(f"  {error}" for error in self.errors)
+        return '\n'.join(lines)
+
+# =========================
+# Parser
+# =========================
+def parse_hex_file(path):
+    image = HexImage(path)
+    image.file_size = os.path.getsize(path)
+    if image.file_size == 0:
+        image.errors.append('empty file')
+        return image
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        buffer = np.frombuffer(mapped, dtype=np.uint8)
+        try:
+            parse_buffer(image, buffer)
+        finally:
+            # The mmap cannot close while numpy still references it
+            del buffer
+    return image
+
+def parse_buffer(image, buffer):
+    colons = np.flatnonzero(buffer == ord(':'))
+    if len(colons) == 0:
+        image.errors.append('no records found')
+        return
+
+    chunks = [decode_chunk(buffer, colons, start, min(start + RECORD_CHUNK, len(colons)))
+              for start in range(0, len(colons), RECORD_CHUNK)]
+    lengths = np.concatenate([chunk['lengths'] for chunk in chunks])
+    addresses = np.concatenate([chunk['addresses'] for chunk in chunks]).astype(np.int64)
+    types = np.concatenate([chunk['types'] for chunk in chunks])
+    well_formed = np.concatenate([chunk['well_formed'] for chunk in chunks])
+    checksum_ok = np.concatenate([chunk['checksum_ok'] for chunk in chunks])
+    values = np.concatenate([chunk['values'] for chunk in chunks]).astype(np.int64)
+    data = np.concatenate([chunk['data'] for chunk in chunks])
+    image.record_count = len(colons)
+
+    bad_format = np.flatnonzero(~well_formed)
+    bad_checksum = np.flatnonzero(well_formed & ~checksum_ok)
+    image.format_error_count = len(bad_format)
+    image.checksum_error_count = len(bad_checksum)
+    image.format_errors = (bad_format[:MAX_REPORTED] + 1).tolist()
+    image.checksum_errors = (bad_checksum[:MAX_REPORTED] + 1).tolist()
+    good = well_formed & checksum_ok
+
+    # Records after the end-of-file record are ignored
+    eof = np.flatnonzero(good & (types == END_OF_FILE))
+    if len(eof):
+        image.eof = True
+        if eof[0] + 1 < len(colons):
+            image.errors.append(f"{len(colons) - eof[0] - 1} record(s) after end-of-file ignored")
+            good[eof[0] + 1:] = False
+
+    # Upper address bits from the last extended address record before each record
+    base_values = np.where(types == EXTENDED_LINEAR, values << 16, values << 4)
+    setters = good & ((types == EXTENDED_LINEAR) | (types == EXTENDED_SEGMENT))
+    last_setter = np.maximum.accumulate(np.where(setters, np.arange(len(types)), -1))
+    bases = np.where(last_setter >= 0, base_values[np.maximum(last_setter, 0)], 0)
+
+    starts = np.flatnonzero(good & ((types == START_LINEAR) | (types == START_SEGMENT)))
+    if len(starts):
+        image.start_address = int(values[starts[-1]])
+
+    # Data bytes were decoded for every well-formed data record; keep the good ones
+    is_data = well_formed & (types == DATA)
+    keep = good[is_data]
+    data_lengths = lengths[is_data].astype(np.int64)
+    if not keep.all():
+        data = data[np.repeat(keep, data_lengths)]
+        data_lengths = data_lengths[keep]
+    record_addresses = (bases + addresses)[good & (types == DATA)]
+    image.data_records = len(record_addresses)
+    if not image.data_records:
+        return
+
+    # Lay the records out in address order
+    if np.any(record_addresses[1:] < record_addresses[:-1]):
+        order = np.argsort(record_addresses, kind='stable')
+        offsets = np.cumsum(data_lengths) - data_lengths
+        sorted_lengths = data_lengths[order]
+        within = np.arange(len(data)) - np.repeat(np.cumsum(sorted_lengths) - sorted_lengths, sorted_lengths)
+        data = data[np.repeat(offsets[order], sorted_lengths) + within]
+        record_addresses = record_addresses[order]
+        data_lengths = data_lengths[order]
+
+    ends = record_addresses + data_lengths
+    image.overlaps = int(np.count_nonzero(record_addresses[1:] < ends[:-1]))
+    breaks = np.concatenate(([0], np.flatnonzero(record_addresses[1:] != ends[:-1]) + 1))
+    sizes = np.add.reduceat(data_lengths, breaks)
+    image.ranges = list(zip(record_addresses[breaks].tolist(), sizes.tolist()))
+    image.offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).tolist()
+    image.data = bytearray(data.tobytes())
+    image.crc32 = zlib.crc32(image.data)
+
+def decode_chunk(buffer, colons, first, last):
+    # Decode records first..last-1 as 2-D arrays of hex digits (one row per
+    # record), so every check below is a column operation. Runs of equally
+    # spaced records of the same length, the usual layout, are a reshaped
+    # view of the file; the rest are gathered by index.
+    low = colons[first]
+    high = colons[last] if last < len(colons) else len(buffer)
+    chunk = buffer[low:high]
+    record_starts = colons[first:last] - low
+    next_starts = np.append(record_starts[1:], len(chunk))
+    count = len(record_starts)
+
+    # The byte count field decides how long each record should be
+    has_header = record_starts + 11 <= next_starts
+    header_at = np.where(has_header, record_starts, 0)
+    count_digits = HEX_VALUES[chunk[np.minimum(header_at[:, None] + (1, 2), len(chunk) - 1)]]
+    lengths = np.where(has_header, (count_digits[:, 0] << 4) | (count_digits[:, 1] & 0x0F), 0)
+    lengths = lengths.astype(np.int64)
+    fits = has_header & (record_starts + 11 + 2 * lengths <= next_starts)
+
+    decoded = {
+        'lengths': lengths,
+        'well_formed': np.zeros(count, dtype=bool),
+        'checksum_ok': np.zeros(count, dtype=bool),
+        'types': np.full(count, 255, dtype=np.uint8),
+        'addresses': np.zeros(count, dtype=np.int64),
+        'values': np.zeros(count, dtype=np.int64),
+    }
+    parts = []
+
+    # Runs: consecutive records sharing spacing and length
+    strides = next_starts - record_starts
+    change = np.flatnonzero((strides[1:] != strides[:-1]) | (lengths[1:] != lengths[:-1])
+                            | (fits[1:] != fits[:-1])) + 1
+    run_starts = np.concatenate(([0], change))
+    run_ends = np.append(change, count)
+    gathered = np.zeros(count, dtype=bool)
+    for begin, end in zip(run_starts.tolist(), run_ends.tolist()):
+        if not fits[begin]:
+            continue
+        if end - begin < MIN_RUN:
+            gathered[begin:end] = True
+            continue
+        stride = int(strides[begin])
+        length = int(lengths[begin])
+        offset = int(record_starts[begin])
+        # The last record of a chunk may be followed by fewer bytes than the stride
+        lines = chunk[offset:offset + (end - begin - 1) * stride].reshape(-1, stride)
+        digits = np.empty((end - begin, 2 * (length + 5)), dtype=np.uint8)
+        digits[:-1] = HEX_VALUES[lines[:, 1:1 + digits.shape[1]]]
+        tail = int(record_starts[end - 1]) + 1
+        digits[-1] = HEX_VALUES[chunk[tail:tail + digits.shape[1]]]
+        decode_rows(decoded, parts, np.arange(begin, end), digits, length)
+
+    for length in np.unique(lengths[gathered]).tolist():
+        rows = np.flatnonzero(gathered & (lengths == length))
+        digits = HEX_VALUES[chunk[record_starts[rows][:, None] + 1 + np.arange(2 * (length + 5))]]
+        decode_rows(decoded, parts, rows, digits, length)
+
+    # Data bytes of every well-formed data record, in file order
+    parts.sort(key=lambda part: part[0][0])
+    record_lengths = np.zeros(count, dtype=np.int64)
+    for rows, part in parts:
+        record_lengths[rows] = part.shape[1]
+    in_order = all(earlier[0][-1] < later[0][0] for earlier, later in zip(parts, parts[1:]))
+    if not parts:
+        data = np.zeros(0, dtype=np.uint8)
+    elif in_order:
+        data = np.concatenate([part.ravel() for rows, part in parts])
+    else:
+        offsets = np.cumsum(record_lengths) - record_lengths
+        data = np.empty(int(record_lengths.sum()), dtype=np.uint8)
+        for rows, part in parts:
+            data[(offsets[rows][:, None] + np.arange(part.shape[1])).ravel()] = part.ravel()
+    decoded['data'] = data
+    return decoded
+
+def decode_rows(decoded, parts, rows, digits, length):
+    valid = (digits != 255).all(axis=1)
+    # Byte count, address (2), type, data, checksum
+    fields = (digits[:, 0::2] << 4) | (digits[:, 1::2] & 0x0F)
+    decoded['well_formed'][rows] = valid
+    decoded['checksum_ok'][rows] = (fields.sum(axis=1, dtype=np.uint32) & 0xFF) == 0
+    decoded['types'][rows] = fields[:, 3]
+    decoded['addresses'][rows] = (fields[:, 1].astype(np.int64) << 8) | fields[:, 2]
+    # Value of address/start records (first 2 or 4 data bytes, big endian)
+    value = np.zeros(len(rows), dtype=np.int64)
+    for i in range(min(length, 4)):
+        value = (value << 8) | fields[:, 4 + i]
+    decoded['values'][rows] = value
+    is_data = valid & (fields[:, 3] == DATA)
+    if length and is_data.any():
+        parts.append((rows[is_data], fields[is_data, 4:4 + length]))
+
+# =========================
+# Multiple files
+# =========================
+def verify_hex_file(path):
+    # Summary only, so results are cheap to send back from a worker process
+    try:
+        image = parse_hex_file(path)
+    except (OSError, ValueError) as e:
+        return {'path': path, 'ok': False, 'crc32': None, 'size': 0, 'summary': f"{os.path.basename(path)}: {e}"}
+    return {'path': path, 'ok': image.ok(), 'crc32': image.crc32, 'size': len(image.data),
+            'summary': image.summary()}
+
+def create_pool(max_workers=None):
+    # 'spawn' keeps workers clear of the parent's threads (Qt, executors)
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+def verify_hex_files(paths, pool=None, max_workers=None):
+    paths = list(paths)
+    if pool is not None:
+        return list(pool.map(verify_hex_file, paths))
+    if len(paths) <= 1:
+        return [verify_hex_file(path) for path in paths]
+    with create_pool(max_workers) as own_pool:
+        return list(own_pool.map(verify_hex_file, paths))
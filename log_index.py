@@ -0,0 +1,525 @@
+import os
+import csv
+import sys
+import glob
+import json
+import time
+import bisect
+import argparse
+import calendar
+import threading
+from collections import defaultdict
+
+import numpy as np
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit,
+                             QComboBox, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView)
+
+# =========================
+# Config
+# =========================
+INDEX_PATH = 'log_index'        # directory holding the column files
+# CSV base name -> log kind; rotated files (<base>.<stamp>.csv) are included
+LOG_FILES = {'logfile': 'login', 'leaf_events': 'leaf', 'non_leaf_events': 'non_leaf'}
+READ_CHUNK = 16 * 1024 * 1024   # bytes parsed per batch
+ROW_LIMIT = 1000                # rows returned by a listing query
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DAY = 86400
+# One file per column; every column except ts holds ids into names.txt,
+# a JSON string per line (0 = none)
+COLUMNS = (('ts', np.int64), ('log', np.uint32), ('user', np.uint32), ('plane', np.uint32),
+           ('node', np.uint32), ('event', np.uint32))
+GROUP_COLUMNS = ('log', 'user', 'plane', 'node', 'event', 'day')
+
+# Log timestamps are local wall-clock strings; they are stored as seconds
+# using a fixed (UTC) calendar so ordering and day boundaries match the text
+def parse_time(text):
+    try:
+        return calendar.timegm((int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                                int(text[11:13]), int(text[14:16]), int(text[17:19])))
+    except (ValueError, IndexError):
+        return None
+
+def format_time(seconds):
+    return time.strftime(TIME_FORMAT, time.gmtime(seconds))
+
+def log_kind(path):
+    base = os.path.basename(path).split('.')[0]
+    return LOG_FILES.get(base)
+
+# =========================
+# Index
+# =========================
+# Columnar index over the CSV logs: one binary file per column, appended to
+# by update(), which reads only the bytes added since the previous run.
+# Sources are tracked by device and inode, so a file renamed by log rotation
+# keeps its progress. state.json records the committed row count and is
+# replaced last, so an interrupted update is rolled back on the next run.
+#
+# Queries load the columns with numpy and filter with vectorized masks, so
+# their cost grows with the row count but stays far below a second for tens
+# of millions of rows. Event logs carry no plane; each event gets the plane
+# of the user's most recent login before it.
+class LogIndex:
+    def __init__(self, path=INDEX_PATH, directory='.'):
+        self.path = path
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.names = ['']              # id -> name; id 0 is "none"
+        self.ids = {}
+        self.columns = None            # loaded column arrays, dropped after updates
+        os.makedirs(path, exist_ok=True)
+        self.load_state()
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def load_state(self):
+        try:
+            with open(self.file('state.json'), encoding='utf-8') as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            self.state = {'rows': 0, 'names': 0, 'names_size': 0, 'sources': {}}
+        names = []
+        if self.state['names']:
+            with open(self.file('names.txt'), encoding='utf-8', newline='\n') as f:
+                for line in f:
+                    names.append(json.loads(line))
+                    if len(names) == self.state['names']:
+                        break
+        self.names = [''] + names
+        self.ids = {name: i for i, name in enumerate(self.names) if i}
+
+    def name_id(self, value, new_names):
+        if not value:
+            return 0
+        name_id = self.ids.get(value)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(value)
+            self.ids[value] = name_id
+            new_names.append(value)
+        return name_id
+
+    # ---- indexing ----
+    def sources(self):
+        found = []
+        for base, kind in LOG_FILES.items():
+            paths = glob.glob(os.path.join(self.directory, f'{base}.csv'))
+            paths += glob.glob(os.path.join(self.directory, f'{base}.*.csv'))
+            # Logins first, so events can be matched to the plane logged in to
+            found.extend((kind != 'login', os.path.getmtime(path), path) for path in paths)
+        return [path for _, _, path in sorted(found)]
+
+    def update(self):
+        # Returns the number of new rows indexed
+        with self.lock:
+            rows = self.state['rows']
+            # Drop anything written after the last committed state
+            for name, dtype in COLUMNS:
+                with open(self.file(f'{name}.bin'), 'ab') as f:
+                    f.truncate(rows * np.dtype(dtype).itemsize)
+            with open(self.file('names.txt'), 'ab') as f:
+                f.truncate(self.state['names_size'])
+            logins = self.login_history()
+            total = 0
+            try:
+                for path in self.sources():
+                    total += self.update_source(path, logins)
+            except Exception:
+                # Back to the last committed state; the next update retries
+                self.load_state()
+                raise
+            finally:
+                if total:
+                    self.columns = None
+            return total
+
+    def login_history(self):
+        # user id -> (sorted login times, plane id of each login)
+        logins = defaultdict(lambda: ([], []))
+        login_id = self.ids.get('login')
+        columns = self.load_columns()
+        if login_id is None or not len(columns['ts']):
+            return logins
+        mask = (columns['log'] == login_id) & (columns['plane'] != 0)
+        order = np.argsort(columns['ts'][mask], kind='stable')
+        for ts, user, plane in zip(columns['ts'][mask][order].tolist(), columns['user'][mask][order].tolist(),
+                                   columns['plane'][mask][order].tolist()):
+            times, planes = logins[user]
+            times.append(ts)
+            planes.append(plane)
+        return logins
+
+    def update_source(self, path, logins):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return 0
+        key = f'{stat.st_dev}:{stat.st_ino}'
+        source = self.state['sources'].get(key, {'offset': 0, 'header': None})
+        offset, header = source['offset'], source['header']
+        if stat.st_size < offset:
+            # Truncated or replaced in place; index it again from the start
+            offset, header = 0, None
+        if stat.st_size == offset:
+            source['path'] = path
+            return 0
+
+        kind = log_kind(path)
+        total = 0
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            pending = b''
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                data = pending + chunk
+                end = data.rfind(b'\n') + 1
+                # A partly written last line is left for the next run
+                pending = data[end:]
+                if not end:
+                    continue
+                lines = data[:end].decode('utf-8', errors='replace').splitlines()
+                if header is None:
+                    header = lines.pop(0)
+                total += self.append_rows(kind, header, csv.reader(lines), logins)
+                offset += end
+                self.state['sources'][key] = {'path': path, 'offset': offset, 'header': header}
+                self.save_state()
+        return total
+
+    def append_rows(self, kind, header, rows, logins):
+        columns = {name: i for i, name in enumerate(next(csv.reader([header])))}
+        ts_col = columns.get('Timestamp', 0)
+        user_col = columns.get('Username', 1)
+        plane_col = columns.get('Plane')
+        node_col = columns.get('Node')
+        event_col = columns.get('Event', columns.get('Status'))
+        new_names = []
+        log_id = self.name_id(kind, new_names)
+        is_login = kind == 'login'
+
+        values = {name: [] for name, dtype in COLUMNS}
+        ts_values, user_values, plane_values = values['ts'], values['user'], values['plane']
+        node_values, event_values = values['node'], values['event']
+        last_text = last_ts = None
+        for row in rows:
+            try:
+                text = row[ts_col]
+                if text != last_text:
+                    last_text, last_ts = text, parse_time(text)
+                if last_ts is None:
+                    continue
+                user = self.name_id(row[user_col], new_names)
+                node = self.name_id(row[node_col], new_names) if node_col is not None else 0
+                event = self.name_id(row[event_col], new_names) if event_col is not None else 0
+                if is_login:
+                    plane = self.name_id(row[plane_col], new_names) if plane_col is not None else 0
+                    if plane:
+                        times, planes = logins[user]
+                        position = bisect.bisect_right(times, last_ts)
+                        times.insert(position, last_ts)
+                        planes.insert(position, plane)
+                else:
+                    times, planes = logins.get(user, ((), ()))
+                    position = bisect.bisect_right(times, last_ts)
+                    plane = planes[position - 1] if position else 0
+            except IndexError:
+                continue
+            ts_values.append(last_ts)
+            user_values.append(user)
+            plane_values.append(plane)
+            node_values.append(node)
+            event_values.append(event)
+        values['log'] = [log_id] * len(ts_values)
+
+        if new_names:
+            with open(self.file('names.txt'), 'ab') as f:
+                f.write(''.join(json.dumps(name) + '\n' for name in new_names).encode('utf-8'))
+                self.state['names_size'] = f.tell()
+        for name, dtype in COLUMNS:
+            with open(self.file(f'{name}.bin'), 'ab') as f:
+                np.asarray(values[name], dtype=dtype).tofile(f)
+        self.state['rows'] += len(ts_values)
+        self.state['names'] = len(self.names) - 1
+        return len(ts_values)
+
+    def save_state(self):
+        temp = self.file('state.json.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(temp, self.file('state.json'))
+
+    # ---- queries ----
+    def load_columns(self):
+        columns = self.columns
+        if columns is None:
+            rows = self.state['rows']
+            columns = {}
+            for name, dtype in COLUMNS:
+                path = self.file(f'{name}.bin')
+                if rows and os.path.exists(path):
+                    columns[name] = np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+                else:
+                    columns[name] = np.zeros(0, dtype=dtype)
+            self.columns = columns
+        return columns
+
+    def match_ids(self, value, exact):
+        if exact:
+            name_id = self.ids.get(value)
+            return [name_id] if name_id is not None else []
+        value = value.lower()
+        return [i for i, name in enumerate(self.names) if i and value in name.lower()]
+
+    def mask(self, columns, start=None, end=None, user=None, plane=None, log=None, node=None, event=None):
+        # Boolean row mask for the filters, or None for "every row". user,
+        # plane and log match exactly; node and event match substrings,
+        # ignoring case.
+        mask = None
+
+        def combine(condition):
+            return condition if mask is None else mask & condition
+
+        if start is not None:
+            mask = combine(columns['ts'] >= start)
+        if end is not None:
+            mask = combine(columns['ts'] < end)
+        for column, value, exact in (('user', user, True), ('plane', plane, True), ('log', log, True),
+                                     ('node', node, False), ('event', event, False)):
+            if not value:
+                continue
+            ids = self.match_ids(value, exact)
+            if len(ids) == 1:
+                mask = combine(columns[column] == ids[0])
+            else:
+                mask = combine(np.isin(columns[column], np.asarray(ids, dtype=np.uint32)))
+        return mask
+
+    def rows(self, limit=ROW_LIMIT, **filters):
+        # Matching events, newest first: (time, log, user, plane, node, event)
+        columns = self.load_columns()
+        mask = self.mask(columns, **filters)
+        found = np.flatnonzero(mask) if mask is not None else np.arange(len(columns['ts']))
+        if len(found) > limit:
+            newest = np.argpartition(columns['ts'][found], len(found) - limit)[len(found) - limit:]
+            found = found[newest]
+        found = found[np.argsort(columns['ts'][found], kind='stable')[::-1]]
+        names = self.names
+        result = []
+        for i in found.tolist():
+            result.append((format_time(int(columns['ts'][i])),) +
+                          tuple(names[int(columns[name][i])] for name in ('log', 'user', 'plane', 'node', 'event')))
+        return result
+
+    def count(self, **filters):
+        columns = self.load_columns()
+        mask = self.mask(columns, **filters)
+        return int(np.count_nonzero(mask)) if mask is not None else len(columns['ts'])
+
+    def aggregate(self, group_by, **filters):
+        # [(group value, count)], largest first; days in date order
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Unknown group: {group_by}")
+        columns = self.load_columns()
+        mask = self.mask(columns, **filters)
+        if group_by == 'day':
+            ts = columns['ts'][mask] if mask is not None else columns['ts']
+            days, counts = np.unique(ts // DAY, return_counts=True)
+            labels = [time.strftime('%Y-%m-%d', time.gmtime(int(day) * DAY)) for day in days.tolist()]
+            return list(zip(labels, counts.tolist()))
+        else:
+            values = columns[group_by][mask] if mask is not None else columns[group_by]
+            counts = np.bincount(values, minlength=1)
+            ids = np.flatnonzero(counts)
+            counts = counts[ids]
+            labels = [self.names[i] if i else '(none)' for i in ids.tolist()]
+        return sorted(zip(labels, counts.tolist()), key=lambda item: (-item[1], item[0]))
+
+    def values(self, column):
+        # Distinct names seen in a column, for filter drop-downs
+        values = self.load_columns()[column]
+        if not len(values):
+            return []
+        return sorted(self.names[i] for i in np.flatnonzero(np.bincount(values)).tolist() if i)
+
+# =========================
+# Query window
+# =========================
+# Filters and group-by over the index. Each query first indexes new log rows;
+# both run on a background thread and the result comes back by signal.
+class LogQueryDialog(QDialog):
+    results_ready = pyqtSignal(object)
+    GROUPS = ['(rows)', 'user', 'node', 'plane', 'event', 'day', 'log']
+
+    def __init__(self, index, before_update=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Event Log Query')
+        self.resize(1000, 600)
+        self.index = index
+        self.before_update = before_update
+        self.busy = False
+
+        form = QGridLayout()
+        self.since_input = QLineEdit()
+        self.since_input.setPlaceholderText('YYYY-mm-dd [HH:MM:SS]')
+        self.until_input = QLineEdit()
+        self.until_input.setPlaceholderText('YYYY-mm-dd [HH:MM:SS] (exclusive)')
+        self.user_combo = QComboBox()
+        self.user_combo.setEditable(True)
+        self.plane_combo = QComboBox()
+        self.plane_combo.setEditable(True)
+        self.node_input = QLineEdit()
+        self.node_input.setPlaceholderText('part of the node name')
+        self.event_input = QLineEdit()
+        self.event_input.setPlaceholderText('part of the event or status')
+        self.group_combo = QComboBox()
+        self.group_combo.addItems(self.GROUPS)
+        for row, (label, widget) in enumerate((('From:', self.since_input), ('To:', self.until_input),
+                                               ('User:', self.user_combo), ('Plane:', self.plane_combo))):
+            form.addWidget(QLabel(label), row, 0)
+            form.addWidget(widget, row, 1)
+        for row, (label, widget) in enumerate((('Node:', self.node_input), ('Event:', self.event_input),
+                                               ('Group by:', self.group_combo))):
+            form.addWidget(QLabel(label), row, 2)
+            form.addWidget(widget, row, 3)
+
+        buttons = QHBoxLayout()
+        self.run_button = QPushButton('Run Query')
+        self.run_button.clicked.connect(self.run_query)
+        buttons.addStretch(1)
+        buttons.addWidget(self.run_button)
+
+        self.status = QLabel('')
+        self.table = QTableWidget(0, 0)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+
+        layout = QVBoxLayout()
+        layout.addLayout(form)
+        layout.addLayout(buttons)
+        layout.addWidget(self.status)
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+        self.results_ready.connect(self.show_results)
+
+    def filters(self):
+        return {'start': parse_time_text(self.since_input.text()),
+                'end': parse_time_text(self.until_input.text()),
+                'user': self.user_combo.currentText().strip(),
+                'plane': self.plane_combo.currentText().strip(),
+                'node': self.node_input.text().strip(),
+                'event': self.event_input.text().strip()}
+
+    def run_query(self):
+        if self.busy:
+            return
+        try:
+            filters = self.filters()
+        except ValueError as e:
+            self.status.setText(str(e))
+            return
+        group = self.group_combo.currentText()
+        group = None if group == '(rows)' else group
+        self.busy = True
+        self.run_button.setEnabled(False)
+        self.status.setText('Indexing new log rows...')
+        threading.Thread(target=self.query, args=(filters, group), name='LogQuery', daemon=True).start()
+
+    def query(self, filters, group):
+        try:
+            if self.before_update is not None:
+                self.before_update()
+            added = self.index.update()
+            start = time.perf_counter()
+            if group:
+                headers = [group.capitalize(), 'Count']
+                rows = [(value, str(count)) for value, count in self.index.aggregate(group, **filters)]
+            else:
+                headers = ['Timestamp', 'Log', 'Username', 'Plane', 'Node', 'Event']
+                rows = self.index.rows(**filters)
+            elapsed = time.perf_counter() - start
+            choices = (self.index.values('user'), self.index.values('plane'))
+            self.results_ready.emit((headers, rows, added, elapsed, choices, None))
+        except Exception as e:
+            self.results_ready.emit(([], [], 0, 0.0, None, str(e)))
+
+    def show_results(self, result):
+        headers, rows, added, elapsed, choices, error = result
+        self.busy = False
+        self.run_button.setEnabled(True)
+        if error is not None:
+            self.status.setText(f'Query error: {error}')
+            return
+        self.table.clear()
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                self.table.setItem(r, c, QTableWidgetItem(value))
+        self.table.horizontalHeader().setSectionResizeMode(len(headers) - 1, QHeaderView.Stretch)
+        limit = f' (first {ROW_LIMIT})' if len(rows) >= ROW_LIMIT else ''
+        self.status.setText(f'{len(rows)} result(s){limit} in {elapsed * 1000:.1f} ms; '
+                            f'{added} new log row(s) indexed')
+        for combo, values in zip((self.user_combo, self.plane_combo), choices):
+            text = combo.currentText()
+            combo.clear()
+            combo.addItems([''] + values)
+            combo.setCurrentText(text)
+
+def parse_time_text(text):
+    # '' -> None; 'YYYY-mm-dd' or 'YYYY-mm-dd HH:MM:SS' -> seconds
+    text = text.strip()
+    if not text:
+        return None
+    value = parse_time(text if len(text) > 10 else text + ' 00:00:00')
+    if value is None:
+        raise ValueError(f"Bad time '{text}', expected YYYY-mm-dd [HH:MM:SS]")
+    return value
+
+# =========================
+# Command line
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description='Query the login and node event logs')
+    parser.add_argument('--directory', default='.')
+    parser.add_argument('--index', default=INDEX_PATH)
+    parser.add_argument('--no-update', action='store_true', help='query without indexing new rows')
+    parser.add_argument('--since', help="'YYYY-mm-dd [HH:MM:SS]', inclusive")
+    parser.add_argument('--until', help="'YYYY-mm-dd [HH:MM:SS]', exclusive")
+    parser.add_argument('--user')
+    parser.add_argument('--plane')
+    parser.add_argument('--node', help='substring of the node name')
+    parser.add_argument('--event', help='substring of the event or login status')
+    parser.add_argument('--log', choices=sorted(LOG_FILES.values()))
+    parser.add_argument('--group-by', choices=GROUP_COLUMNS)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    index = LogIndex(args.index, args.directory)
+    if not args.no_update:
+        start = time.perf_counter()
+        added = index.update()
+        print(f"Indexed {added} new row(s) in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+
+    try:
+        since, until = parse_time_text(args.since or ''), parse_time_text(args.until or '')
+    except ValueError as e:
+        parser.error(str(e))
+    filters = {'start': since, 'end': until, 'user': args.user,
+               'plane': args.plane, 'node': args.node, 'event': args.event, 'log': args.log}
+    start = time.perf_counter()
+    if args.group_by:
+        for value, count in index.aggregate(args.group_by, **filters)[:args.limit]:
+            print(f"{count:10d}  {value}")
+    else:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(['Timestamp', 'Log', 'Username', 'Plane', 'Node', 'Event'])
+        writer.writerows(index.rows(limit=args.limit, **filters))
+    print(f"Query took {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
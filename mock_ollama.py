@@ -0,0 +1,288 @@
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# =========================
+# Config
+# =========================
+MOCK_PORT = 11435              # next to Ollama's 11434, so both can run
+LOAD_DELAY = 2.0               # seconds to "load" a model that is not in memory
+PROMPT_TOKEN_DELAY = 0.0005    # seconds per prompt token evaluated
+FIRST_TOKEN_DELAY = 0.05       # extra seconds before the first reply token
+TOKEN_DELAY = 0.02             # seconds per generated token
+REPLY_TOKENS = 60              # tokens per reply, unless num_predict is smaller
+JITTER = 0.1                   # +- share of random variation on every delay
+NUM_PARALLEL = 1               # requests a model generates at once (OLLAMA_NUM_PARALLEL)
+MAX_QUEUE = 512                # waiting requests before 503 (OLLAMA_MAX_QUEUE)
+ERROR_RATE = 0.0               # share of requests answered with a 500
+KEEP_ALIVE = 300               # seconds a model stays loaded by default
+EMBED_DIM = 64
+CHARS_PER_TOKEN = 4
+
+WORDS = ("the model streams this reply one token at a time so the client can show "
+         "text before the answer is complete while the server keeps generating").split()
+
+def duration_seconds(value):
+    # Ollama's keep_alive: seconds, -1 for ever, or "5m" / "1h" / "30s"
+    if value is None:
+        return KEEP_ALIVE
+    if isinstance(value, str):
+        units = {'s': 1, 'm': 60, 'h': 3600}
+        if value[-1:] in units:
+            return float(value[:-1]) * units[value[-1]]
+        value = float(value)
+    return float('inf') if value < 0 else float(value)
+
+# =========================
+# Mock server
+# =========================
+# Answers /api/generate (streamed and blocking), /api/embed, /api/ps and
+# /api/tags the way Ollama does, with delays instead of a model: loading a
+# model, evaluating the prompt and generating each token all take time set
+# by the Config values (or the matching constructor arguments). Each model
+# generates NUM_PARALLEL requests at once and queues the rest; past
+# MAX_QUEUE waiting requests it answers 503 right away, as Ollama does.
+# Replies carry Ollama's counters and a context array, so conversation.py
+# and the metrics code work against it unchanged.
+class MockOllama:
+    def __init__(self, load_delay=LOAD_DELAY, prompt_token_delay=PROMPT_TOKEN_DELAY,
+                 first_token_delay=FIRST_TOKEN_DELAY, token_delay=TOKEN_DELAY, reply_tokens=REPLY_TOKENS,
+                 jitter=JITTER, num_parallel=NUM_PARALLEL, max_queue=MAX_QUEUE, error_rate=ERROR_RATE, seed=None):
+        self.load_delay = load_delay
+        self.prompt_token_delay = prompt_token_delay
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.reply_tokens = reply_tokens
+        self.jitter = jitter
+        self.num_parallel = num_parallel
+        self.max_queue = max_queue
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.loaded = {}           # model -> expiry (monotonic seconds)
+        self.slots = {}            # model -> semaphore of NUM_PARALLEL
+        self.loading = {}          # model -> lock held while it loads
+        self.waiting = 0
+        self.requests = 0
+
+    def delay(self, seconds):
+        if seconds > 0:
+            with self.lock:
+                factor = 1 + self.random.uniform(-self.jitter, self.jitter)
+            time.sleep(seconds * factor)
+
+    def fail(self):
+        with self.lock:
+            self.requests += 1
+            return self.random.random() < self.error_rate
+
+    def acquire(self, model):
+        # Waits for a generation slot of `model`; None when the queue is full
+        with self.lock:
+            slot = self.slots.setdefault(model, threading.BoundedSemaphore(self.num_parallel))
+            if slot.acquire(blocking=False):
+                return slot
+            if self.waiting >= self.max_queue:
+                return None
+            self.waiting += 1
+        slot.acquire()
+        with self.lock:
+            self.waiting -= 1
+        return slot
+
+    def ensure_loaded(self, model, keep_alive):
+        # Seconds spent loading; keep_alive 0 unloads instead
+        seconds = duration_seconds(keep_alive)
+        with self.lock:
+            loader = self.loading.setdefault(model, threading.Lock())
+        start = time.perf_counter()
+        with loader:
+            with self.lock:
+                present = self.loaded.get(model, 0) > time.monotonic()
+            if seconds == 0:
+                with self.lock:
+                    self.loaded.pop(model, None)
+                return 0.0
+            if not present:
+                self.delay(self.load_delay)
+            with self.lock:
+                self.loaded[model] = time.monotonic() + seconds
+        return time.perf_counter() - start
+
+    def running(self):
+        now = time.monotonic()
+        with self.lock:
+            return [{'name': model, 'model': model,
+                     'expires_at': 'never' if expiry == float('inf') else f'in {expiry - now:.0f}s'}
+                    for model, expiry in self.loaded.items() if expiry > now]
+
+    def reply(self, body):
+        # Yields (piece, final or None) for a generate request, sleeping as it goes
+        start = time.perf_counter()
+        model = body['model']
+        load = self.ensure_loaded(model, body.get('keep_alive'))
+        context = list(body.get('context') or [])
+        prompt = body.get('prompt', '')
+        prompt_tokens = max(1, len(prompt) // CHARS_PER_TOKEN)
+        prompt_start = time.perf_counter()
+        self.delay(prompt_tokens * self.prompt_token_delay)
+        prompt_seconds = time.perf_counter() - prompt_start
+        count = self.reply_tokens
+        limit = (body.get('options') or {}).get('num_predict')
+        if limit is not None and limit >= 0:
+            count = min(count, limit)
+        self.delay(self.first_token_delay)
+        eval_start = time.perf_counter()
+        for i in range(count):
+            self.delay(self.token_delay)
+            yield WORDS[(len(context) + i) % len(WORDS)] + ' ', None
+        eval_seconds = time.perf_counter() - eval_start
+        final = {'model': model, 'response': '', 'done': True,
+                 'done_reason': 'length' if count < self.reply_tokens else 'stop',
+                 'context': context + [1] * (prompt_tokens + count),
+                 'total_duration': int((time.perf_counter() - start) * 1e9), 'load_duration': int(load * 1e9),
+                 'prompt_eval_count': prompt_tokens, 'prompt_eval_duration': int(prompt_seconds * 1e9),
+                 'eval_count': count, 'eval_duration': int(eval_seconds * 1e9)}
+        yield '', final
+
+    def embedding(self, text):
+        # Deterministic unit vector, so equal texts embed equally
+        rng = random.Random(zlib.crc32(text.encode('utf-8')))
+        vector = [rng.gauss(0, 1) for _ in range(EMBED_DIM)]
+        norm = sum(value * value for value in vector) ** 0.5
+        return [value / norm for value in vector]
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # A client closing an idle keep-alive connection
+            pass
+
+    def send_json(self, obj, status=200):
+        data = json.dumps(obj).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_chunk(self, obj):
+        line = (json.dumps(obj) + '\n').encode('utf-8')
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+        self.wfile.flush()
+
+    def do_GET(self):
+        mock = self.server.mock
+        if self.path == '/api/ps':
+            self.send_json({'models': mock.running()})
+        elif self.path == '/api/tags':
+            self.send_json({'models': [{'name': model, 'model': model} for model in mock.slots]})
+        elif self.path == '/':
+            self.send_json('Ollama is running')
+        else:
+            self.send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        mock = self.server.mock
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError:
+            return self.send_json({'error': 'invalid JSON'}, 400)
+        if self.path == '/api/embed':
+            texts = body.get('input', '')
+            texts = [texts] if isinstance(texts, str) else texts
+            return self.send_json({'model': body.get('model'), 'embeddings': [mock.embedding(t) for t in texts]})
+        if self.path != '/api/generate':
+            return self.send_json({'error': 'not found'}, 404)
+        if not body.get('model'):
+            return self.send_json({'error': 'model is required'}, 400)
+        if mock.fail():
+            return self.send_json({'error': 'mock failure'}, 500)
+        if 'prompt' not in body:
+            # Load or unload only, like Ollama's empty generate
+            unload = duration_seconds(body.get('keep_alive')) == 0
+            mock.ensure_loaded(body['model'], body.get('keep_alive'))
+            return self.send_json({'model': body['model'], 'response': '', 'done': True,
+                                   'done_reason': 'unload' if unload else 'load'})
+        slot = mock.acquire(body['model'])
+        if slot is None:
+            return self.send_json({'error': 'server busy, please try again.  maximum pending requests exceeded'},
+                                  503)
+        try:
+            if not body.get('stream', True):
+                text, final = '', None
+                for piece, final in mock.reply(body):
+                    text += piece
+                return self.send_json({**final, 'response': text})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for piece, final in mock.reply(body):
+                    self.send_chunk(final or {'model': body['model'], 'response': piece, 'done': False})
+                self.wfile.write(b'0\r\n\r\n')
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading, which stops a real generation too
+                self.close_connection = True
+        finally:
+            slot.release()
+
+def start_server(port=0, host='127.0.0.1', **settings):
+    # Serves a MockOllama on a background thread; returns (server, base URL).
+    # server.shutdown() stops it.
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.mock = MockOllama(**settings)
+    threading.Thread(target=server.serve_forever, name='MockOllama', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+# =========================
+# Command line
+# =========================
+def add_settings_arguments(parser, prefix=''):
+    # Mock settings as --[prefix]load-delay etc., shared with benchmark_load.py
+    parser.add_argument(f'--{prefix}load-delay', type=float, default=LOAD_DELAY)
+    parser.add_argument(f'--{prefix}prompt-token-delay', type=float, default=PROMPT_TOKEN_DELAY)
+    parser.add_argument(f'--{prefix}first-token-delay', type=float, default=FIRST_TOKEN_DELAY)
+    parser.add_argument(f'--{prefix}token-delay', type=float, default=TOKEN_DELAY)
+    parser.add_argument(f'--{prefix}reply-tokens', type=int, default=REPLY_TOKENS)
+    parser.add_argument(f'--{prefix}jitter', type=float, default=JITTER)
+    parser.add_argument(f'--{prefix}num-parallel', type=int, default=NUM_PARALLEL)
+    parser.add_argument(f'--{prefix}max-queue', type=int, default=MAX_QUEUE)
+    parser.add_argument(f'--{prefix}error-rate', type=float, default=ERROR_RATE)
+
+def settings_from(args, prefix=''):
+    names = ['load_delay', 'prompt_token_delay', 'first_token_delay', 'token_delay', 'reply_tokens',
+             'jitter', 'num_parallel', 'max_queue', 'error_rate']
+    return {name: getattr(args, prefix.replace('-', '_') + name) for name in names}
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline stand-in for the Ollama HTTP API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=MOCK_PORT)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.host, **settings_from(args))
+    print(f"Mock Ollama listening on {url}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dispatcher import SYSTEM_SESSION
+from ollama_client import OllamaError
+
+# =========================
+# Config
+# =========================
+# Residency policies:
+#   'recent'  - every model selected by an active session stays loaded,
+#               others unload after IDLE_KEEP_ALIVE
+#   'all'     - every model stays loaded (needs memory for all of them)
+#   'default' - Ollama's own idle timeout for every model
+RESIDENCY = 'recent'
+PINNED_KEEP_ALIVE = -1         # never unload
+IDLE_KEEP_ALIVE = '5m'         # 0 unloads a model as soon as it is switched away from
+STATUS_TTL = 2.0               # seconds between /api/ps checks
+SESSION_IDLE = 3600            # seconds without a rerun before a session's selection stops pinning
+
+# =========================
+# Model manager
+# =========================
+# Warms models in the background so a switch in the sidebar does not leave
+# the next prompt waiting for the model to load. One manager serves every
+# session: select() records the model a session picked (call it only when
+# that choice changes; touch() keeps the session active on other reruns),
+# applies the residency policy through the client's per-model keep_alive
+# (sent with every request) and loads the model with an empty generate.
+# Under 'recent' the pinned models are those any active session has
+# selected, so tabs on different models do not unload each other's. Loads
+# run one at a time on a background thread and, with a dispatcher, wait for
+# a slot of their model like any generation; status() reports what is
+# loading, how long loads took and what Ollama has in memory.
+class ModelManager:
+    def __init__(self, client, models, policy=RESIDENCY, pinned_keep_alive=PINNED_KEEP_ALIVE,
+                 idle_keep_alive=IDLE_KEEP_ALIVE, dispatcher=None):
+        if policy not in ('recent', 'all', 'default'):
+            raise ValueError(f"Unknown residency policy: {policy}")
+        self.client = client
+        self.models = list(models)
+        self.policy = policy
+        self.pinned_keep_alive = pinned_keep_alive
+        self.idle_keep_alive = idle_keep_alive
+        self.dispatcher = dispatcher
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ModelLoad')
+        self.selections = {}       # session -> (model, monotonic time last seen)
+        self.loads = {}            # model -> ('loading' | 'ready' | 'error', seconds or message, finished)
+        self.running = {}          # model -> expires_at, from the last /api/ps
+        self.running_checked = 0.0
+        self.checking = False
+        if policy == 'all':
+            for model in self.models:
+                self.keep(model, self.pinned_keep_alive)
+                self.warm(model)
+
+    def keep(self, model, keep_alive):
+        if self.policy != 'default':
+            self.client.keep_alive[model] = keep_alive
+
+    def select(self, session, model):
+        now = time.monotonic()
+        with self.lock:
+            before = self.selected()
+            self.selections[session] = (model, now)
+            for other, (_, seen) in list(self.selections.items()):
+                if now - seen > SESSION_IDLE:
+                    del self.selections[other]
+            after = self.selected()
+        if self.policy == 'recent':
+            for pinned in after - before:
+                self.keep(pinned, self.pinned_keep_alive)
+            for idle in before - after:
+                self.keep(idle, self.idle_keep_alive)
+                self.executor.submit(self.release, idle)
+        self.warm(model)
+
+    def touch(self, session):
+        with self.lock:
+            if session in self.selections:
+                self.selections[session] = (self.selections[session][0], time.monotonic())
+
+    def selected(self):
+        # Models chosen by the sessions still recorded; called with the lock held
+        return {model for model, _ in self.selections.values()}
+
+    def warm(self, model):
+        with self.lock:
+            if self.loads.get(model, ('',))[0] == 'loading':
+                return
+            self.loads[model] = ('loading', None, None)
+        self.executor.submit(self.load, model)
+
+    def prepare(self, models):
+        # Warms any of `models` not loaded or loading yet, e.g. for compare mode
+        with self.lock:
+            pending = [model for model in models if self.loads.get(model, ('',))[0] not in ('loading', 'ready')]
+        for model in pending:
+            self.warm(model)
+
+    def send_load(self, model):
+        if self.dispatcher is None:
+            return self.client.load(model, self.client.keep_alive.get(model))
+        return self.dispatcher.run(SYSTEM_SESSION, model, self.client.load, model, self.client.keep_alive.get(model))
+
+    def load(self, model):
+        start = time.perf_counter()
+        try:
+            self.send_load(model)
+            result = ('ready', time.perf_counter() - start, time.monotonic())
+        except OllamaError as e:
+            result = ('error', str(e), time.monotonic())
+        with self.lock:
+            self.loads[model] = result
+            self.running_checked = 0.0
+
+    def release(self, model):
+        # Applies the idle keep_alive to a model switched away from, if Ollama
+        # still has it; a request for a model not in memory would load it
+        try:
+            if model in self.client.running_models():
+                self.send_load(model)
+        except OllamaError:
+            pass
+
+    # ---- status ----
+    def refresh_running(self):
+        started = time.monotonic()
+        try:
+            running = self.client.running_models()
+        except OllamaError:
+            running = None
+        with self.lock:
+            if running is not None:
+                self.running = running
+            self.running_checked = started
+            self.checking = False
+
+    def status(self):
+        # {model: text} for the sidebar; Ollama is asked in the background, so
+        # this never waits on the server
+        with self.lock:
+            if not self.checking and time.monotonic() - self.running_checked > STATUS_TTL:
+                self.checking = True
+                threading.Thread(target=self.refresh_running, name='ModelStatus', daemon=True).start()
+            loads, running, checked = dict(self.loads), dict(self.running), self.running_checked
+        result = {}
+        for model in self.models:
+            state, detail, finished = loads.get(model, (None, None, None))
+            # A finished load counts until /api/ps has been checked after it
+            loaded_since_check = state == 'ready' and finished > checked
+            if state == 'loading':
+                text = "⏳ loading..."
+            elif model in running or loaded_since_check:
+                pinned = self.client.keep_alive.get(model) == self.pinned_keep_alive
+                text = "🟢 in memory" + (" (pinned)" if pinned else "")
+                if state == 'ready':
+                    text += f", loaded in {detail:.1f} s"
+            elif state == 'error':
+                text = f"🔴 load failed: {detail}"
+            else:
+                text = "⚪ not loaded"
+            result[model] = text
+        return result
+
+    def busy(self):
+        with self.lock:
+            return any(entry[0] == 'loading' for entry in self.loads.values())
@@ -0,0 +1,312 @@
+import json
+import time
+import asyncio
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# =========================
+# Config
+# =========================
+OLLAMA_URL = "http://localhost:11434"
+GENERATE_PATH = "/api/generate"
+EMBED_PATH = "/api/embed"
+RUNNING_PATH = "/api/ps"
+CONNECT_TIMEOUT = 3.05     # seconds to establish a connection
+READ_TIMEOUT = 300         # seconds to wait for the next bytes of a response
+RETRIES = 3                # extra attempts after a connection error
+RETRY_BACKOFF = 0.5        # seconds before the first retry, doubled each time
+POOL_SIZE = 10             # keep-alive connections kept per client
+
+class OllamaError(Exception):
+    pass
+
+# =========================
+# Generation stats
+# =========================
+# Filled in while a response is generated. ttft is the time from sending the
+# request to the first non-empty piece of text; for a blocking request it is
+# the same as the total time.
+class GenerationStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.ttft = None
+        self.total = None
+        self.chunks = 0
+        self.eval_count = None        # tokens generated, as reported by Ollama
+        self.eval_duration = None     # seconds Ollama spent generating them
+        self.done_reason = None
+        self.prompt_eval_count = None   # prompt tokens Ollama had to evaluate
+        self.prompt_eval_duration = None
+        self.total_duration = None      # seconds Ollama spent on the request
+        self.load_duration = None       # seconds of that spent loading the model
+        self.context = None             # token state to continue from, see conversation.py
+        self.reused_context = False
+        self.stopped = False
+        self.retries = 0
+
+    def first_text(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.start
+
+    def finish(self, final=None):
+        self.total = time.perf_counter() - self.start
+        if final:
+            self.eval_count = final.get('eval_count')
+            if final.get('eval_duration'):
+                self.eval_duration = final['eval_duration'] / 1e9
+            self.done_reason = final.get('done_reason')
+            self.prompt_eval_count = final.get('prompt_eval_count')
+            if final.get('prompt_eval_duration'):
+                self.prompt_eval_duration = final['prompt_eval_duration'] / 1e9
+            if final.get('total_duration'):
+                self.total_duration = final['total_duration'] / 1e9
+            if final.get('load_duration'):
+                self.load_duration = final['load_duration'] / 1e9
+            self.context = final.get('context')
+
+    def tokens_per_second(self):
+        if self.eval_count and self.eval_duration:
+            return self.eval_count / self.eval_duration
+        return None
+
+    def prompt_tokens_per_second(self):
+        if self.prompt_eval_count and self.prompt_eval_duration:
+            return self.prompt_eval_count / self.prompt_eval_duration
+        return None
+
+def error_text(response):
+    try:
+        return response.json().get('error', response.text)
+    except ValueError:
+        return response.text
+
+def generate_payload(model, prompt, stream, context, options, keep_alive):
+    payload = {"model": model, "prompt": prompt, "stream": stream}
+    if context:
+        payload["context"] = context
+    if options:
+        payload["options"] = options
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    return payload
+
+def parse_chunk(line, stats):
+    # One NDJSON line of a streamed response -> (text piece, done)
+    chunk = json.loads(line)
+    if 'error' in chunk:
+        raise OllamaError(chunk['error'])
+    piece = chunk.get('response', '')
+    if piece:
+        stats.first_text()
+        stats.chunks += 1
+    if chunk.get('done'):
+        stats.finish(chunk)
+        return piece, True
+    return piece, False
+
+# =========================
+# Client
+# =========================
+# One client per process (the Streamlit app caches it with st.cache_resource)
+# so requests reuse pooled keep-alive connections instead of connecting each
+# time. Every request has a connect and a read timeout; the read timeout is
+# the longest wait for the next bytes, so for a streamed response it bounds
+# the gap between chunks rather than the whole answer.
+#
+# A request that fails to connect, or whose connection drops before any
+# response arrives, is retried up to `retries` times with exponential
+# backoff. Timeouts and failures after the response started are not retried.
+class OllamaClient:
+    def __init__(self, base_url=OLLAMA_URL, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retries=RETRIES, backoff=RETRY_BACKOFF, pool_size=POOL_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        # model -> keep_alive sent with every request for it (see model_manager.py);
+        # Ollama resets a model's expiry on each request, so it must be repeated
+        self.keep_alive = {}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path, payload, stats, stream=False):
+        url = self.base_url + path
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.request(method, url, json=payload, stream=stream, timeout=self.timeout)
+                break
+            except requests.ConnectionError as e:
+                # Includes connect timeouts
+                if attempt == self.retries:
+                    raise OllamaError(f"Cannot connect to {self.base_url}: {e}")
+                stats.retries += 1
+                time.sleep(self.backoff * 2 ** attempt)
+            except requests.Timeout:
+                raise OllamaError(f"No response from {self.base_url} within {self.timeout[1]} s")
+        if response.status_code != 200:
+            try:
+                raise OllamaError(error_text(response))
+            finally:
+                response.close()
+        return response
+
+    # Blocking request: the whole completion arrives as one JSON object.
+    # `context` continues from the token state of an earlier response;
+    # `options` are Ollama model options such as num_ctx or num_predict.
+    def generate(self, model, prompt, stats=None, context=None, options=None):
+        stats = stats if stats is not None else GenerationStats()
+        payload = generate_payload(model, prompt, False, context, options, self.keep_alive.get(model))
+        response = self.request('POST', GENERATE_PATH, payload, stats)
+        try:
+            result = response.json()
+        except requests.RequestException as e:
+            raise OllamaError(f"Response from {self.base_url} failed: {e}")
+        text = result.get("response", "")
+        stats.first_text()
+        stats.finish(result)
+        return text
+
+    # Streaming request: Ollama sends one JSON object per line (NDJSON), each
+    # with the next piece of text, and a last object with done=true and the
+    # counters. Yields the pieces as they arrive. Setting `stop` (a
+    # threading.Event) or closing the generator closes the connection, which
+    # makes Ollama stop generating.
+    def stream_generate(self, model, prompt, stats=None, stop=None, context=None, options=None):
+        stats = stats if stats is not None else GenerationStats()
+        payload = generate_payload(model, prompt, True, context, options, self.keep_alive.get(model))
+        response = self.request('POST', GENERATE_PATH, payload, stats, stream=True)
+        with response:
+            try:
+                for line in response.iter_lines():
+                    if stop is not None and stop.is_set():
+                        stats.stopped = True
+                        return
+                    if not line:
+                        continue
+                    piece, done = parse_chunk(line, stats)
+                    if piece:
+                        yield piece
+                    if done:
+                        return
+            except GeneratorExit:
+                stats.stopped = True
+                raise
+            except requests.RequestException as e:
+                raise OllamaError(f"Response from {self.base_url} failed: {e}")
+            finally:
+                if stats.total is None:
+                    stats.finish()
+
+    # Embedding vector of `text` from an embedding model (e.g. nomic-embed-text)
+    def embed(self, model, text):
+        response = self.request('POST', EMBED_PATH, {"model": model, "input": text}, GenerationStats())
+        try:
+            return response.json()["embeddings"][0]
+        except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+            raise OllamaError(f"Bad embedding response from {self.base_url}: {e}")
+
+    # Loads a model without generating (a request with no prompt) and sets how
+    # long it stays in memory: -1 forever, 0 unloads now, or a duration like "5m"
+    def load(self, model, keep_alive=None):
+        payload = {"model": model}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        response = self.request('POST', GENERATE_PATH, payload, GenerationStats())
+        try:
+            return response.json().get('done_reason')
+        except ValueError as e:
+            raise OllamaError(f"Bad load response from {self.base_url}: {e}")
+
+    # Models currently in memory: {name: expires_at text}
+    def running_models(self):
+        response = self.request('GET', RUNNING_PATH, None, GenerationStats())
+        try:
+            return {entry['name']: entry.get('expires_at', '') for entry in response.json().get('models', [])}
+        except (ValueError, KeyError, TypeError) as e:
+            raise OllamaError(f"Bad model list from {self.base_url}: {e}")
+
+    def close(self):
+        self.session.close()
+
+# =========================
+# Async client
+# =========================
+# Same requests on an httpx.AsyncClient, for callers running an event loop.
+# httpx is only needed when this class is used.
+class AsyncOllamaClient:
+    def __init__(self, base_url=OLLAMA_URL, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retries=RETRIES, backoff=RETRY_BACKOFF, pool_size=POOL_SIZE):
+        import httpx
+        self.httpx = httpx
+        self.base_url = base_url.rstrip('/')
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.keep_alive = {}
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+
+    async def send(self, path, payload, stats, stream=False):
+        request = self.client.build_request('POST', path, json=payload)
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.client.send(request, stream=stream)
+                break
+            except (self.httpx.ConnectError, self.httpx.ConnectTimeout, self.httpx.RemoteProtocolError) as e:
+                if attempt == self.retries:
+                    raise OllamaError(f"Cannot connect to {self.base_url}: {e}")
+                stats.retries += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+            except self.httpx.TimeoutException:
+                raise OllamaError(f"No response from {self.base_url} within {self.read_timeout} s")
+        if response.status_code != 200:
+            try:
+                await response.aread()
+                raise OllamaError(error_text(response))
+            finally:
+                await response.aclose()
+        return response
+
+    async def generate(self, model, prompt, stats=None, context=None, options=None):
+        stats = stats if stats is not None else GenerationStats()
+        response = await self.send(GENERATE_PATH, generate_payload(model, prompt, False, context, options,
+                                                                    self.keep_alive.get(model)), stats)
+        result = response.json()
+        text = result.get("response", "")
+        stats.first_text()
+        stats.finish(result)
+        return text
+
+    async def stream_generate(self, model, prompt, stats=None, stop=None, context=None, options=None):
+        stats = stats if stats is not None else GenerationStats()
+        response = await self.send(GENERATE_PATH, generate_payload(model, prompt, True, context, options,
+                                                                    self.keep_alive.get(model)), stats, stream=True)
+        try:
+            async for line in response.aiter_lines():
+                if stop is not None and stop.is_set():
+                    stats.stopped = True
+                    return
+                if not line:
+                    continue
+                piece, done = parse_chunk(line, stats)
+                if piece:
+                    yield piece
+                if done:
+                    return
+        except GeneratorExit:
+            stats.stopped = True
+            raise
+        except self.httpx.HTTPError as e:
+            raise OllamaError(f"Response from {self.base_url} failed: {e}")
+        finally:
+            await response.aclose()
+            if stats.total is None:
+                stats.finish()
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,233 @@
+import os
+import time
+import random
+import socket
+import struct
+import asyncio
+import threading
+from collections import deque
+
+# =========================
+# Config
+# =========================
+PROBE_PORT = 53            # TCP port used when a target has no ':port'
+PROBE_TIMEOUT = 2.0        # seconds per probe attempt
+PROBE_TTL = 30.0           # cached results older than this are refreshed
+REFRESH_INTERVAL = 15.0    # background refresh period for watched targets
+HISTORY_SIZE = 100         # latency samples kept per target
+
+# =========================
+# Results
+# =========================
+class ProbeResult:
+    def __init__(self, target, reachable, latency=None, method='', error=''):
+        self.target = target
+        self.reachable = reachable
+        self.latency = latency
+        self.method = method
+        self.error = error
+        self.checked_at = time.time()
+
+    def age(self):
+        return time.time() - self.checked_at
+
+    def describe(self):
+        if self.reachable:
+            return f"reachable via {self.method} in {self.latency * 1000:.1f} ms"
+        return f"unreachable ({self.error})"
+
+def parse_target(target):
+    host, sep, port = target.rpartition(':')
+    if sep and port.isdigit():
+        return host, int(port)
+    return target, PROBE_PORT
+
+# =========================
+# Probes
+# =========================
+async def tcp_probe(host, port, timeout=PROBE_TIMEOUT):
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except ConnectionRefusedError:
+        # A reset still proves the host answered
+        return time.perf_counter() - start
+    latency = time.perf_counter() - start
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return latency
+
+def icmp_checksum(data):
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+async def icmp_probe(host, timeout=PROBE_TIMEOUT):
+    # Unprivileged ICMP datagram sockets where the kernel allows them,
+    # raw sockets otherwise (needs root / CAP_NET_RAW)
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        raw = False
+    except PermissionError:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        raw = True
+
+    loop = asyncio.get_running_loop()
+    ident = os.getpid() & 0xffff
+    sequence = random.randint(0, 0xffff)
+    header = struct.pack('!BBHHH', 8, 0, 0, ident, sequence)
+    packet = struct.pack('!BBHHH', 8, 0, icmp_checksum(header), ident, sequence)
+    try:
+        sock.setblocking(False)
+        address = (await loop.getaddrinfo(host, None, family=socket.AF_INET))[0][4][0]
+        await loop.sock_connect(sock, (address, 0))
+        start = time.perf_counter()
+        await loop.sock_sendall(sock, packet)
+        deadline = start + timeout
+        while True:
+            data = await asyncio.wait_for(loop.sock_recv(sock, 1024),
+                                          max(deadline - time.perf_counter(), 0))
+            if raw:
+                if not data:
+                    continue
+                data = data[(data[0] & 0x0f) * 4:]
+            # Echo reply (type 0); the kernel rewrites the id on datagram sockets
+            if len(data) >= 8 and data[0] == 0 and struct.unpack('!H', data[6:8])[0] == sequence:
+                return time.perf_counter() - start
+    finally:
+        sock.close()
+
+# =========================
+# Service
+# =========================
+# Probes targets concurrently on a private asyncio loop and caches the latest
+# result per target. Readers get the cached state immediately; stale entries
+# are refreshed in the background and watched targets are re-probed on a timer.
+class ProbeService:
+    def __init__(self, ttl=PROBE_TTL, interval=REFRESH_INTERVAL, timeout=PROBE_TIMEOUT, use_icmp=True):
+        self.ttl = ttl
+        self.interval = interval
+        self.timeout = timeout
+        self.use_icmp = use_icmp
+        self.lock = threading.Lock()
+        self.results = {}
+        self.history = {}
+        self.pending = {}
+        self.targets = set()
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='ProbeService', daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.refresh_loop(), self.loop)
+
+    def watch(self, *targets):
+        with self.lock:
+            self.targets.update(targets)
+        for target in targets:
+            if not self.is_fresh(self.cached(target)):
+                self.refresh(target)
+
+    def cached(self, target):
+        with self.lock:
+            return self.results.get(target)
+
+    def is_fresh(self, result):
+        return result is not None and result.age() < self.ttl
+
+    def status(self, target, wait=0):
+        # Cached result for target; waits up to `wait` seconds only when there is
+        # no fresh result yet, otherwise returns at once
+        self.watch(target)
+        result = self.cached(target)
+        if self.is_fresh(result) or not wait:
+            return result
+        future = self.refresh(target)
+        try:
+            return future.result(wait)
+        except Exception:
+            return self.cached(target)
+
+    def refresh(self, target):
+        # Starts a probe unless one is already running for this target
+        with self.lock:
+            future = self.pending.get(target)
+            if future is None:
+                future = asyncio.run_coroutine_threadsafe(self.probe(target), self.loop)
+                self.pending[target] = future
+                future.add_done_callback(lambda f: self.pending.pop(target, None))
+        return future
+
+    def probe_all(self, targets, wait=None):
+        futures = [self.refresh(target) for target in targets]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(wait))
+            except Exception:
+                results.append(None)
+        return results
+
+    async def probe(self, target):
+        host, port = parse_target(target)
+        try:
+            result = ProbeResult(target, True, await tcp_probe(host, port, self.timeout), 'tcp')
+        except (OSError, asyncio.TimeoutError) as e:
+            result = ProbeResult(target, False, error=str(e) or type(e).__name__)
+            if self.use_icmp:
+                try:
+                    result = ProbeResult(target, True, await icmp_probe(host, self.timeout), 'icmp')
+                except (OSError, asyncio.TimeoutError):
+                    pass
+        with self.lock:
+            self.results[target] = result
+            self.history.setdefault(target, deque(maxlen=HISTORY_SIZE)).append(
+                (result.checked_at, result.latency))
+        return result
+
+    async def refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            with self.lock:
+                targets = list(self.targets)
+            for target in targets:
+                self.refresh(target)
+
+    def latency_history(self, target):
+        # [(checked_at, latency seconds or None if unreachable), ...]
+        with self.lock:
+            return list(self.history.get(target, ()))
+
+    def summary(self):
+        lines = []
+        with self.lock:
+            targets = sorted(self.targets)
+        for target in targets:
+            result = self.cached(target)
+            samples = [latency for _, latency in self.latency_history(target) if latency is not None]
+            state = result.describe() if result else 'not probed yet'
+            if samples:
+                state += (f", min/avg/max {min(samples) * 1000:.1f}/"
+                          f"{sum(samples) / len(samples) * 1000:.1f}/{max(samples) * 1000:.1f} ms"
+                          f" over {len(samples)} samples")
+            lines.append(f"{target}: {state}")
+        return lines
+
+    async def cancel_tasks(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        try:
+            asyncio.run_coroutine_threadsafe(self.cancel_tasks(), self.loop).result(1)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1)
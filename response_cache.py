@@ -0,0 +1,310 @@
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from conversation import build_context
+from ollama_client import OllamaError
+
+# =========================
+# Config
+# =========================
+CACHE_PATH = 'response_cache.db'
+CACHE_TTL = 7 * 24 * 3600      # seconds a response stays valid
+CACHE_MAX_ENTRIES = 5000
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+SEMANTIC_THRESHOLD = 0.92      # cosine similarity needed for a near-duplicate hit
+SEMANTIC_CANDIDATES = 8        # nearest entries checked per lookup
+EMBEDDING_MEMO = 256           # recent question embeddings kept for put()
+
+def normalize(text):
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+def digest(*parts):
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+class CacheHit:
+    def __init__(self, response, kind, similarity=1.0):
+        self.response = response
+        self.kind = kind               # 'exact' or 'similar'
+        self.similarity = similarity
+
+    def label(self):
+        if self.kind == 'exact':
+            return "⚡ cached response"
+        return f"⚡ cached response to a similar question ({self.similarity:.2f} similarity)"
+
+# =========================
+# Vector index
+# =========================
+# Inner-product search over normalized embeddings, keyed by cache row id.
+# Uses FAISS when it is installed and a numpy matrix otherwise.
+class VectorIndex:
+    def __init__(self, dim):
+        self.dim = dim
+        try:
+            import faiss
+        except ImportError:
+            faiss = None
+        self.faiss = faiss
+        if faiss is not None:
+            self.index = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
+        else:
+            self.ids = np.zeros(0, dtype=np.int64)
+            self.vectors = np.zeros((0, dim), dtype=np.float32)
+
+    def add(self, ids, vectors):
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        if self.faiss is not None:
+            self.index.add_with_ids(vectors, ids)
+        else:
+            self.ids = np.concatenate([self.ids, ids])
+            self.vectors = np.concatenate([self.vectors, vectors])
+
+    def remove(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.faiss is not None:
+            self.index.remove_ids(ids)
+        else:
+            keep = ~np.isin(self.ids, ids)
+            self.ids = self.ids[keep]
+            self.vectors = self.vectors[keep]
+
+    def size(self):
+        return self.index.ntotal if self.faiss is not None else len(self.ids)
+
+    def search(self, vector, k):
+        # [(row id, similarity)], most similar first
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, self.dim)
+        if self.faiss is not None:
+            scores, ids = self.index.search(vector, k)
+            return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i != -1]
+        if not len(self.ids):
+            return []
+        scores = self.vectors @ vector[0]
+        top = np.argsort(-scores)[:k]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+# =========================
+# Response cache
+# =========================
+# Finished replies stored in SQLite, shared by every session and process that
+# uses the same file. The exact key is the model plus the normalized
+# conversation (case and whitespace ignored), so a hit is a reply the model
+# already gave to the same chat. Entries expire after `ttl` seconds; past
+# `max_entries` or `max_bytes` the least recently used are evicted.
+#
+# The optional semantic tier embeds the last user message with an Ollama
+# embedding model and looks up earlier questions asked after the same
+# history, with the same model, whose similarity reaches `threshold`.
+# Vectors are stored with the rows; the in-memory indexes, one per model and
+# history, are built from them on start and pick up rows added by other
+# processes on each lookup. Searching only the matching index keeps entries
+# of other models and conversations from crowding out the candidates.
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                 client=None, embed_model=None, threshold=SEMANTIC_THRESHOLD):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.client = client
+        self.embed_model = embed_model
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE, model TEXT, history TEXT, question TEXT, '
+                'response TEXT, embedding BLOB, created REAL, last_used REAL, hits INTEGER, size INTEGER)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)')
+        self.indexes = {}              # history key -> VectorIndex of its questions
+        self.indexed = {}              # row id -> history key, for removal
+        self.index_dim = None
+        self.indexed_id = 0            # highest row id added to the vector indexes
+        self.embeddings = OrderedDict()
+        self.hits = {'exact': 0, 'similar': 0, 'miss': 0}
+
+    @property
+    def semantic(self):
+        return self.client is not None and bool(self.embed_model)
+
+    def keys(self, model, messages):
+        # (exact key, history key, normalized question) for a turn whose user
+        # message is messages[-1]
+        history = digest(model, normalize(build_context(messages[:-1])))
+        question = normalize(messages[-1][1])
+        return digest(history, question), history, question
+
+    # ---- lookups ----
+    def get(self, model, messages):
+        key, history, question = self.keys(model, messages)
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute('SELECT id, response, created FROM responses WHERE key = ?',
+                                          (key,)).fetchone()
+            if row is not None and now - row[2] <= self.ttl:
+                self.touch(row[0], now)
+                self.hits['exact'] += 1
+                return CacheHit(row[1], 'exact')
+        hit = self.get_similar(model, history, question, now) if self.semantic else None
+        with self.lock:
+            self.hits['similar' if hit else 'miss'] += 1
+        return hit
+
+    def get_similar(self, model, history, question, now):
+        vector = self.embedding(question)
+        if vector is None:
+            return None
+        with self.lock:
+            self.refresh_index(len(vector))
+            index = self.indexes.get(history)
+            if index is None:
+                return None
+            for row_id, similarity in index.search(vector, SEMANTIC_CANDIDATES):
+                if similarity < self.threshold:
+                    break
+                row = self.connection.execute(
+                    'SELECT response, created FROM responses WHERE id = ? AND model = ? AND history = ?',
+                    (row_id, model, history)).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    self.touch(row_id, now)
+                    return CacheHit(row[0], 'similar', similarity)
+        return None
+
+    def touch(self, row_id, now):
+        with self.connection:
+            self.connection.execute('UPDATE responses SET last_used = ?, hits = hits + 1 WHERE id = ?',
+                                    (now, row_id))
+
+    def embedding(self, question):
+        # Unit-length embedding, memoized so put() reuses get()'s request
+        with self.lock:
+            vector = self.embeddings.get(question)
+        if vector is None:
+            try:
+                vector = np.asarray(self.client.embed(self.embed_model, question), dtype=np.float32)
+            except OllamaError:
+                return None
+            vector /= max(float(np.linalg.norm(vector)), 1e-12)
+            with self.lock:
+                self.embeddings[question] = vector
+                if len(self.embeddings) > EMBEDDING_MEMO:
+                    self.embeddings.popitem(last=False)
+        return vector
+
+    def reset_index(self, dim=None):
+        self.indexes = {}
+        self.indexed = {}
+        self.index_dim = dim
+        self.indexed_id = 0
+
+    def refresh_index(self, dim):
+        # Adds rows written since the last lookup, by this or another process
+        if self.index_dim != dim:
+            self.reset_index(dim)
+        rows = self.connection.execute(
+            'SELECT id, history, embedding FROM responses WHERE id > ? AND embedding IS NOT NULL',
+            (self.indexed_id,)).fetchall()
+        if not rows:
+            return
+        self.indexed_id = max(row_id for row_id, _, _ in rows)
+        groups = {}
+        for row_id, history, blob in rows:
+            if len(blob) == dim * 4 and row_id not in self.indexed:
+                groups.setdefault(history, []).append((row_id, blob))
+        for history, group in groups.items():
+            index = self.indexes.get(history)
+            if index is None:
+                index = self.indexes[history] = VectorIndex(dim)
+            index.add([row_id for row_id, _ in group],
+                      np.frombuffer(b''.join(blob for _, blob in group), dtype=np.float32))
+            for row_id, _ in group:
+                self.indexed[row_id] = history
+
+    def index_row(self, row_id, history, vector):
+        # Indexes a row written by this process right away; rows whose id was
+        # reused after a delete would otherwise sit below indexed_id
+        if self.index_dim is None or self.index_dim != len(vector) or row_id in self.indexed:
+            return
+        index = self.indexes.get(history)
+        if index is None:
+            index = self.indexes[history] = VectorIndex(self.index_dim)
+        index.add([row_id], vector)
+        self.indexed[row_id] = history
+
+    def unindex(self, ids):
+        groups = {}
+        for row_id in ids:
+            history = self.indexed.pop(row_id, None)
+            if history is not None:
+                groups.setdefault(history, []).append(row_id)
+        for history, group in groups.items():
+            index = self.indexes[history]
+            index.remove(group)
+            if not index.size():
+                del self.indexes[history]
+
+    # ---- storing ----
+    def put(self, model, messages, response):
+        key, history, question = self.keys(model, messages)
+        vector = self.embedding(question) if self.semantic else None
+        now = time.time()
+        size = len(response.encode('utf-8')) + len(question.encode('utf-8'))
+        with self.lock:
+            with self.connection:
+                # A replaced row's vector must leave the index with it
+                replaced = [row_id for row_id, in self.connection.execute(
+                    'SELECT id FROM responses WHERE key = ?', (key,))]
+                self.connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                row_id = self.connection.execute(
+                    'INSERT INTO responses (key, model, history, question, response, embedding, created, '
+                    'last_used, hits, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?)',
+                    (key, model, history, question, response, vector.tobytes() if vector is not None else None,
+                     now, now, size)).lastrowid
+            self.unindex(replaced)
+            if vector is not None:
+                self.index_row(row_id, history, vector)
+            self.evict(now)
+
+    def evict(self, now):
+        removed = [row_id for row_id, in self.connection.execute(
+            'SELECT id FROM responses WHERE created < ?', (now - self.ttl,))]
+        count, total = self.connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses '
+                                               'WHERE created >= ?', (now - self.ttl,)).fetchone()
+        if count > self.max_entries or total > self.max_bytes:
+            for row_id, size in self.connection.execute(
+                    'SELECT id, size FROM responses WHERE created >= ? ORDER BY last_used', (now - self.ttl,)):
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                removed.append(row_id)
+                count -= 1
+                total -= size
+        if removed:
+            with self.connection:
+                self.connection.executemany('DELETE FROM responses WHERE id = ?', [(i,) for i in removed])
+            self.unindex(removed)
+
+    def clear(self):
+        with self.lock:
+            with self.connection:
+                self.connection.execute('DELETE FROM responses')
+            self.reset_index()
+
+    def stats(self):
+        with self.lock:
+            count, total = self.connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+            return {'entries': count, 'bytes': total, **self.hits}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
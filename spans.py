@@ -0,0 +1,214 @@
+import os
+import csv
+import json
+import time
+import threading
+from collections import defaultdict, deque
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFileDialog,
+                             QTableWidget, QTableWidgetItem, QHeaderView)
+
+# =========================
+# Config
+# =========================
+MAX_SPANS = 100000         # spans kept for trace export; older ones are dropped
+MAX_SAMPLES = 10000        # durations kept per span name for percentiles
+REFRESH_MS = 1000          # performance panel refresh period
+
+# =========================
+# Spans
+# =========================
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ('recorder', 'name', 'category', 'args', 'start')
+
+    def __init__(self, recorder, name, category, args):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=exc_type.__name__)
+        self.recorder.record(self.name, self.start, end, self.category, self.args)
+        return False
+
+# Collects timed spans from any thread. While disabled, span() returns a
+# shared no-op context manager, so instrumented code pays one attribute check.
+class SpanRecorder:
+    def __init__(self, enabled=True, max_spans=MAX_SPANS, max_samples=MAX_SAMPLES):
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self.origin = time.perf_counter_ns()
+        self.lock = threading.Lock()
+        self.spans = deque(maxlen=max_spans)
+        self.samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self.counts = defaultdict(int)
+        self.thread_names = {}
+
+    def span(self, name, category='app', **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category, args or None)
+
+    def record(self, name, start, end, category='app', args=None):
+        # start/end are time.perf_counter_ns() values
+        thread_id = threading.get_ident()
+        with self.lock:
+            if thread_id not in self.thread_names:
+                self.thread_names[thread_id] = threading.current_thread().name
+            self.spans.append((name, category, start, end - start, thread_id, args))
+            self.samples[name].append(end - start)
+            self.counts[name] += 1
+
+    def reset(self):
+        with self.lock:
+            self.spans.clear()
+            self.samples.clear()
+            self.counts.clear()
+
+    # ---- statistics ----
+    def stats(self):
+        # {name: (count, p50, p95, p99, max)} with times in milliseconds; the
+        # percentiles cover the last max_samples spans of each name
+        with self.lock:
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+            counts = dict(self.counts)
+        result = {}
+        for name, values in samples.items():
+            if values:
+                result[name] = (counts[name], percentile(values, 50) / 1e6, percentile(values, 95) / 1e6,
+                                percentile(values, 99) / 1e6, values[-1] / 1e6)
+        return result
+
+    # ---- export ----
+    def export_chrome_trace(self, path):
+        # Trace Event Format, loadable in chrome://tracing and Perfetto
+        with self.lock:
+            spans = list(self.spans)
+            thread_names = dict(self.thread_names)
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id, 'args': {'name': name}}
+                  for thread_id, name in thread_names.items()]
+        for name, category, start, duration, thread_id, args in spans:
+            event = {'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': thread_id,
+                     'ts': (start - self.origin) / 1000, 'dur': duration / 1000}
+            if args:
+                event['args'] = {key: str(value) for key, value in args.items()}
+            events.append(event)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(spans)
+
+    def export_csv(self, path):
+        with self.lock:
+            spans = list(self.spans)
+            thread_names = dict(self.thread_names)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Name', 'Category', 'Start (ms)', 'Duration (ms)', 'Thread', 'Args'])
+            for name, category, start, duration, thread_id, args in spans:
+                writer.writerow([name, category, f'{(start - self.origin) / 1e6:.3f}', f'{duration / 1e6:.3f}',
+                                 thread_names.get(thread_id, thread_id), json.dumps(args, default=str) if args else ''])
+        return len(spans)
+
+def percentile(sorted_values, percent):
+    # Nearest-rank percentile of an already sorted list
+    index = max(0, min(len(sorted_values) - 1, -(-len(sorted_values) * percent // 100) - 1))
+    return sorted_values[index]
+
+tracer = SpanRecorder()
+
+# =========================
+# Performance panel
+# =========================
+class PerfPanel(QDialog):
+    COLUMNS = ['Step', 'Count', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'Max (ms)']
+
+    def __init__(self, recorder=tracer, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Performance')
+        self.resize(700, 500)
+        self.recorder = recorder
+
+        layout = QVBoxLayout()
+        self.status = QLabel('')
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        buttons = QHBoxLayout()
+        for text, slot in (('Reset', self.reset), ('Export Trace...', self.export_trace),
+                           ('Export CSV...', self.export_csv)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+        buttons.addStretch(1)
+
+        layout.addWidget(self.status)
+        layout.addWidget(self.table)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        # Refreshed only while visible
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        stats = sorted(self.recorder.stats().items())
+        self.table.setRowCount(len(stats))
+        for row, (name, (count, p50, p95, p99, longest)) in enumerate(stats):
+            values = [name, str(count)] + [f'{value:.2f}' for value in (p50, p95, p99, longest)]
+            for column, text in enumerate(values):
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(text))
+                else:
+                    item.setText(text)
+        state = 'recording' if self.recorder.enabled else 'disabled'
+        self.status.setText(f'{len(stats)} step(s), {len(self.recorder.spans)} span(s) kept, {state}')
+
+    def reset(self):
+        self.recorder.reset()
+        self.refresh()
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Trace', 'trace.json', 'Trace JSON (*.json)')
+        if path:
+            count = self.recorder.export_chrome_trace(path)
+            self.status.setText(f'Exported {count} span(s) to {path}')
+
+    def export_csv(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Spans', 'spans.csv', 'CSV (*.csv)')
+        if path:
+            count = self.recorder.export_csv(path)
+            self.status.setText(f'Exported {count} span(s) to {path}')
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
@@ -0,0 +1,60 @@
+import os
+import csv
+import time
+from datetime import datetime
+
+# =========================
+# Startup timer
+# =========================
+# Records named phases of application startup (imports, login window shown,
+# main window built, session ready, ...) as seconds since the timer was
+# created. The application creates one timer before its other imports.
+# Only the first occurrence of a phase is kept, so a second login in the same
+# process does not change the recorded startup.
+class StartupTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = []
+
+    def mark(self, phase):
+        if self.elapsed(phase) is not None:
+            return False
+        self.marks.append((phase, time.perf_counter() - self.start))
+        return True
+
+    def elapsed(self, phase):
+        for name, seconds in self.marks:
+            if name == phase:
+                return seconds
+        return None
+
+    def phases(self):
+        # (phase, seconds since start, seconds since the previous mark)
+        result = []
+        previous = 0.0
+        for name, seconds in self.marks:
+            result.append((name, seconds, seconds - previous))
+            previous = seconds
+        return result
+
+    def report(self):
+        lines = ['Startup phases:']
+        for name, seconds, delta in self.phases():
+            lines.append(f"  {name:<24} {seconds * 1000:8.1f} ms  (+{delta * 1000:.1f} ms)")
+        return '\n'.join(lines)
+
+    def as_dict(self):
+        return {name: seconds for name, seconds in self.marks}
+
+    def write_csv(self, path, mode=''):
+        # One row per phase; runs are appended so several launches can be compared
+        new_file = not os.path.exists(path)
+        run = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with open(path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(['Run', 'Mode', 'Phase', 'Seconds', 'Delta'])
+            for name, seconds, delta in self.phases():
+                writer.writerow([run, mode, name, f'{seconds:.4f}', f'{delta:.4f}'])
+
+startup_timer = StartupTimer()
@@ -0,0 +1,200 @@
+import time
+import socket
+import asyncio
+import threading
+
+import pytest
+
+from mock_ollama import WORDS, start_server
+from ollama_client import GenerationStats, OllamaClient, OllamaError, parse_chunk
+
+MODEL = 'mistral:7b'
+FAST = dict(load_delay=0.05, prompt_token_delay=0, first_token_delay=0, token_delay=0.001, jitter=0,
+            reply_tokens=8)
+
+@pytest.fixture
+def mock():
+    server, url = start_server(**FAST)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def expected_text(count=FAST['reply_tokens']):
+    return ''.join(WORDS[i % len(WORDS)] + ' ' for i in range(count))
+
+# =========================
+# Chunks
+# =========================
+def test_parse_chunk_pieces_and_final():
+    stats = GenerationStats()
+    assert parse_chunk(b'{"response": "Hi", "done": false}', stats) == ('Hi', False)
+    assert stats.chunks == 1 and stats.ttft is not None
+    final = (b'{"response": "", "done": true, "eval_count": 5, "eval_duration": 500000000, '
+             b'"prompt_eval_count": 3, "context": [1, 2]}')
+    assert parse_chunk(final, stats) == ('', True)
+    assert stats.eval_count == 5 and stats.tokens_per_second() == 10.0
+    assert stats.prompt_eval_count == 3 and stats.context == [1, 2]
+
+def test_parse_chunk_error():
+    with pytest.raises(OllamaError, match='model not found'):
+        parse_chunk(b'{"error": "model not found"}', GenerationStats())
+
+# =========================
+# Client
+# =========================
+def test_stream_generate_final_stats(mock):
+    client = OllamaClient(mock)
+    stats = GenerationStats()
+    pieces = list(client.stream_generate(MODEL, 'Say something', stats, options={'num_ctx': 2048}))
+    assert ''.join(pieces) == expected_text()
+    assert stats.chunks == len(pieces) == FAST['reply_tokens']
+    assert stats.eval_count == FAST['reply_tokens'] and stats.tokens_per_second() > 0
+    assert stats.prompt_eval_count == 3
+    assert stats.load_duration > 0 and stats.total_duration > 0
+    assert stats.context == [1] * (3 + FAST['reply_tokens'])
+    assert stats.done_reason == 'stop' and not stats.stopped
+    assert 0 < stats.ttft <= stats.total
+    client.close()
+
+def test_generate_continues_context(mock):
+    client = OllamaClient(mock)
+    stats = GenerationStats()
+    assert client.generate(MODEL, 'Hi there', stats, context=[7, 7]) == \
+        ''.join(WORDS[(2 + i) % len(WORDS)] + ' ' for i in range(FAST['reply_tokens']))
+    assert stats.context[:2] == [7, 7]
+    client.close()
+
+def test_stream_stop_closes_response(mock):
+    client = OllamaClient(mock)
+    stats = GenerationStats()
+    stop = threading.Event()
+    for _ in client.stream_generate(MODEL, 'Hi', stats, stop):
+        stop.set()
+    assert stats.stopped and stats.eval_count is None
+    client.close()
+
+def test_retry_after_connection_error():
+    # Nothing listens on the port for the first attempts
+    port = free_port()
+    client = OllamaClient(f'http://127.0.0.1:{port}', retries=4, backoff=0.1)
+    servers = []
+    timer = threading.Timer(0.15, lambda: servers.append(start_server(port, **FAST)))
+    timer.start()
+    stats = GenerationStats()
+    try:
+        assert client.generate(MODEL, 'Hi', stats) == expected_text()
+        assert stats.retries >= 1
+    finally:
+        timer.join()
+        for server, _ in servers:
+            server.shutdown()
+            server.server_close()
+        client.close()
+
+def test_connection_error_after_retries():
+    client = OllamaClient(f'http://127.0.0.1:{free_port()}', retries=2, backoff=0.01)
+    stats = GenerationStats()
+    with pytest.raises(OllamaError, match='Cannot connect'):
+        client.generate(MODEL, 'Hi', stats)
+    assert stats.retries == 2
+
+def test_read_timeout():
+    server, url = start_server(**{**FAST, 'first_token_delay': 1.0})
+    client = OllamaClient(url, read_timeout=0.2, retries=0)
+    try:
+        with pytest.raises(OllamaError, match='No response'):
+            client.generate(MODEL, 'Hi')
+        # Streamed too, the wait for the next bytes is bounded, not the whole reply
+        start = time.perf_counter()
+        with pytest.raises(OllamaError):
+            list(client.stream_generate(MODEL, 'Hi'))
+        assert time.perf_counter() - start < 1.0
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+def test_server_error_status(mock):
+    client = OllamaClient(mock)
+    with pytest.raises(OllamaError, match='model is required'):
+        client.generate('', 'Hi')
+    client.close()
+
+def test_load_and_running_models(mock):
+    client = OllamaClient(mock)
+    assert client.load(MODEL, -1) == 'load'
+    assert client.running_models() == {MODEL: 'never'}
+    assert client.load(MODEL, 0) == 'unload'
+    assert client.running_models() == {}
+    assert len(client.embed('nomic-embed-text', 'hello')) == 64
+    client.close()
+
+# =========================
+# Async client
+# =========================
+def test_async_client(mock):
+    pytest.importorskip('httpx')
+    from ollama_client import AsyncOllamaClient
+
+    async def run():
+        client = AsyncOllamaClient(mock)
+        try:
+            stats = GenerationStats()
+            text = await client.generate(MODEL, 'Hi', stats)
+            assert text == expected_text() and stats.eval_count == FAST['reply_tokens']
+            stats = GenerationStats()
+            pieces = [piece async for piece in client.stream_generate(MODEL, 'Hi', stats)]
+            assert ''.join(pieces) == expected_text()
+            assert stats.chunks == FAST['reply_tokens'] and stats.context
+            with pytest.raises(OllamaError, match='model is required'):
+                await client.generate('', 'Hi')
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+def test_async_connection_error_after_retries():
+    pytest.importorskip('httpx')
+    from ollama_client import AsyncOllamaClient
+
+    async def run():
+        client = AsyncOllamaClient(f'http://127.0.0.1:{free_port()}', retries=2, backoff=0.01)
+        stats = GenerationStats()
+        try:
+            with pytest.raises(OllamaError, match='Cannot connect'):
+                await client.generate(MODEL, 'Hi', stats)
+            assert stats.retries == 2
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+
+def test_async_read_timeout():
+    pytest.importorskip('httpx')
+    from ollama_client import AsyncOllamaClient
+    server, url = start_server(**{**FAST, 'first_token_delay': 1.0})
+
+    async def run():
+        client = AsyncOllamaClient(url, read_timeout=0.2, retries=0)
+        try:
+            with pytest.raises(OllamaError, match='No response'):
+                await client.generate(MODEL, 'Hi')
+            start = time.perf_counter()
+            with pytest.raises(OllamaError):
+                [piece async for piece in client.stream_generate(MODEL, 'Hi')]
+            assert time.perf_counter() - start < 1.0
+        finally:
+            await client.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+        server.server_close()
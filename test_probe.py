@@ -0,0 +1,50 @@
+import socket
+
+import pytest
+
+from probe import ProbeService
+
+@pytest.fixture
+def service():
+    service = ProbeService(ttl=60, interval=3600, timeout=1.0, use_icmp=False)
+    yield service
+    service.close()
+
+@pytest.fixture
+def listener():
+    # Local stand-in for a probe target
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+    yield f"127.0.0.1:{server.getsockname()[1]}"
+    server.close()
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"127.0.0.1:{port}"
+
+def test_probe_all_listener(service, listener):
+    [result] = service.probe_all([listener], wait=5)
+    assert result.reachable
+    assert result.method == 'tcp'
+    assert result.latency is not None and result.latency < 1.0
+    assert service.cached(listener) is result
+    assert service.latency_history(listener) == [(result.checked_at, result.latency)]
+
+def test_probe_all_closed_port_counts_as_answered(service):
+    # A refused connection still proves the host is up
+    target = closed_port()
+    [result] = service.probe_all([target], wait=5)
+    assert result.reachable
+    assert service.cached(target) is result
+
+def test_probe_all_unresolvable_host(service, listener):
+    target = 'host.invalid:80'
+    results = service.probe_all([listener, target], wait=5)
+    assert [result.reachable for result in results] == [True, False]
+    assert results[1].error
+    assert service.cached(target) is results[1]
+    assert service.latency_history(target)[-1][1] is None
@@ -0,0 +1,44 @@
+import json
+
+from tree_index import TreeIndex
+
+TREE = [
+    {'name': 'Main Node User1', 'children': [
+        {'name': 'Node 1', 'children': ['Node 1.1', 'Node 1.2']},
+        {'name': 'Node 2', 'children': ['Leaf']},
+    ]},
+    {'name': 'Other', 'children': ['Node 2']},
+]
+
+def paths(index, query):
+    return [index.path(node_id) for node_id in index.search(query)]
+
+def test_label_search():
+    index = TreeIndex(TREE)
+    assert paths(index, 'node 1.') == ['Main Node User1/Node 1/Node 1.1', 'Main Node User1/Node 1/Node 1.2']
+    assert paths(index, 'le') == ['Main Node User1/Node 2/Leaf']
+
+def test_path_search_longest_part_is_an_ancestor():
+    index = TreeIndex(TREE)
+    assert paths(index, 'Main Node User1/Node 2') == ['Main Node User1/Node 2']
+    assert paths(index, 'user1/node 1/node 1.2') == ['Main Node User1/Node 1/Node 1.2']
+    assert paths(index, 'other/no') == ['Other/Node 2']
+
+def test_path_search_ending_with_slash():
+    index = TreeIndex(TREE)
+    assert paths(index, 'node 2/') == ['Main Node User1/Node 2/Leaf']
+
+def test_path_search_user1_tree():
+    with open('trees/user1.json', encoding='utf-8') as f:
+        index = TreeIndex(json.load(f))
+    # Path queries match by substring, so Node 2.1 matches too
+    assert paths(index, 'Main Node User1/Node 2') == ['Main Node User1/Node 2', 'Main Node User1/Node 2/Node 2.1']
+
+def test_update_keeps_sibling_ids():
+    index = TreeIndex(TREE)
+    before = {index.path(node_id): node_id for node_id in index.search('node')}
+    index.update([{'name': 'New', 'children': []}] + TREE)
+    after = {index.path(node_id): node_id for node_id in index.search('node')}
+    assert after == before
+    assert paths(index, 'new') == ['New']
+    assert [root['name'] for root in index.filtered_roots(index.search('n'))] == ['New', 'Main Node User1', 'Other']
@@ -0,0 +1,249 @@
+import bisect
+import threading
+from collections import defaultdict, deque
+
+from tree_model import node_children, node_name
+
+# Maximum number of matches returned by a search
+SEARCH_LIMIT = 2000
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+# =========================
+# Index
+# =========================
+# Search index over a tree definition. Labels are split into trigrams for
+# substring search; a sorted label list answers one and two character
+# queries by prefix. Queries containing '/' are matched against node paths.
+#
+# Every definition node gets an integer id. update() walks a new definition
+# alongside the indexed one and re-tokenizes only the subtrees that changed.
+# Siblings are matched by name rather than by row, so inserting, removing or
+# reordering a node leaves its siblings' ids and trigrams alone.
+class TreeIndex:
+    def __init__(self, roots=()):
+        self.lock = threading.Lock()
+        self.labels = []       # id -> lowercase label, None once removed
+        self.names = []        # id -> label as shown
+        self.parents = []      # id -> parent id, -1 for top-level nodes
+        self.rows = []         # id -> row under the parent
+        self.datas = []        # id -> definition node
+        self.children = []     # id -> child ids in row order
+        self.roots = []        # top-level ids in row order
+        self.postings = defaultdict(set)
+        self.sorted_labels = []
+        self.count = 0
+        with self.lock:
+            self.roots = [self.add_subtree(data, -1, row) for row, data in enumerate(roots)]
+            self.sorted_labels = sorted((label, node_id) for node_id, label in enumerate(self.labels)
+                                        if label is not None)
+
+    # ---- building ----
+    def add_subtree(self, data, parent_id, row, prefix_entries=None):
+        # Iterative so deep trees do not hit the recursion limit
+        root_id = self.add_node(data, parent_id, row, prefix_entries)
+        stack = [root_id]
+        while stack:
+            node_id = stack.pop()
+            for child_row, child in enumerate(node_children(self.datas[node_id])):
+                child_id = self.add_node(child, node_id, child_row, prefix_entries)
+                self.children[node_id].append(child_id)
+                stack.append(child_id)
+        return root_id
+
+    def add_node(self, data, parent_id, row, prefix_entries=None):
+        node_id = len(self.labels)
+        name = node_name(data)
+        label = name.lower()
+        self.labels.append(label)
+        self.names.append(name)
+        self.parents.append(parent_id)
+        self.rows.append(row)
+        self.datas.append(data)
+        self.children.append([])
+        for gram in trigrams(label):
+            self.postings[gram].add(node_id)
+        if prefix_entries is not None:
+            prefix_entries.append((label, node_id))
+        self.count += 1
+        return node_id
+
+    def remove_subtree(self, node_id, removed):
+        # Ids are collected in `removed` and dropped from sorted_labels in one pass
+        stack = [node_id]
+        while stack:
+            current = stack.pop()
+            stack.extend(self.children[current])
+            label = self.labels[current]
+            for gram in trigrams(label):
+                postings = self.postings.get(gram)
+                if postings is not None:
+                    postings.discard(current)
+                    if not postings:
+                        del self.postings[gram]
+            removed.add(current)
+            self.labels[current] = None
+            self.datas[current] = None
+            self.children[current] = []
+            self.count -= 1
+
+    # ---- incremental updates ----
+    def update(self, roots):
+        # Re-index only the parts of `roots` that differ from the indexed tree
+        with self.lock:
+            added = []
+            removed = set()
+            self.roots = self.sync_children(-1, self.roots, list(roots), added, removed)
+            if removed:
+                self.sorted_labels = [entry for entry in self.sorted_labels if entry[1] not in removed]
+            if len(added) < 64:
+                for entry in added:
+                    bisect.insort(self.sorted_labels, entry)
+            else:
+                self.sorted_labels.extend(added)
+                self.sorted_labels.sort()
+
+    def sync_children(self, parent_id, old_ids, new_datas, added, removed):
+        result = []
+        pairs = [(parent_id, old_ids, new_datas, result)]
+        while pairs:
+            pid, olds, news, out = pairs.pop()
+            # Old ids by name; siblings sharing a name are matched in row order
+            by_name = defaultdict(deque)
+            for old_id in olds:
+                by_name[self.names[old_id]].append(old_id)
+            for row, new in enumerate(news):
+                same = by_name.get(node_name(new))
+                if same:
+                    # Same node; keep its id and compare the children
+                    old_id = same.popleft()
+                    self.datas[old_id] = new
+                    self.rows[old_id] = row
+                    kept = []
+                    pairs.append((old_id, self.children[old_id], list(node_children(new)), kept))
+                    self.children[old_id] = kept
+                    out.append(old_id)
+                else:
+                    out.append(self.add_subtree(new, pid, row, added))
+            for unmatched in by_name.values():
+                for old_id in unmatched:
+                    self.remove_subtree(old_id, removed)
+        return result
+
+    # ---- queries ----
+    def path(self, node_id):
+        names = []
+        while node_id != -1:
+            names.append(self.names[node_id])
+            node_id = self.parents[node_id]
+        return '/'.join(reversed(names))
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        query = text.strip().lower()
+        if not query:
+            return []
+        with self.lock:
+            if '/' in query:
+                return self.search_path(query, limit)
+            return self.search_label(query, limit)
+
+    def search_label(self, query, limit):
+        if len(query) < 3:
+            # Prefix match on the sorted labels
+            matches = []
+            position = bisect.bisect_left(self.sorted_labels, (query, -1))
+            while position < len(self.sorted_labels) and len(matches) < limit:
+                label, node_id = self.sorted_labels[position]
+                if not label.startswith(query):
+                    break
+                matches.append(node_id)
+                position += 1
+            return sorted(matches)
+
+        candidates = self.candidates(query)
+        matches = []
+        for node_id in sorted(candidates):
+            if query in self.labels[node_id]:
+                matches.append(node_id)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def candidates(self, query):
+        postings = []
+        for gram in trigrams(query):
+            ids = self.postings.get(gram)
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    def containing(self, part):
+        # Ids whose label may contain `part`; trigram candidates are a superset
+        if len(part) >= 3:
+            return self.candidates(part)
+        return {node_id for node_id, label in enumerate(self.labels) if label is not None and part in label}
+
+    def search_path(self, query, limit):
+        # A match ends in the label of the matching node, so the last path
+        # component narrows down the candidates; their full paths are checked
+        parts = [part for part in query.split('/') if part]
+        if not parts:
+            return []
+        if query.endswith('/'):
+            # Ends at a parent; its children are the matching nodes
+            candidates = sorted(child_id for node_id in self.containing(parts[-1])
+                                for child_id in self.children[node_id])
+        else:
+            candidates = sorted(self.containing(parts[-1]))
+        matches = []
+        for node_id in candidates:
+            if query in self.path(node_id).lower():
+                matches.append(node_id)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    # ---- filtered trees ----
+    def filtered_roots(self, node_ids):
+        # Definition containing only the matches and their ancestors. Matches
+        # keep their original (lazily expandable) subtrees; ancestors are
+        # copies marked 'filtered' so the view can expand them.
+        with self.lock:
+            matched = set(node_ids)
+            entries = {}
+            kids = defaultdict(list)
+            for node_id in sorted(matched):
+                if self.has_matched_ancestor(node_id, matched):
+                    continue
+                entries[node_id] = self.datas[node_id]
+                current = node_id
+                while True:
+                    parent_id = self.parents[current]
+                    kids[parent_id].append(current)
+                    if parent_id == -1 or parent_id in entries:
+                        break
+                    entries[parent_id] = {'name': self.names[parent_id], 'children': [], 'filtered': True}
+                    current = parent_id
+            for parent_id, child_ids in kids.items():
+                ordered = [entries[child_id] for child_id in sorted(child_ids, key=self.rows.__getitem__)]
+                if parent_id == -1:
+                    roots = ordered
+                else:
+                    entries[parent_id]['children'] = ordered
+            return roots if kids else []
+
+    def has_matched_ancestor(self, node_id, matched):
+        parent_id = self.parents[node_id]
+        while parent_id != -1:
+            if parent_id in matched:
+                return True
+            parent_id = self.parents[parent_id]
+        return False
@@ -0,0 +1,138 @@
+import json
+
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+# Children created per fetchMore call when a branch is expanded
+FETCH_BATCH = 1000
+
+# Background for labels containing the current search text
+HIGHLIGHT_COLOR = QColor('#fff59d')
+
+# =========================
+# Tree definition
+# =========================
+# A definition file is a JSON list of nodes. A node is either a plain string
+# (a leaf) or {"name": ..., "children": [...]}.
+def load_tree_definition(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+def node_name(data):
+    return data if isinstance(data, str) else data['name']
+
+def node_children(data):
+    return () if isinstance(data, str) else data.get('children', ())
+
+# Model-side wrapper around a definition node. Wrappers only exist for
+# branches that have been expanded, so memory follows what the user has seen.
+class TreeNode:
+    __slots__ = ('data', 'name', 'parent', 'row', 'children')
+
+    def __init__(self, data, parent=None, row=0):
+        self.data = data
+        self.name = node_name(data) if data is not None else ''
+        self.parent = parent
+        self.row = row
+        self.children = []
+
+    def child_count(self):
+        # Children in the definition, whether or not they are materialized yet
+        return len(node_children(self.data)) if self.data is not None else 0
+
+    def is_leaf(self):
+        return self.child_count() == 0
+
+    def is_filtered(self):
+        # Ancestor copy built by TreeIndex.filtered_roots for a search result
+        return isinstance(self.data, dict) and self.data.get('filtered', False)
+
+    def path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            names.append(node.name)
+            node = node.parent
+        return '/'.join(reversed(names))
+
+# =========================
+# Model
+# =========================
+class LazyTreeModel(QAbstractItemModel):
+    def __init__(self, roots=(), header='Navigation Tree', parent=None):
+        super().__init__(parent)
+        self.header = header
+        self.highlight = ''
+        self.root = TreeNode({'name': '', 'children': list(roots)})
+
+    def set_roots(self, roots, highlight=''):
+        self.beginResetModel()
+        self.root = TreeNode({'name': '', 'children': list(roots)})
+        self.highlight = highlight.strip().lower()
+        self.endResetModel()
+
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node(parent)
+        if column != 0 or row < 0 or row >= len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        return self.node(parent).child_count() > 0
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return len(node.children) < node.child_count()
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        start = len(node.children)
+        definitions = node_children(node.data)
+        end = min(start + FETCH_BATCH, len(definitions))
+        if end <= start:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        node.children.extend(TreeNode(definitions[row], node, row) for row in range(start, end))
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return index.internalPointer().name
+        if role == Qt.BackgroundRole and self.highlight:
+            # Path queries highlight on their last component
+            text = self.highlight.rsplit('/', 1)[-1]
+            if text and text in index.internalPointer().name.lower():
+                return HIGHLIGHT_COLOR
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section == 0:
+            return self.header
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable